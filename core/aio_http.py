@@ -0,0 +1,69 @@
+"""
+Pooled aiohttp sessions for the async views.
+
+A ClientSession belongs to the event loop it was created on, so one session is
+kept per loop and shared by every request that loop serves. Its connector caps
+the open gateway connections and keeps them alive between requests. aiohttp is
+imported by the first session, so sync workers never load it.
+"""
+import asyncio
+import weakref
+from typing import TYPE_CHECKING, Any, Dict
+
+from django.conf import settings
+
+from core.metrics import gateway_timer
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# razorpay.constants.url.URL, importing it would load the whole razorpay sdk
+RAZORPAY_BASE_URL = 'https://api.razorpay.com/v1'
+RAZORPAY_ORDER_URL = '/orders'
+
+_sessions = weakref.WeakKeyDictionary()
+
+
+def get_session() -> 'aiohttp.ClientSession':
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.ASYNC_HTTP_POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=settings.ASYNC_HTTP_TIMEOUT),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_session() -> None:
+    """Close the session of the running loop, for shutdown hooks."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+class AsyncRazorpayClient:
+    """The razorpay order calls of the payment views over the pooled session."""
+    base_url = RAZORPAY_BASE_URL
+
+    def __init__(self, key_id: str = None, key_secret: str = None):
+        import aiohttp
+
+        self.auth = aiohttp.BasicAuth(key_id or settings.RAZORPAY_KEY_ID,
+                                      key_secret or settings.RAZORPAY_KEY_SECRET)
+
+    async def request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        with gateway_timer('razorpay'):
+            async with get_session().request(method, f'{self.base_url}{path}', auth=self.auth,
+                                             **kwargs) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def create_order(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.request('POST', RAZORPAY_ORDER_URL, json=data)
+
+    async def fetch_order(self, razorpay_order_id: str) -> Dict[str, Any]:
+        return await self.request('GET', f'{RAZORPAY_ORDER_URL}/{razorpay_order_id}')
@@ -1,4 +1,6 @@
 
+from typing import Dict
+
 from rest_framework import (
     serializers,
 )
@@ -10,11 +12,17 @@ from core.models import (
 
 
 class ItemSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Item
-        fields = '__all__'
+        exclude = ['image_source']
         read_only_fields = ['id', 'count']
 
+    def get_image_variants(self, obj) -> Dict[str, str]:
+        storage = obj.image.storage
+        return {variant: storage.url(name) for variant, name in obj.image_variants.items()}
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,18 +1,18 @@
-import phonenumbers
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from core.constants import SMSDeliveryStatus
+from core.phone import normalize_phone
+
 
 class CreateOTPSerializer(serializers.Serializer):
     """Serializer for creating otp."""
     phone = serializers.CharField()
 
     def validate(self, attrs):
-        phone = attrs.get('phone')
         try:
-            if not phonenumbers.is_valid_number(phonenumbers.parse(phone)):
-                raise ValidationError('phone number is not valid')
-        except Exception as e:
+            attrs['phone'] = normalize_phone(attrs.get('phone'))
+        except ValueError:
             raise ValidationError({'phone': 'phone number is not valid'})
 
         return attrs
@@ -27,6 +27,12 @@ class VerifyOTPSerializer(serializers.Serializer):
     otp = serializers.CharField()
 
 
+class OTPDeliveryStatusSerializer(serializers.Serializer):
+    delivery_id = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=[tag.value for tag in SMSDeliveryStatus])
+    message = serializers.CharField(allow_blank=True)
+
+
 class TokenRefreshResponseSerializer(serializers.Serializer):
     access = serializers.CharField()
 
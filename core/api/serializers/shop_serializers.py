@@ -1,13 +1,63 @@
+from typing import Dict, Optional
+
 from rest_framework import serializers
 
-from core.models import Shop, Review
+from core.constants import NEAREST_SHOP_RADIUS_KM, NEAREST_SHOP_MAX_RADIUS_KM
+from core.models import Shop, Review, Address, ShopRating
+
+
+class ShopRatingSerializer(serializers.ModelSerializer):
+    average = serializers.SerializerMethodField()
+    histogram = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShopRating
+        fields = ['count', 'average', 'histogram']
+
+    def get_average(self, obj) -> Optional[float]:
+        return round(obj.rating_sum / obj.count, 2) if obj.count else None
+
+    def get_histogram(self, obj) -> Dict[int, int]:
+        return {stars: getattr(obj, f'stars_{stars}') for stars in range(1, 6)}
 
 
 class ShopSerializer(serializers.ModelSerializer):
+    rating = ShopRatingSerializer(read_only=True)
+
     class Meta:
         model = Shop
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'user', 'geohash']
+
+    def validate(self, attrs):
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError('latitude and longitude must be set together.')
+        return attrs
+
+
+class NearestShopSerializer(ShopSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+
+class NearestShopRequestSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    address_id = serializers.UUIDField(required=False)
+    radius_km = serializers.FloatField(min_value=0.1, max_value=NEAREST_SHOP_MAX_RADIUS_KM,
+                                       default=NEAREST_SHOP_RADIUS_KM)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs):
+        if 'address_id' in attrs:
+            address = Address.objects.filter(pk=attrs['address_id'], user=self.context['request'].user).first()
+            if address is None or address.latitude is None or address.longitude is None:
+                raise serializers.ValidationError({'address_id': 'Address not found or has no coordinates.'})
+            attrs['latitude'], attrs['longitude'] = address.latitude, address.longitude
+        elif 'latitude' not in attrs or 'longitude' not in attrs:
+            raise serializers.ValidationError('Either latitude and longitude or address_id is required.')
+        return attrs
 
 
 class ShopReviewSerializer(serializers.ModelSerializer):
@@ -15,3 +65,8 @@ class ShopReviewSerializer(serializers.ModelSerializer):
         model = Review
         exclude = ['created_at', 'updated_at', 'user']
         read_only_fields = ['id']
+
+    def validate_shop(self, value):
+        if self.instance and self.instance.shop_id != value.id:
+            raise serializers.ValidationError('A review can not be moved to another shop.')
+        return value
@@ -1,5 +1,8 @@
+from datetime import datetime, timedelta
+
 from rest_framework import serializers
 
+from core.constants import TIMESLOTS_DAYS, TIMESLOT_LOAD_MAX_DAYS
 from core.models import Timeslot, BookTimeslot, Shop
 
 
@@ -41,3 +44,40 @@ class BookingSerializer(serializers.ModelSerializer):
         model = BookTimeslot
         fields = '__all__'
         read_only_fields = ['id', 'user']
+
+
+class TimeslotLoadRequestSerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date') or datetime.utcnow().date()
+        end_date = attrs.get('end_date') or start_date + timedelta(days=TIMESLOTS_DAYS - 1)
+        if end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'end_date must not be before start_date.'})
+        if (end_date - start_date).days >= TIMESLOT_LOAD_MAX_DAYS:
+            raise serializers.ValidationError(
+                {'end_date': f'The range can not be longer than {TIMESLOT_LOAD_MAX_DAYS} days.'})
+        attrs['start_date'], attrs['end_date'] = start_date, end_date
+        return attrs
+
+
+class TimeslotLoadSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    start_datetime = serializers.DateTimeField()
+    end_datetime = serializers.DateTimeField()
+    capacity = serializers.IntegerField()
+    pickup_booked = serializers.IntegerField()
+    delivery_booked = serializers.IntegerField()
+    pickup_utilisation = serializers.FloatField()
+    delivery_utilisation = serializers.FloatField()
+
+
+class DayLoadSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    capacity = serializers.IntegerField()
+    pickup_booked = serializers.IntegerField()
+    delivery_booked = serializers.IntegerField()
+    pickup_utilisation = serializers.FloatField()
+    delivery_utilisation = serializers.FloatField()
+    timeslots = TimeslotLoadSerializer(many=True)
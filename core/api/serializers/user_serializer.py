@@ -1,9 +1,31 @@
 """"
 Serializer for user.
 """
+from django.db import IntegrityError, transaction
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from core.models import Address, User
+from core.phone import normalize_phone
+from core.preferences import parse_other_details
+
+# postgres names the violated constraint, sqlite only lists its columns
+ADDRESS_CONSTRAINT_ERRORS = [
+    (('unique_primary_address_per_user_and_type', 'core_address.user_id, core_address.type'),
+     'There is already a primary address with the same type.'),
+    (('unique_address_per_user', 'core_address.address_line_1'),
+     'An address with the same details already exists.'),
+]
+
+
+def address_integrity_error(error: IntegrityError) -> serializers.ValidationError:
+    """The validation error of the address constraint violated by error."""
+    message = str(error)
+    for markers, detail in ADDRESS_CONSTRAINT_ERRORS:
+        if any(marker in message for marker in markers):
+            return serializers.ValidationError(detail)
+    raise error
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -12,38 +34,75 @@ class AddressSerializer(serializers.ModelSerializer):
         exclude = ['user']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def validate(self, data):
-        user = self.context['request'].user
-        address_line_1 = data.get('address_line_1')
-        address_line_2 = data.get('address_line_2', '')
-        city = data.get('city')
-        country = data.get('country')
-        address_type = data.get('type')
-        is_primary = data.get('is_primary', False)
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as e:
+            raise address_integrity_error(e)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as e:
+            raise address_integrity_error(e)
+
+
+class AddressSyncSerializer(AddressSerializer):
+    """An address of the synced address book, addresses without an id are created."""
+    id = serializers.UUIDField(required=False)
+
 
-        existing_address = Address.objects.filter(
-            user=user,
-            address_line_1=address_line_1,
-            address_line_2=address_line_2,
-            city=city,
-            country=country,
-            type=address_type
-        )
+class PreferencesSerializer(serializers.Serializer):
+    availability = serializers.ChoiceField(choices=['Yes', 'No'])
+    notifications = serializers.ChoiceField(choices=['On', 'Off'])
+    language = serializers.CharField(max_length=50)
+    dark_mode = serializers.ChoiceField(choices=['Yes', 'No'])
 
-        if existing_address.exists():
-            raise serializers.ValidationError("An address with the same details already exists.")
 
-        if is_primary and Address.objects.filter(user=user, type=address_type, is_primary=True).exists():
-            raise serializers.ValidationError("There is already a primary address with the same type.")
+def get_user_preferences(user: User) -> dict:
+    return user.preferences if user.preferences is not None else parse_other_details(user.other_details)
 
-        return data
+
+@extend_schema_field(OpenApiTypes.STR)
+class OtherDetailsField(serializers.Field):
+    """
+    The deprecated other_details text, kept for the clients that have not moved
+    to preferences. It is rendered from the preferences and a write replaces them.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', required=False,
+                         help_text='Deprecated, use preferences. The repr of the preferences dict.', **kwargs)
+
+    def to_representation(self, user):
+        return str(get_user_preferences(user))
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            raise serializers.ValidationError('other_details must be a string.')
+        preferences = parse_other_details(data)
+        return {'preferences': preferences, 'other_details': str(preferences)}
 
 
 class UserSerializer(serializers.ModelSerializer):
     address = AddressSerializer(many=True, read_only=True)
+    preferences = serializers.SerializerMethodField()
+    other_details = OtherDetailsField()
 
     class Meta:
         model = User
-        fields = ['id', 'first_name', 'last_name', 'email', 'phone', 'other_details', 'is_phone_verified',
-                  'cart_total_price', 'address']
+        fields = ['id', 'first_name', 'last_name', 'email', 'phone', 'preferences', 'other_details',
+                  'is_phone_verified', 'cart_total_price', 'address']
         read_only_fields = ['id', 'is_phone_verified', 'cart_total_price', 'address']
+
+    @extend_schema_field(PreferencesSerializer)
+    def get_preferences(self, obj):
+        return get_user_preferences(obj)
+
+    def validate_phone(self, value):
+        try:
+            return normalize_phone(value)
+        except ValueError:
+            raise serializers.ValidationError('phone number is not valid')
@@ -0,0 +1,137 @@
+"""
+Async variants of the gateway bound views, served from the ASGI entry point.
+
+The SMS and razorpay round trips are awaited on the event loop over pooled
+aiohttp sessions, so a waiting request holds no worker thread. The ORM is only
+reached through sync_to_async.
+"""
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import otp_store, sms
+from core.aio_http import AsyncRazorpayClient
+from core.api.serializers import login_serializers
+from core.api.serializers.payment_serializers import (
+    PaymentSerializer, RazorpayInitiateSerializer, RazorpayPaymentInitiateResponseSerializer)
+from core.api.views.login_views import generate_otp
+from core.api.views.payment_views import RazorpayPaymentInfoView
+from core.constants import OTP_MESSAGE, SMSDeliveryStatus
+from core.models import Order, Payment
+from core.throttling import UserRateThrottle
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines.
+
+    Authentication, permissions and throttling read the database and the cache,
+    so they run in sync_to_async before the handler is awaited.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+@extend_schema(
+    tags=['Auth'],
+    responses=login_serializers.OTPDeliveryStatusSerializer,
+)
+class AsyncSendOTPView(AsyncAPIView):
+    """Generate otp and send it, the response carries the gateway outcome."""
+    throttle_classes = [UserRateThrottle]
+    serializer_class = login_serializers.CreateOTPSerializer
+    permission_classes = [permissions.AllowAny]
+
+    async def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        phone = serializer.validated_data['phone']
+        otp = generate_otp()
+        await sync_to_async(otp_store.issue_otp)(phone, otp)
+
+        delivery = await sms.asend(phone, OTP_MESSAGE.format(otp=otp))
+        if delivery['status'] == SMSDeliveryStatus.FAILED.value:
+            return Response(delivery, status=status.HTTP_400_BAD_REQUEST)
+        return Response(delivery, status=status.HTTP_200_OK)
+
+
+class AsyncRazorpayPaymentInfoView(AsyncAPIView):
+    """RazorpayPaymentInfoView with the razorpay order calls awaited on the event loop."""
+    throttle_classes = [UserRateThrottle]
+    serializer_class = RazorpayInitiateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @staticmethod
+    @sync_to_async
+    def get_payment(order_obj: Order) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        payment = Payment.objects.filter(order=order_obj, amount=order_obj.total_price).first()
+        if not payment:
+            return None, None
+        razorpay_payment = RazorpayPaymentInfoView.get_razorpay_payment(payment)
+        return PaymentSerializer(payment).data, razorpay_payment.razorpay_order_id
+
+    @staticmethod
+    @sync_to_async
+    def start_payment(order_obj: Order, user_id) -> Dict[str, Any]:
+        RazorpayPaymentInfoView.delete_payment(order_obj)
+        return RazorpayPaymentInfoView.create_payment(order_obj, user_id)
+
+    @extend_schema(
+        tags=['Razorpay Payment'],
+        parameters=[
+            OpenApiParameter(name='order_id', required=True, type=str)
+        ],
+        responses=RazorpayPaymentInitiateResponseSerializer
+    )
+    async def get(self, request):
+        serializer = self.serializer_class(data={'order_id': request.query_params.get('order_id')})
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        order_obj = serializer.validated_data['order_id']
+
+        import aiohttp
+
+        client = AsyncRazorpayClient()
+        payment_data, razorpay_order_id = await self.get_payment(order_obj)
+        try:
+            if payment_data is None:
+                payment_data = await self.start_payment(order_obj, request.user.id)
+                razorpay_order = await client.create_order(
+                    RazorpayPaymentInfoView.get_razorpay_order_data(order_obj, payment_data.get('id')))
+                RazorpayPaymentInfoView.check_razorpay_order(razorpay_order)
+                await sync_to_async(RazorpayPaymentInfoView.create_razorpay_payment)(
+                    payment_data.get('id'), razorpay_order.get('id'))
+            else:
+                razorpay_order = await client.fetch_order(razorpay_order_id)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return Response({'error': 'Payment gateway is unavailable.'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        response_data = {
+            'payment': payment_data,
+            'razorpay': razorpay_order
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
@@ -3,11 +3,11 @@ import uuid
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
 
 from core.api.serializers.cart_serializers import CartSerializer, CartResponseSerializer
 from core.api.views.user_views import UserDetailView
 from core.models import Cart, Item, WashCategory
+from core.throttling import UserRateThrottle
 
 
 @extend_schema(tags=['Cart'], request=CartSerializer)
@@ -20,7 +20,8 @@ class CartListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Cart.objects.filter(user=user, quantity__gte=1)
+        # the nested item and wash category of every row come from the same query
+        return Cart.objects.filter(user=user, quantity__gte=1).select_related('item', 'wash_category')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -73,7 +74,7 @@ class CartListCreateView(generics.ListCreateAPIView):
 )
 class CartListRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     throttle_classes = [UserRateThrottle]
-    queryset = Cart.objects.all()
+    queryset = Cart.objects.select_related('item', 'wash_category')
     serializer_class = CartResponseSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
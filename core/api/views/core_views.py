@@ -1,29 +1,77 @@
-from drf_spectacular.utils import extend_schema
+import json
+
+from django_filters import filters
+from django_filters.rest_framework import DjangoFilterBackend, FilterSet
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import (
     permissions)
+from rest_framework.exceptions import ValidationError
 
 from core.api.serializers.core_serializers import (
     ItemSerializer,
     CategorySerializer)
-from core.custom_view_sets import BaseAttrViewSet
+from core.custom_view_sets import (BaseAttrViewSet, CatalogListMixin, PopularOrderingMixin,
+                                    ReplicaReadMixin)
 from core.models import (
     Item,
     WashCategory)
 
 
+class ItemFilter(FilterSet):
+    """Name search and extras filters, backed by the indexes in core.postgres."""
+    search = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    prefix = filters.CharFilter(field_name='name', lookup_expr='istartswith',
+                                help_text='Case insensitive start of the item name.')
+    extras = filters.CharFilter(method='filter_extras',
+                                help_text='Comma separated key:value pairs the item extras must contain.')
+    has_extras = filters.CharFilter(method='filter_has_extras',
+                                    help_text='Comma separated keys the item extras must have.')
+
+    class Meta:
+        model = Item
+        fields = ['search', 'prefix', 'extras', 'has_extras']
+
+    @staticmethod
+    def parse_extra_value(value: str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def filter_extras(self, queryset, name, value):
+        extras = {}
+        for pair in value.split(','):
+            key, separator, extra_value = pair.partition(':')
+            if not separator:
+                raise ValidationError({'extras': 'Expected comma separated key:value pairs.'})
+            extras[key.strip()] = self.parse_extra_value(extra_value.strip())
+        return queryset.filter(extras__contains=extras)
+
+    def filter_has_extras(self, queryset, name, value):
+        return queryset.filter(extras__has_keys=[key.strip() for key in value.split(',')])
+
+
 @extend_schema(
     tags=['Washable Item'],
+    parameters=[
+        OpenApiParameter(name='ordering', enum=['popular'], type=str),
+    ]
 )
-class ItemView(BaseAttrViewSet):
+class ItemView(ReplicaReadMixin, CatalogListMixin, PopularOrderingMixin, BaseAttrViewSet):
     """Item model views."""
     serializer_class = ItemSerializer
     queryset = Item.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ItemFilter
 
 
 @extend_schema(
     tags=['Wash Categories'],
+    parameters=[
+        OpenApiParameter(name='ordering', enum=['popular'], type=str),
+    ]
 )
-class CategoryView(BaseAttrViewSet):
+class CategoryView(ReplicaReadMixin, CatalogListMixin, PopularOrderingMixin, BaseAttrViewSet):
     """WashCategory model views."""
     serializer_class = CategorySerializer
     queryset = WashCategory.objects.all()
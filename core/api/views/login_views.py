@@ -1,28 +1,22 @@
 import random
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.contrib.auth.hashers import make_password
 from drf_spectacular.utils import extend_schema
 from rest_framework import permissions, status
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
-from twilio.base.exceptions import TwilioRestException
-from twilio.rest import Client
 
-from WashForMe_Backend import settings
-from core import models
+from core import otp_store, sms
 from core.api.serializers import (
     login_serializers,
     user_serializer
 )
 from core.api.serializers.login_serializers import VerifyOTPSerializer
-
-
-def TwilioClient():
-    return Client(settings.ACCOUNT_SID, settings.AUTH_TOKEN)
+from core.constants import OTP_MESSAGE, OTPCheckResult
+from core.throttling import UserRateThrottle
 
 
 def generate_otp():
@@ -31,44 +25,46 @@ def generate_otp():
 
 @extend_schema(
     tags=['Auth'],
+    responses={
+        status.HTTP_202_ACCEPTED: login_serializers.OTPDeliveryStatusSerializer,
+    }
 )
 class SendOTPView(APIView):
-    """Generate otp and stores in phone number table."""
+    """Generate otp and queue it for delivery, the sms gateway is not called on the request thread."""
     throttle_classes = [UserRateThrottle]
     serializer_class = login_serializers.CreateOTPSerializer
     permission_classes = [permissions.AllowAny]
 
     @staticmethod
-    def send_otp(phone, otp):
-        # Send otp with twilio account.
-        try:
-            my_otp = f'Your OTP is {otp}.'
-            client = TwilioClient()
-            message = client.messages.create(
-                body=my_otp,
-                to=phone,
-                from_=settings.TWILIO_PHONE_NUMBER,
-            )
-        except TwilioRestException as e:
-            error_dict, error_message = {'send': False, 'message': str(e)}, None
-            if e.code == 21211:
-                error_message = "Invalid phone number"
-            elif e.code == 21608:
-                error_message = "The number is unverified."
-
-            if error_message:
-                error_dict['message'] = error_message
-            return error_dict
-        return {'send': True, 'message': message}
+    def send_otp(phone, otp) -> str:
+        """Queue the otp message and return its delivery id."""
+        return sms.send_async(phone, OTP_MESSAGE.format(otp=otp))
 
     def post(self, request):
-        phone = request.data.get('phone')
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        phone = serializer.validated_data['phone']
         otp = generate_otp()
-        cache.set(phone, otp, timeout=300)
-        response = self.send_otp(phone, otp)
-        if response['send']:
-            return Response({'message': 'OTP sent successfully.'})
-        return Response({'message': response['message']}, status=status.HTTP_400_BAD_REQUEST)
+        otp_store.issue_otp(phone, otp)
+        delivery_id = self.send_otp(phone, otp)
+        return Response({'delivery_id': delivery_id, **sms.get_delivery_status(delivery_id)},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema(
+    tags=['Auth'],
+    responses=login_serializers.OTPDeliveryStatusSerializer,
+)
+class OTPDeliveryStatusView(APIView):
+    """Delivery status of a queued otp message."""
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, delivery_id):
+        delivery_status = sms.get_delivery_status(str(delivery_id))
+        if delivery_status is None:
+            return Response({'message': 'Unknown or expired delivery id.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'delivery_id': str(delivery_id), **delivery_status})
 
 
 @extend_schema(
@@ -87,19 +83,17 @@ class OTPLoginView(APIView):
     def post(self, request) -> Response:
         serializer = login_serializers.LoginOTPSerializer(data=request.data)
         if serializer.is_valid():
-            phone_number = request.data.get('phone')
-            otp = request.data.get('otp')
-            cache_otp = cache.get(phone_number)
-            # todo replace below line
-            cache_otp = '0000'
-            if cache_otp == otp:
-                try:
-                    user = get_user_model().objects.get(phone=phone_number)
-                except models.User.DoesNotExist:
-                    user = get_user_model().objects.create_user(phone=phone_number, is_phone_verified=True)
-
-                user.is_phone_verified = True
-                user.save()
+            phone_number = serializer.validated_data['phone']
+            otp = serializer.validated_data['otp']
+            otp_result = otp_store.check_otp(phone_number, otp)
+            if otp_result == OTPCheckResult.VERIFIED:
+                user, created = get_user_model().objects.get_or_create(
+                    phone=phone_number,
+                    defaults={'is_phone_verified': True, 'password': make_password(None)}
+                )
+                if not user.is_phone_verified:
+                    user.is_phone_verified = True
+                    user.save(update_fields=['is_phone_verified', 'updated_at'])
 
                 token = RefreshToken.for_user(user)
 
@@ -108,8 +102,10 @@ class OTPLoginView(APIView):
                     'access': str(token.access_token),
                 }
 
-                cache.delete(phone_number)
                 return Response(response_data)
+            elif otp_result == OTPCheckResult.LOCKED:
+                return Response({"error": "Too many attempts, request a new OTP later."},
+                                status=status.HTTP_429_TOO_MANY_REQUESTS)
             else:
                 return Response({"error": "OTP not generated or mismatching."},
                                  status=status.HTTP_400_BAD_REQUEST)
@@ -129,14 +125,17 @@ class VerifyOtpView(APIView):
         user = request.user
         otp = request.data.get('otp')
         phone_number = user.phone
-        cache_otp = cache.get(phone_number)
+        otp_result = otp_store.check_otp(phone_number, otp)
 
-        if cache_otp == otp:
+        if otp_result == OTPCheckResult.VERIFIED:
             user.is_phone_verified = True
             user.save()
-
+            return Response({'message': 'Phone number verified.'})
+        elif otp_result == OTPCheckResult.LOCKED:
+            return Response({"error": "Too many attempts, request a new OTP later."},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS)
         else:
-            return Response({"error": "OTP not generated or expired."})
+            return Response({"error": "OTP not generated or expired."}, status=status.HTTP_400_BAD_REQUEST)
 
 
 @extend_schema(
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views import View
+
+from core.metrics import render_metrics
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint, guarded by METRICS_TOKEN as a bearer token.
+    Without a token it is only open when DEBUG is on.
+    """
+
+    def get(self, request, *args, **kwargs):
+        token = settings.METRICS_TOKEN
+        if not token and not settings.DEBUG:
+            return HttpResponseForbidden()
+        if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
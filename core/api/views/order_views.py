@@ -4,15 +4,18 @@ from django_filters import filters
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
 from rest_framework.views import APIView
 
 from core.api.serializers.order_serializers import (OrderSerializer,
                                                     CartToOrderRequestSerializer,
                                                     OrderDetailsSerializer)
 from core.constants import OrderStatus
+from core.custom_view_sets import ColumnarListMixin, ReplicaReadMixin
 from core.models import Order, Cart
+from core.renderers import FORMAT_PARAMETER, columnar_responses
+from core.throttling import UserRateThrottle
 
 
 class OrderFilter(FilterSet):
@@ -42,14 +45,21 @@ class OrderFilter(FilterSet):
 @extend_schema(
     tags=['Orders'],
 )
-class OrderListCreateAPIView(generics.ListCreateAPIView):
+class OrderListCreateAPIView(ReplicaReadMixin, ColumnarListMixin, generics.ListCreateAPIView):
     throttle_classes = [UserRateThrottle]
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Order.objects.all()
+    queryset = Order.objects.prefetch_related('order_details')
     serializer_class = OrderSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = OrderFilter
 
+    @extend_schema(
+        parameters=[FORMAT_PARAMETER],
+        responses=columnar_responses(OrderSerializer),
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 @extend_schema(
     tags=['Orders'],
@@ -74,34 +84,34 @@ class CartToOrderAPIView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = request.user
-        cart_items = Cart.objects.filter(user=user)
+        cart_items = list(Cart.objects.filter(user=user).select_related('item', 'wash_category'))
 
         if not cart_items:
             return Response({'detail': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # the cart rows already hold the items and wash categories, only the quantities need validating
+        quantity_field = OrderDetailsSerializer().fields['quantity']
         order_details = []
         for cart_item in cart_items:
-            order_detail_data = {
-                'product': cart_item.item.id,
-                'wash_category': cart_item.wash_category.id,
+            try:
+                quantity_field.run_validation(cart_item.quantity)
+            except ValidationError as e:
+                raise ValidationError({'order_details': [{'quantity': e.detail}]})
+            order_details.append({
+                'product': cart_item.item,
+                'wash_category': cart_item.wash_category,
                 'quantity': cart_item.quantity,
-            }
-            order_detail_serializer = OrderDetailsSerializer(data=order_detail_data)
-            order_detail_serializer.is_valid(raise_exception=True)
-            order_details.append(order_detail_data)
-
-        order_data = {
-            'pickup_booking': serializer.validated_data['pickup_booking'].id,
-            'delivery_booking': serializer.validated_data['delivery_booking'].id,
-            'order_details': order_details
-        }
+            })
 
-        order_serializer = OrderSerializer(data=order_data, context={'request': request})
-        order_serializer.is_valid(raise_exception=True)
-        order_serializer.save()
+        order_serializer = OrderSerializer(context={'request': request})
+        order = order_serializer.create({
+            'pickup_booking': serializer.validated_data['pickup_booking'],
+            'delivery_booking': serializer.validated_data['delivery_booking'],
+            'order_details': order_details
+        })
 
-        cart_items.delete()
+        Cart.objects.filter(user=user).delete()
         user.cart_total_price = 0
         user.save()
 
-        return Response(order_serializer.data, status=status.HTTP_201_CREATED)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
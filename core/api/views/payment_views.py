@@ -1,15 +1,13 @@
 import logging
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 
-import razorpay
-from django.conf import settings
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from razorpay.errors import SignatureVerificationError
 from rest_framework import permissions, status
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
 from rest_framework.views import APIView
 
+from core import razorpay_gateway
 from core.api.serializers.order_serializers import OrderSerializer
 from core.api.serializers.payment_serializers import (
     RazorpayPaymentRequestSerializer, RazorpayOrderResponseSerializer,
@@ -17,7 +15,13 @@ from core.api.serializers.payment_serializers import (
     RazorpayPartialPaymentSerializer
 )
 from core.constants import INR_UNIT, PaymentSource, PaymentStatus, OrderStatus
+from core.metrics import gateway_timer
 from core.models import Payment, Order, RazorpayPayment
+from core.signals import payment_success_signal
+from core.throttling import UserRateThrottle
+
+if TYPE_CHECKING:
+    import razorpay
 
 logger = __import__("logging").getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -78,13 +82,12 @@ class RazorpayPaymentInfoView(APIView):
         return Response(response_data, status=status.HTTP_200_OK)
 
     @staticmethod
-    def get_client() -> razorpay.Client:
-        return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID,
-                                     settings.RAZORPAY_KEY_SECRET))
+    def get_client() -> 'razorpay.Client':
+        return razorpay_gateway.get_client()
 
     @staticmethod
-    def create_razorpay_order(client: razorpay.Client, order_obj: Order, payment_id: str) -> Dict[str, Any]:
-        razorpay_order_data = {
+    def get_razorpay_order_data(order_obj: Order, payment_id: str) -> Dict[str, Any]:
+        return {
             "amount": int(order_obj.total_price * INR_UNIT),
             "currency": "INR",
             "notes": {
@@ -93,15 +96,25 @@ class RazorpayPaymentInfoView(APIView):
             },
             "partial_payment": False
         }
-        razorpay_order = client.order.create(data=razorpay_order_data)
+
+    @staticmethod
+    def check_razorpay_order(razorpay_order: Dict[str, Any]) -> None:
         razorpay_order_serializer = RazorpayOrderResponseSerializer(data=razorpay_order)
         if not razorpay_order_serializer.is_valid():
             logger.warning('razorpay create order api response changed')
+
+    @staticmethod
+    def create_razorpay_order(client: 'razorpay.Client', order_obj: Order, payment_id: str) -> Dict[str, Any]:
+        razorpay_order_data = RazorpayPaymentInfoView.get_razorpay_order_data(order_obj, payment_id)
+        with gateway_timer('razorpay'):
+            razorpay_order = client.order.create(data=razorpay_order_data)
+        RazorpayPaymentInfoView.check_razorpay_order(razorpay_order)
         return razorpay_order
 
     @staticmethod
-    def get_razorpay_order_details(client: razorpay.Client, razorpay_order_id: str) -> Optional[Dict[str, Any]]:
-        return client.order.fetch(razorpay_order_id)
+    def get_razorpay_order_details(client: 'razorpay.Client', razorpay_order_id: str) -> Optional[Dict[str, Any]]:
+        with gateway_timer('razorpay'):
+            return client.order.fetch(razorpay_order_id)
 
     @staticmethod
     def create_payment(order_obj: Order, user_id: int) -> Dict[str, Any]:
@@ -159,6 +172,8 @@ class RazorpayStatusView(APIView):
         payment = validated_data['payment_id']
 
         client = RazorpayPaymentInfoView.get_client()
+        # the razorpay sdk is loaded by the first payment, not at startup
+        from razorpay.errors import SignatureVerificationError
 
         try:
             client.utility.verify_payment_signature({
@@ -179,8 +194,14 @@ class RazorpayStatusView(APIView):
         payment.save()
 
         order = payment.order
-        order.order_status = OrderStatus.PLACED.name
-        order.save()
+        # only the request that moves the order to placed sends the signal, a retried or concurrent
+        # status post finds it placed and must not count the popularity again
+        now = timezone.now()
+        placed = Order.objects.filter(pk=order.pk).exclude(order_status=OrderStatus.PLACED.name).update(
+            order_status=OrderStatus.PLACED.name, updated_at=now)
+        if placed:
+            order.order_status, order.updated_at = OrderStatus.PLACED.name, now
+            payment_success_signal.send(sender=self.__class__, order=order, payment=payment)
         serializer = OrderSerializer(order)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,10 +1,20 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 from rest_framework import permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
-from core.api.serializers.shop_serializers import ShopSerializer
+from core.api.serializers.shop_serializers import (ShopSerializer, NearestShopSerializer,
+                                                   NearestShopRequestSerializer, ShopReviewSerializer)
+from core.api.serializers.timeslot_serializers import TimeslotLoadRequestSerializer, DayLoadSerializer
 from core.custom_view_sets import BaseAttrViewSet
-from core.models import Shop
+from core.geo import search_prefixes, haversine_km
+from core.models import Shop, Review, ShopRating
 from core.signals import create_shop_timeslots_signal, delete_shop_timeslots_signal
+from core.timeslot_load import get_timeslot_load
 
 
 @extend_schema(
@@ -13,7 +23,7 @@ from core.signals import create_shop_timeslots_signal, delete_shop_timeslots_sig
 class ShopDetailsView(BaseAttrViewSet):
     serializer_class = ShopSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Shop.objects.all()
+    queryset = Shop.objects.select_related('rating')
 
     def perform_create(self, serializer):
         shop = serializer.save(user=self.request.user)
@@ -40,14 +50,99 @@ class ShopDetailsView(BaseAttrViewSet):
         delete_shop_timeslots_signal.send(sender=self.__class__, shop=instance)
         instance.delete()
 
-# @extend_schema(
-#     tags=['Shop Review'],
-# )
-# class ShopReviewView(BaseAttrViewSet):
-#     """AddressDetails model views."""
-#     serializer_class = ShopReviewSerializer
-#     permission_classes = [permissions.IsAuthenticated]
-#     queryset = Review.objects.all()
-#
-#     def perform_create(self, serializer):
-#         serializer.save(user=self.request.user)
+    @staticmethod
+    def nearest_shops(latitude: float, longitude: float, radius_km: float, limit: int):
+        # the geohash prefixes narrow the candidates through the index, the exact distance is checked here
+        prefix_filter = Q()
+        for prefix in search_prefixes(latitude, longitude, radius_km):
+            prefix_filter |= Q(geohash__startswith=prefix)
+
+        shops = []
+        for shop in Shop.objects.select_related('rating').filter(prefix_filter, active=True):
+            shop.distance_km = haversine_km(latitude, longitude, shop.latitude, shop.longitude)
+            if shop.distance_km <= radius_km:
+                shops.append(shop)
+        shops.sort(key=lambda shop: shop.distance_km)
+        return shops[:limit]
+
+    @extend_schema(
+        parameters=[NearestShopRequestSerializer],
+        responses=NearestShopSerializer(many=True),
+    )
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """Active shops within radius_km of a point or of one of the user's addresses, nearest first."""
+        serializer = NearestShopRequestSerializer(data=request.query_params, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        shops = self.nearest_shops(data['latitude'], data['longitude'], data['radius_km'], data['limit'])
+        return Response(NearestShopSerializer(shops, many=True).data)
+
+    @extend_schema(
+        parameters=[TimeslotLoadRequestSerializer],
+        responses=DayLoadSerializer(many=True),
+    )
+    @action(detail=True, methods=['get'])
+    def timeslot_load(self, request, pk=None):
+        """Per day and per slot pickup and delivery utilisation of the owner's shop."""
+        shop = get_object_or_404(Shop, pk=pk, user=request.user)
+        serializer = TimeslotLoadRequestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        days = get_timeslot_load(shop, data['start_date'], data['end_date'])
+        return Response(DayLoadSerializer(days, many=True).data)
+
+
+@extend_schema(
+    tags=['Shop Review'],
+)
+class ShopReviewView(BaseAttrViewSet):
+    """Shop review views, every write updates the ShopRating aggregates in the same transaction."""
+    serializer_class = ShopReviewSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Review.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['shop']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in permissions.SAFE_METHODS:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    @staticmethod
+    def update_shop_rating(shop_id: int, rating: int, delta: int) -> None:
+        ShopRating.objects.get_or_create(shop_id=shop_id)
+        stars_field = f'stars_{rating}'
+        ShopRating.objects.filter(shop_id=shop_id).update(
+            count=F('count') + delta,
+            rating_sum=F('rating_sum') + delta * rating,
+            **{stars_field: F(stars_field) + delta}
+        )
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        review = serializer.save(user=self.request.user)
+        self.update_shop_rating(review.shop_id, review.rating, 1)
+
+    @staticmethod
+    def lock_review(review: Review) -> Review:
+        # the rating is read again under the row lock, concurrent writes of the review apply their deltas in turn
+        return get_object_or_404(Review.objects.select_for_update(), pk=review.pk)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_rating = self.lock_review(serializer.instance).rating
+        review = serializer.save()
+        if review.rating != old_rating:
+            self.update_shop_rating(review.shop_id, old_rating, -1)
+            self.update_shop_rating(review.shop_id, review.rating, 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        review = self.lock_review(instance)
+        # only the request that deleted the row takes it out of the aggregates
+        if Review.objects.filter(pk=review.pk).delete()[0]:
+            self.update_shop_rating(review.shop_id, review.rating, -1)
@@ -1,4 +1,3 @@
-import itertools
 from datetime import datetime, timedelta
 
 from django.db.models import Q
@@ -8,15 +7,18 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status, permissions
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
 from rest_framework.views import APIView
 
 from core.api.serializers.timeslot_serializers import (
-    BookingSerializer, GroupedTimeslotListSerializer,
+    BookingSerializer, GroupedTimeslotListSerializer, TimeslotSerializer,
     TimeSlotPickupRequestSerializer, TimeslotDeliveryRequestSerializer)
 from core.constants import TIMESLOTS_DAYS, BookingType
 from core.cron import update_timeslots
+from core.custom_view_sets import ColumnarListMixin, ReplicaReadMixin
+from core.fast_render import serialize_grouped_rows, serialize_rows
 from core.models import Timeslot, BookTimeslot
+from core.renderers import FORMAT_PARAMETER, columnar_responses
+from core.throttling import UserRateThrottle
 
 
 @extend_schema(
@@ -28,7 +30,7 @@ class UpdateTimeslots(APIView):
         return Response(data=f'timeslots for all shop are updated for {TIMESLOTS_DAYS} days', status=status.HTTP_200_OK)
 
 
-class TimeslotListAPIView(APIView):
+class TimeslotListAPIView(ReplicaReadMixin, ColumnarListMixin, APIView):
     """Timeslots base class"""
     throttle_classes = [UserRateThrottle]
     permission_classes = [permissions.IsAuthenticated]
@@ -37,12 +39,6 @@ class TimeslotListAPIView(APIView):
     def get_queryset(self, **kwargs):
         raise NotImplementedError()
 
-    def get_grouped_timeslots(self, timeslots):
-        grouped_timeslots = {}
-        for date, group in itertools.groupby(timeslots, key=lambda t: t.start_datetime.date()):
-            grouped_timeslots[date] = list(group)
-        return grouped_timeslots
-
     def get_available_timeslots(self, start_datetime, end_datetime, shop_id):
         booked_timeslots = BookTimeslot.objects.filter(
             Q(time_slot__start_datetime__range=[start_datetime, end_datetime]) |
@@ -60,17 +56,12 @@ class TimeslotListAPIView(APIView):
         return available_timeslots
 
     def get(self, request, *args, **kwargs):
-
         timeslots = self.get_queryset()
-
-        grouped_timeslots = self.get_grouped_timeslots(timeslots)
-
-        grouped_timeslot_list = [{'date': date, 'timeslots': timeslots} for date, timeslots in
-                                 grouped_timeslots.items()]
-
-        serializer = GroupedTimeslotListSerializer(grouped_timeslot_list)
-
-        return Response(serializer.data)
+        # the rows are grouped by day as they are read, the json is that of GroupedTimeslotListSerializer
+        grouped_timeslots = serialize_grouped_rows(timeslots, TimeslotSerializer, 'start_datetime',
+                                                   key=lambda start_datetime: start_datetime.date().isoformat(),
+                                                   name='date', items_name='timeslots')
+        return self.fast_list_response(grouped_timeslots)
 
 
 @extend_schema(
@@ -78,7 +69,9 @@ class TimeslotListAPIView(APIView):
     parameters=[
         OpenApiParameter(name='shop_id', required=True, type=str),
         OpenApiParameter(name='is_available', type=bool),
-    ]
+        FORMAT_PARAMETER,
+    ],
+    responses=columnar_responses(GroupedTimeslotListSerializer)
 )
 class PickupTimeslotListAPIView(TimeslotListAPIView):
     """pickup timeslots"""
@@ -106,8 +99,9 @@ class PickupTimeslotListAPIView(TimeslotListAPIView):
     parameters=[
         OpenApiParameter(name='pickup_booking_id', required=True, type=str),
         OpenApiParameter(name='is_available', type=bool),
+        FORMAT_PARAMETER,
     ],
-    responses=GroupedTimeslotListSerializer
+    responses=columnar_responses(GroupedTimeslotListSerializer)
 )
 class DeliveryTimeslotListAPIView(TimeslotListAPIView):
     """delivery timeslots"""
@@ -199,11 +193,17 @@ class BookTimeslotFilter(FilterSet):
 
 @extend_schema(
     tags=['BookTimeslot'],
+    parameters=[FORMAT_PARAMETER],
+    responses=columnar_responses(BookingSerializer),
 )
-class BookingListView(ListAPIView):
+class BookingListView(ReplicaReadMixin, ColumnarListMixin, ListAPIView):
     throttle_classes = [UserRateThrottle]
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BookingSerializer
     queryset = BookTimeslot.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = BookTimeslotFilter
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.fast_list_response(serialize_rows(queryset, self.get_serializer_class()))
@@ -1,24 +1,43 @@
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import (
     generics,
     status,
     permissions,
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.views import APIView
 
 from drf_spectacular.utils import extend_schema
 
 
+from core.api.serializers.login_serializers import CreateOTPSerializer
 from core.api.serializers.user_serializer import (
     UserSerializer,
     AddressSerializer,
+    AddressSyncSerializer,
+    PreferencesSerializer,
+    address_integrity_error,
 )
 
+from core import otp_store
 from core.api.views.login_views import SendOTPView, generate_otp
 from core.custom_view_sets import BaseAttrViewSet
-from core.models import Address
+from core.models import Address, BookTimeslot, User
+from core.preferences import parse_other_details
+from core.profile import get_rendered_profile, invalidate_profile
+from core.throttling import UserRateThrottle
+
+ADDRESS_SYNC_FIELDS = ['address_line_1', 'address_line_2', 'city', 'country', 'pincode', 'latitude', 'longitude',
+                       'type', 'is_primary', 'updated_at']
 
 
 @extend_schema(
@@ -33,6 +52,19 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def render_profile(self) -> bytes:
+        user = get_user_model().objects.prefetch_related('address').get(pk=self.request.user.pk)
+        return JSONRenderer().render(self.get_serializer(user).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        # served from the cached bytes, so a hit costs no query past the cached principal
+        etag, content = get_rendered_profile(request.user.pk, self.render_profile)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
     @staticmethod
     def update_user_total_price(user: settings.AUTH_USER_MODEL, price: float, increment: bool) -> None:
         if increment:
@@ -43,15 +75,53 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
         return
 
     def update(self, request, *args, **kwargs):
+        delivery_id = None
         if 'phone' in request.data:
-            response = SendOTPView.send_otp(request.data.get('phone'), generate_otp())
-            if not response['send']:
-                return Response({'message': response['message']}, status=status.HTTP_400_BAD_REQUEST)
+            phone_serializer = CreateOTPSerializer(data={'phone': request.data.get('phone')})
+            phone_serializer.is_valid(raise_exception=True)
+            phone, otp = phone_serializer.validated_data['phone'], generate_otp()
+            otp_store.issue_otp(phone, otp)
+            delivery_id = SendOTPView.send_otp(phone, otp)
 
             user = self.get_object()
             user.is_phone_verified = False
             user.save()
-        return super().update(request, *args, **kwargs)
+        response = super().update(request, *args, **kwargs)
+        if delivery_id:
+            response.data['otp_delivery_id'] = delivery_id
+        return response
+
+
+@extend_schema(
+    tags=['User Details'],
+)
+class UserPreferencesView(APIView):
+    """Read and partially update the user preferences without rewriting the user row."""
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+    serializer_class = PreferencesSerializer
+
+    @staticmethod
+    def get_preferences(user_id, lock: bool = False) -> dict:
+        users = User.objects.filter(pk=user_id)
+        if lock:
+            users = users.select_for_update()
+        preferences, other_details = users.values_list('preferences', 'other_details').get()
+        return preferences if preferences is not None else parse_other_details(other_details)
+
+    def get(self, request):
+        return Response(self.get_preferences(request.user.pk))
+
+    @transaction.atomic
+    def patch(self, request):
+        serializer = PreferencesSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        user_id = request.user.pk
+        preferences = {**self.get_preferences(user_id, lock=True), **serializer.validated_data}
+        User.objects.filter(pk=user_id).update(preferences=preferences, updated_at=timezone.now())
+        transaction.on_commit(lambda: invalidate_profile(user_id))
+        return Response(preferences)
 
 
 @extend_schema(
@@ -69,3 +139,63 @@ class AddressDetailsView(BaseAttrViewSet):
     def perform_create(self, serializer):
         return serializer.save(user=self.request.user)
 
+    @staticmethod
+    @transaction.atomic
+    def sync_addresses(user, addresses_data):
+        existing = {address.id: address for address in Address.objects.select_for_update().filter(user=user)}
+        address_ids = [data['id'] for data in addresses_data if 'id' in data]
+        kept_ids = set(address_ids)
+        if len(kept_ids) != len(address_ids):
+            raise ValidationError({'id': ['An address can only be listed once.']})
+        unknown_ids = kept_ids - set(existing)
+        if unknown_ids:
+            raise ValidationError({'id': [f'Unknown address {address_id}.' for address_id in unknown_ids]})
+
+        removed_ids = set(existing) - kept_ids
+        # deleting a booked address would cascade to the bookings, orders and payments made with it
+        booked_ids = set(BookTimeslot.objects.filter(address_id__in=removed_ids)
+                         .values_list('address_id', flat=True).distinct()) if removed_ids else set()
+        if booked_ids:
+            raise ValidationError({'id': [f'Address {address_id} has bookings and can not be removed.'
+                                          for address_id in booked_ids]})
+
+        Address.objects.filter(id__in=removed_ids).delete()
+        # cleared first so moving the primary flag can not trip the partial unique constraint
+        Address.objects.filter(user=user, is_primary=True).update(is_primary=False)
+
+        now = timezone.now()
+        addresses, updated, created = [], [], []
+        for data in addresses_data:
+            address_id = data.pop('id', None)
+            data.setdefault('is_primary', False)
+            if address_id is None:
+                address = Address(user=user, **data)
+                created.append(address)
+            else:
+                address = existing[address_id]
+                for field, value in data.items():
+                    setattr(address, field, value)
+                address.updated_at = now
+                updated.append(address)
+            addresses.append(address)
+
+        Address.objects.bulk_update(updated, fields=ADDRESS_SYNC_FIELDS)
+        Address.objects.bulk_create(created)
+        # bulk writes send no post_save
+        transaction.on_commit(lambda: invalidate_profile(user.pk))
+        return addresses
+
+    @extend_schema(
+        request=AddressSyncSerializer(many=True),
+        responses=AddressSerializer(many=True),
+    )
+    @action(detail=False, methods=['put'])
+    def sync(self, request):
+        """Replace the address book, addresses missing from the list are deleted unless they have bookings."""
+        serializer = AddressSyncSerializer(data=request.data, many=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        try:
+            addresses = self.sync_addresses(request.user, serializer.validated_data)
+        except IntegrityError as e:
+            raise address_integrity_error(e)
+        return Response(AddressSerializer(addresses, many=True).data)
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+from core.metrics import install_query_recorder
+
+from core.postgres import apply_postgres_indexes
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import checks, signals  # noqa: F401
+
+        post_migrate.connect(apply_postgres_indexes, sender=self)
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core.constants import PRINCIPAL_CACHE_TIMEOUT
+from core.metrics import record_cache_lookup
+from core.models import UserPrincipal
+
+# kept in model field order, Model.from_db expects the values in that order
+PRINCIPAL_FIELDS = tuple(
+    field.attname for field in UserPrincipal._meta.concrete_fields
+    if field.attname in {'id', 'phone', 'is_active', 'is_staff', 'is_superuser', 'is_phone_verified', 'updated_at'}
+)
+
+
+def principal_cache_key(user_id) -> str:
+    return f'auth_principal:{user_id}'
+
+
+def invalidate_principal(user_id) -> None:
+    cache.delete(principal_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token user from the cache.
+
+    Only the identity and permission columns are cached for a short time, the
+    returned user loads the remaining columns when a view first touches one.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = principal_cache_key(user_id)
+        values = cache.get(key)
+        record_cache_lookup('principal', values is not None)
+        if values is None:
+            values = UserPrincipal.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list(*PRINCIPAL_FIELDS).first()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, values, timeout=PRINCIPAL_CACHE_TIMEOUT)
+
+        user = UserPrincipal.from_db(router.db_for_read(UserPrincipal), PRINCIPAL_FIELDS, values)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
@@ -0,0 +1,25 @@
+"""
+Catalog version shared by the pre-rendered Item and WashCategory lists.
+
+The version is the time of the last catalog write in microseconds, so it also
+serves as the Last-Modified date of the cached responses.
+"""
+import time
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def bump_catalog_version() -> int:
+    version = time.time_ns() // 1000
+    cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    return version
+
+
+def get_catalog_version() -> int:
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
@@ -0,0 +1,30 @@
+"""
+System checks of the production setup, run by `manage.py check --deploy` in release.sh.
+
+The catalog version, the cached profiles and principals, the sms delivery
+status and the sticky-after-write window are invalidated through the default
+cache, so every worker, cron run and release step must share it. A per
+process cache silently serves stale data from the other workers.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PER_PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def has_shared_cache() -> bool:
+    return settings.CACHES['default']['BACKEND'] not in PER_PROCESS_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if has_shared_cache():
+        return []
+    return [Error(
+        f'The default cache is {settings.CACHES["default"]["BACKEND"]}, it is not shared between processes.',
+        hint='Set CACHE_URL to a shared cache, e.g. redis://redis:6379/0.',
+        id='core.E001',
+    )]
@@ -1,11 +1,16 @@
 import time
+from collections import Counter
 from datetime import timedelta, datetime, date
-from typing import List, Tuple
+from typing import List, Tuple, Dict
 
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
 from django.utils.timezone import make_aware
 
-from core.constants import TIMESLOTS_DAYS
-from core.models import Shop, Timeslot
+from core.catalog import bump_catalog_version
+from core.constants import TIMESLOTS_DAYS, POPULARITY_FLUSH_BATCH_SIZE, TIMESLOT_BATCH_SIZE
+from core.models import Shop, Timeslot, Item, WashCategory, PopularityDelta
+from core.otp_store import get_store
 
 
 def generate_timeslots(opening_time: time, closing_time: time, timeslot_duration: timedelta,
@@ -41,20 +46,71 @@ def delete_older_time_slots():
     pass
 
 
+def delete_expired_otps():
+    get_store().delete_expired()
+
+
+def increment_counts(model, counts: Dict) -> None:
+    model.objects.filter(pk__in=counts).update(count=F('count') + Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+
+
+def flush_popularity_batch() -> int:
+    # counts are added and their deltas deleted in one transaction, so a crash
+    # loses nothing and a delta is never added twice; skip_locked keeps
+    # concurrent flushes off each other's rows
+    with transaction.atomic():
+        deltas = list(PopularityDelta.objects.select_for_update(skip_locked=True).order_by('id').values_list(
+            'id', 'item_id', 'wash_category_id', 'quantity')[:POPULARITY_FLUSH_BATCH_SIZE])
+        if not deltas:
+            return 0
+
+        item_counts, wash_category_counts = Counter(), Counter()
+        for _, item_id, wash_category_id, quantity in deltas:
+            item_counts[item_id] += quantity
+            wash_category_counts[wash_category_id] += quantity
+
+        increment_counts(Item, item_counts)
+        increment_counts(WashCategory, wash_category_counts)
+        PopularityDelta.objects.filter(id__in=[delta[0] for delta in deltas]).delete()
+    return len(deltas)
+
+
+def flush_popularity_counters() -> int:
+    flushed = 0
+    while True:
+        batch_size = flush_popularity_batch()
+        if not batch_size:
+            break
+        flushed += batch_size
+    if flushed:
+        bump_catalog_version()
+    return flushed
+
+
 def generate_unique_id(int_timestamp: int, shop_id: int) -> int:
     return int(str(int_timestamp) + str(shop_id))
 
 
+def insert_timeslots(timeslots_objects) -> None:
+    Timeslot.objects.bulk_create(
+        timeslots_objects, ignore_conflicts=True, unique_fields=['id'], batch_size=TIMESLOT_BATCH_SIZE)
+
+
 def update_timeslots(shop_id: int = None):
     if shop_id:
         shops = Shop.objects.filter(pk=shop_id)
     else:
         shops = Shop.objects.all()
-    for shop in shops:
+    timeslots_objects = []
+    for shop in shops.iterator():
         timeslots = generate_timeslots(shop.opening_time, shop.closing_time, shop.time_slot_duration,
                                        datetime.utcnow().date(), shop.wash_duration, shop.time_zone_offset)
         # generate unique id based on start datetime and shop_id to ignore conflicts
-        timeslots_objects = [Timeslot(
+        timeslots_objects.extend(Timeslot(
             id=generate_unique_id(
                 int(time.mktime(timeslot[0].timetuple())), shop.id),
             start_datetime=make_aware(timeslot[0]),
@@ -62,8 +118,12 @@ def update_timeslots(shop_id: int = None):
             pickup_available_quota=shop.max_user_limit_per_time_slot,
             delivery_available_quota=shop.max_user_limit_per_time_slot,
             shop=shop
-        ) for timeslot in timeslots]
-
-        Timeslot.objects.bulk_create(
-            timeslots_objects, ignore_conflicts=True, unique_fields=['id'])
+        ) for timeslot in timeslots)
+        # inserts shared by the small shops, while the memory held stays bounded with many shops
+        if len(timeslots_objects) >= TIMESLOT_BATCH_SIZE:
+            insert_timeslots(timeslots_objects)
+            timeslots_objects = []
+
+    if timeslots_objects:
+        insert_timeslots(timeslots_objects)
     return
@@ -1,5 +1,18 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets, permissions
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+
+from core.catalog import get_catalog_version
+from core.constants import CATALOG_CACHE_TIMEOUT
+from core.db_router import use_primary, use_replica
+from core.fast_render import render_json
+from core.metrics import record_cache_lookup
+from core.renderers import COLUMNAR_MEDIA_TYPE, ColumnarJSONRenderer, to_columnar
+from core.throttling import UserRateThrottle
 
 
 class BaseAttrViewSet(mixins.DestroyModelMixin,
@@ -10,3 +23,84 @@ class BaseAttrViewSet(mixins.DestroyModelMixin,
     """Base view set for the key attributes."""
     throttle_classes = [UserRateThrottle]
     permission_classes = [permissions.IsAuthenticated]
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from a read replica once the user is known, see core.db_router."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            use_replica(request.user.pk)
+
+
+class ColumnarListMixin:
+    """Offer the compact columnar format of core.renderers to reads, next to the default json."""
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.request.method in SAFE_METHODS:
+            renderers.append(ColumnarJSONRenderer())
+        return renderers
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            # the same url answers json or columnar by the Accept header, shared caches have to key on it
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+    def fast_list_response(self, data) -> HttpResponse:
+        """Answer the rows of core.fast_render in the negotiated format."""
+        if isinstance(self.request.accepted_renderer, ColumnarJSONRenderer):
+            return HttpResponse(render_json(to_columnar(data)), content_type=COLUMNAR_MEDIA_TYPE)
+        return HttpResponse(render_json(data), content_type='application/json')
+
+
+class PopularOrderingMixin:
+    """Order the list by the flushed popularity count with ?ordering=popular."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.query_params.get('ordering') == 'popular':
+            # served by the (-count, name) popularity index
+            queryset = queryset.order_by('-count', 'name')
+        return queryset
+
+
+class CatalogListMixin:
+    """
+    Serve the plain list action as pre-rendered json bytes.
+
+    The bytes are cached per catalog version and answered with ETag and
+    Last-Modified, so unchanged catalogs cost clients a 304.
+    """
+    cached_orderings = ('', 'popular')
+
+    def get_catalog_cache_key(self, version: int, ordering: str) -> str:
+        return f'catalog:{self.basename}:{version}:{ordering}'
+
+    def list(self, request, *args, **kwargs):
+        ordering = request.query_params.get('ordering', '')
+        if set(request.query_params) - {'ordering'} or ordering not in self.cached_orderings:
+            return super().list(request, *args, **kwargs)
+
+        version = get_catalog_version()
+        key = self.get_catalog_cache_key(version, ordering)
+        content = cache.get(key)
+        record_cache_lookup('catalog', content is not None)
+        if content is None:
+            # a lagging replica must not be cached under the new version
+            use_primary()
+            serializer = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True)
+            content = JSONRenderer().render(serializer.data)
+            cache.set(key, content, timeout=CATALOG_CACHE_TIMEOUT)
+
+        etag = f'"{key}"'
+        last_modified = version // 1000000
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,353 @@
+"""
+Synthetic production scale data for query plan work.
+
+populate_default seeds one user and one shop. The generator adds users with
+their addresses, carts, bookings, orders and payments in production like
+proportions: a few users order a lot, recent timeslots are busier and the
+popular items dominate the orders. Every value comes from one seeded random
+generator, so a seed gives the same rows, and the rows are written per chunk
+of users with COPY on Postgres and batched bulk_create elsewhere.
+"""
+import io
+import json
+import random
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, datetime, time as day_time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.timezone import make_aware
+
+from core.constants import (AddressType, BookingType, DEFAULT_PREFERENCES, DEFAULT_SHOP, OrderStatus,
+                            PaymentSource, PaymentStatus, TIMESLOTS_DAYS)
+from core.cron import generate_timeslots, generate_unique_id
+from core.geo import encode_geohash
+from core.models import (Address, BookTimeslot, Cart, Item, Order, OrderDetails, Payment, RazorpayPayment, Shop,
+                         Timeslot, User, WashCategory)
+
+SYNTHETIC_PREFIX = 'synthetic-'
+# +91 70 followed by the 8 digit user index. Real customers can have these numbers too, the data is only
+# generated into a fresh database and generate_data refuses to run when any of them exists
+SYNTHETIC_PHONE_PREFIX = '+9170'
+OWNER_PHONE = f'{SYNTHETIC_PHONE_PREFIX}99999999'
+USERS_PER_CHUNK = 5000
+
+CITIES = [
+    ('Chennai', 13.08, 80.27, 600001),
+    ('Bengaluru', 12.97, 77.59, 560001),
+    ('Mumbai', 19.07, 72.87, 400001),
+    ('Delhi', 28.61, 77.20, 110001),
+    ('Hyderabad', 17.38, 78.48, 500001),
+]
+# most customers are in the first cities
+CITY_WEIGHTS = [35, 25, 20, 12, 8]
+FIRST_NAMES = ['Aarav', 'Aditi', 'Arjun', 'Divya', 'Karthik', 'Lakshmi', 'Meera', 'Nikhil', 'Priya', 'Rahul',
+               'Ravi', 'Sneha', 'Suresh', 'Vikram', 'Anjali', 'Deepak']
+LAST_NAMES = ['Iyer', 'Kumar', 'Nair', 'Patel', 'Rao', 'Reddy', 'Sharma', 'Singh', 'Verma', 'Menon']
+STREETS = ['Main Road', 'Gandhi Street', 'Lake View Road', 'Temple Street', 'Park Avenue', 'Station Road',
+           'Nehru Nagar', 'MG Road']
+# share of users with 0, 1, 2 and 3 addresses, and of orders with 1 to 6 cart lines
+ADDRESS_COUNT_WEIGHTS = [10, 60, 25, 5]
+ORDER_LINE_WEIGHTS = [30, 25, 18, 12, 9, 6]
+QUANTITY_WEIGHTS = [30, 25, 15, 10, 8, 5, 3, 2, 1, 1]
+CART_SHARE = 0.25
+MAX_ORDERS_PER_USER = 100
+# the delivery is booked in one of the first slots after the wash
+DELIVERY_SPREAD_SLOTS = 4
+# the pareto tail gives most users 0 to 2 orders and a few regulars dozens
+ORDERS_PARETO_ALPHA = 1.5
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_escape(value: str) -> str:
+    return value.translate(COPY_ESCAPES)
+
+
+# formatters by exact type, a dict lookup per value instead of a chain of isinstance checks
+COPY_FORMATTERS = {
+    type(None): lambda value: '\\N',
+    bool: lambda value: 't' if value else 'f',
+    str: copy_escape,
+    int: str,
+    float: repr,
+    Decimal: str,
+    uuid.UUID: str,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    day_time: day_time.isoformat,
+    timedelta: lambda value: f'{value.total_seconds()} seconds',
+    dict: lambda value: copy_escape(json.dumps(value)),
+    list: lambda value: copy_escape(json.dumps(value)),
+}
+
+
+def copy_value(value) -> str:
+    """A python value in the COPY text format."""
+    formatter = COPY_FORMATTERS.get(type(value))
+    return formatter(value) if formatter else copy_escape(str(value))
+
+
+def copy_text(model, objs: List) -> str:
+    """The rows of the instances in the COPY text format, the concrete fields in their order."""
+    # the auto_now fields get the time of the batch, like bulk_create gives them the time of the call
+    now = copy_value(timezone.now())
+    attnames = [None if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+                else field.attname for field in model._meta.concrete_fields]
+    return ''.join('\t'.join(now if attname is None else copy_value(getattr(obj, attname)) for attname in attnames)
+                   + '\n' for obj in objs)
+
+
+class RowWriter:
+    """Writes model instances with COPY on Postgres and batched bulk_create elsewhere, counting rows per model."""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS, batch_size: int = 5000, copy: Optional[bool] = None):
+        self.using = using
+        self.connection = connections[using]
+        self.batch_size = batch_size
+        self.copy = self.connection.vendor == 'postgresql' if copy is None else copy
+        self.counts = Counter()
+
+    def write(self, model, objs: List) -> None:
+        if not objs:
+            return
+        if self.copy:
+            self.copy_rows(model, objs)
+        else:
+            model.objects.using(self.using).bulk_create(objs, batch_size=self.batch_size)
+        self.counts[model.__name__] += len(objs)
+
+    def copy_rows(self, model, objs: List) -> None:
+        # the values are formatted from their python types, Django's per field preparation costs more than COPY
+        quote_name = self.connection.ops.quote_name
+        columns = ', '.join(quote_name(field.column) for field in model._meta.concrete_fields)
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {quote_name(model._meta.db_table)} ({columns}) FROM STDIN',
+                               io.StringIO(copy_text(model, objs)))
+
+
+def user_phone(index: int) -> str:
+    return f'{SYNTHETIC_PHONE_PREFIX}{index:08d}'
+
+
+def synthetic_data_exists() -> bool:
+    return User.objects.filter(phone__startswith=SYNTHETIC_PHONE_PREFIX).exists()
+
+
+class SyntheticData:
+    """Builds the rows of every table from one seeded generator."""
+
+    def __init__(self, writer: RowWriter, seed: int, days: int, slot_capacity: int, start_date: date):
+        self.writer = writer
+        self.rng = random.Random(seed)
+        self.days = days
+        self.slot_capacity = slot_capacity
+        self.start_date = start_date
+        self.now = timezone.now()
+        # the item at rank n is ordered about 1/n as often as the most popular one
+        self.items = list(Item.objects.order_by('name').values_list('id', 'price'))
+        self.item_weights = [1 / rank for rank in range(1, len(self.items) + 1)]
+        self.wash_categories = list(WashCategory.objects.order_by('name').values_list('id', 'extra_per_item'))
+        self.wash_category_weights = [1 / rank for rank in range(1, len(self.wash_categories) + 1)]
+        # shop id, its timeslots by start and how many of them the wash duration spans
+        self.shops_by_city: Dict[str, List[Tuple[int, List[Timeslot], int]]] = {}
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def hex(self, length: int) -> str:
+        return f'{self.rng.getrandbits(length * 4):0{length}x}'
+
+    def near(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        # about 15 km around the city center
+        return (round(latitude + self.rng.uniform(-0.15, 0.15), 6),
+                round(longitude + self.rng.uniform(-0.15, 0.15), 6))
+
+    def add_shops(self, count: int) -> None:
+        owner = User.objects.create_user(phone=OWNER_PHONE, first_name='Synthetic', last_name='Owner',
+                                         is_phone_verified=True)
+        shops = []
+        for index in range(count):
+            city, latitude, longitude, _ = CITIES[index % len(CITIES)]
+            latitude, longitude = self.near(latitude, longitude)
+            shops.append(Shop(**{**DEFAULT_SHOP, 'name': f'{SYNTHETIC_PREFIX}shop-{index}',
+                                 'max_user_limit_per_time_slot': self.slot_capacity},
+                              user=owner, latitude=latitude, longitude=longitude,
+                              geohash=encode_geohash(latitude, longitude)))
+        # the shops need their ids back, so they are always created by bulk_create
+        Shop.objects.using(self.writer.using).bulk_create(shops)
+        self.writer.counts['Shop'] += len(shops)
+
+        for index, shop in enumerate(shops):
+            timeslots = self.shop_timeslots(shop)
+            self.writer.write(Timeslot, timeslots)
+            ready_at = timeslots[0].start_datetime + shop.wash_duration
+            wash_slots = bisect_left([timeslot.start_datetime for timeslot in timeslots], ready_at)
+            city = CITIES[index % len(CITIES)][0]
+            self.shops_by_city.setdefault(city, []).append((shop.id, timeslots, wash_slots))
+
+    def shop_timeslots(self, shop: Shop) -> List[Timeslot]:
+        # the same slots and ids update_timeslots creates, for the history days and the bookable days
+        timeslots = {}
+        first_date = self.start_date - timedelta(days=self.days)
+        for offset in range(0, self.days + TIMESLOTS_DAYS, TIMESLOTS_DAYS * 2 + 1):
+            for start, end in generate_timeslots(shop.opening_time, shop.closing_time, shop.time_slot_duration,
+                                                 first_date + timedelta(days=offset), shop.wash_duration,
+                                                 shop.time_zone_offset):
+                timeslot_id = generate_unique_id(int(time.mktime(start.timetuple())), shop.id)
+                timeslots[timeslot_id] = Timeslot(
+                    id=timeslot_id, start_datetime=make_aware(start), end_datetime=make_aware(end),
+                    pickup_available_quota=self.slot_capacity, delivery_available_quota=self.slot_capacity,
+                    shop_id=shop.id)
+        last_start = make_aware(datetime.combine(self.start_date + timedelta(days=TIMESLOTS_DAYS), day_time()))
+        return sorted((timeslot for timeslot in timeslots.values() if timeslot.start_datetime < last_start),
+                      key=lambda timeslot: timeslot.start_datetime)
+
+    def add_users(self, count: int) -> None:
+        for first in range(0, count, USERS_PER_CHUNK):
+            with transaction.atomic(using=self.writer.using):
+                self.add_user_chunk(range(first, min(first + USERS_PER_CHUNK, count)))
+
+    def add_user_chunk(self, indexes: range) -> None:
+        rows = {model: [] for model in (User, Address, Cart, BookTimeslot, Order, OrderDetails, Payment,
+                                        RazorpayPayment)}
+        for index in indexes:
+            self.add_user(index, rows)
+        # parents before children, the foreign keys are checked per statement on sqlite
+        for model, objs in rows.items():
+            self.writer.write(model, objs)
+
+    def add_user(self, index: int, rows: Dict) -> None:
+        # users live in the cities that have a shop
+        cities = len(self.shops_by_city)
+        city, latitude, longitude, pincode = self.rng.choices(CITIES[:cities], weights=CITY_WEIGHTS[:cities])[0]
+        preferences = {**DEFAULT_PREFERENCES,
+                       'notifications': 'On' if self.rng.random() < 0.8 else 'Off',
+                       'language': self.rng.choice(['English', 'English', 'Tamil', 'Hindi', 'Kannada']),
+                       'dark_mode': 'Yes' if self.rng.random() < 0.3 else 'No'}
+        user = User(id=self.uuid(), phone=user_phone(index), first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES), is_phone_verified=self.rng.random() < 0.9,
+                    password=f'{UNUSABLE_PASSWORD_PREFIX}{self.hex(40)}', preferences=preferences,
+                    other_details=str(preferences),
+                    cart_total_price=Decimal(0))
+        rows[User].append(user)
+
+        addresses = []
+        for number in range(self.rng.choices(range(4), weights=ADDRESS_COUNT_WEIGHTS)[0]):
+            address_type = AddressType.PICKUP_AND_DELIVERY if number == 0 else self.rng.choice(list(AddressType))
+            address_latitude, address_longitude = self.near(latitude, longitude)
+            addresses.append(Address(
+                id=self.uuid(), user_id=user.id, address_line_1=f'{number + 1} {self.rng.choice(STREETS)}',
+                city=city, country='India', pincode=pincode + self.rng.randrange(100), latitude=address_latitude,
+                longitude=address_longitude, type=address_type.name, is_primary=number == 0))
+        rows[Address].extend(addresses)
+
+        if self.rng.random() < CART_SHARE:
+            for item_id, wash_category_id, quantity, item_price, extra_per_item in self.order_lines():
+                price = (item_price + extra_per_item) * quantity
+                rows[Cart].append(Cart(id=self.uuid(), user_id=user.id, item_id=item_id,
+                                       wash_category_id=wash_category_id, quantity=quantity, price=price))
+                user.cart_total_price += price
+
+        if not addresses:
+            return
+        orders = min(int(self.rng.paretovariate(ORDERS_PARETO_ALPHA)) - 1, MAX_ORDERS_PER_USER)
+        for _ in range(orders):
+            self.add_order(user, self.rng.choice(addresses), self.rng.choice(self.shops_by_city[city]), rows)
+
+    def order_lines(self):
+        """Distinct item and wash category pairs with their quantity, item price and wash category extra."""
+        lines = {}
+        for _ in range(self.rng.choices(range(1, 7), weights=ORDER_LINE_WEIGHTS)[0]):
+            item_id, item_price = self.rng.choices(self.items, weights=self.item_weights)[0]
+            wash_category_id, extra_per_item = self.rng.choices(self.wash_categories,
+                                                                weights=self.wash_category_weights)[0]
+            quantity = self.rng.choices(range(1, 11), weights=QUANTITY_WEIGHTS)[0]
+            lines[item_id, wash_category_id] = (quantity, item_price, extra_per_item)
+        return [(item_id, wash_category_id, *line) for (item_id, wash_category_id), line in lines.items()]
+
+    def add_order(self, user: User, address: Address, shop: Tuple[int, List[Timeslot], int], rows: Dict) -> None:
+        _, timeslots, wash_slots = shop
+        # recent slots are busier, the business grows; the delivery slot must still exist
+        pickup_slots = len(timeslots) - wash_slots - DELIVERY_SPREAD_SLOTS
+        pickup_index = min(int(self.rng.triangular(0, pickup_slots, pickup_slots)), pickup_slots - 1)
+        # delivered once the wash duration of the shop has passed
+        delivery_index = pickup_index + wash_slots + self.rng.randrange(DELIVERY_SPREAD_SLOTS)
+        pickup, delivery = timeslots[pickup_index], timeslots[delivery_index]
+        pickup_booking = BookTimeslot(id=self.uuid(), time_slot_id=pickup.id, user_id=user.id,
+                                      address_id=address.id, booking_type=BookingType.PICKUP.name)
+        delivery_booking = BookTimeslot(id=self.uuid(), time_slot_id=delivery.id, user_id=user.id,
+                                        address_id=address.id, booking_type=BookingType.DELIVERY.name)
+        rows[BookTimeslot].extend([pickup_booking, delivery_booking])
+
+        if self.rng.random() < 0.05:
+            order_status = OrderStatus.INITIATED
+        elif delivery.end_datetime < self.now:
+            order_status = OrderStatus.DELIVERED
+        elif pickup.start_datetime < self.now:
+            order_status = OrderStatus.PICKED
+        else:
+            order_status = OrderStatus.PLACED
+        order = Order(id=self.uuid(), user_id=user.id, pickup_booking_id=pickup_booking.id,
+                      delivery_booking_id=delivery_booking.id, order_status=order_status.name,
+                      total_price=Decimal(0))
+        rows[Order].append(order)
+        for item_id, wash_category_id, quantity, item_price, extra_per_item in self.order_lines():
+            subtotal_price = (item_price + extra_per_item) * quantity
+            rows[OrderDetails].append(OrderDetails(
+                id=self.uuid(), order_id=order.id, product_id=item_id, wash_category_id=wash_category_id,
+                product_price=item_price, wash_category_price=extra_per_item, quantity=quantity,
+                subtotal_price=subtotal_price))
+            order.total_price += subtotal_price
+
+        self.add_payment(order, rows)
+
+    def add_payment(self, order: Order, rows: Dict) -> None:
+        if order.order_status == OrderStatus.INITIATED.name:
+            # half of the unplaced orders were abandoned before the checkout
+            if self.rng.random() < 0.5:
+                return
+            payment_status = self.rng.choice([PaymentStatus.INITIATED, PaymentStatus.FAILED, PaymentStatus.PENDING])
+        else:
+            payment_status = PaymentStatus.SUCCESS
+        payment_source = PaymentSource.RAZORPAY if self.rng.random() < 0.85 else PaymentSource.OTHERS
+        payment = Payment(id=self.uuid(), user_id=order.user_id, order_id=order.id, amount=order.total_price,
+                          payment_source=payment_source.name, payment_status=payment_status.name)
+        rows[Payment].append(payment)
+        if payment_source == PaymentSource.RAZORPAY:
+            paid = payment_status == PaymentStatus.SUCCESS
+            rows[RazorpayPayment].append(RazorpayPayment(
+                id=self.uuid(), payment_id=payment.id, razorpay_order_id=f'order_{self.hex(14)}',
+                razorpay_payment_id=f'pay_{self.hex(14)}' if paid else None,
+                razorpay_signature=self.hex(64) if paid else None))
+
+    def update_quotas(self) -> None:
+        # the quota left is the capacity less the bookings of the slot, never below zero
+        shop_ids = [shop_id for shops in self.shops_by_city.values() for shop_id, _, _ in shops]
+        updates = {}
+        for booking_type, field in ((BookingType.PICKUP, 'pickup_available_quota'),
+                                    (BookingType.DELIVERY, 'delivery_available_quota')):
+            bookings = (BookTimeslot.objects.filter(time_slot=OuterRef('pk'), booking_type=booking_type.name)
+                        .values('time_slot').annotate(count=Count('id')).values('count'))
+            updates[field] = Greatest(Value(self.slot_capacity) - Coalesce(Subquery(bookings), 0), Value(0))
+        Timeslot.objects.using(self.writer.using).filter(shop_id__in=shop_ids).update(**updates)
+
+
+def generate(users: int, shops: int, days: int = 180, slot_capacity: int = 10, seed: int = 0,
+             start_date: Optional[date] = None, writer: Optional[RowWriter] = None) -> Counter:
+    """Write the synthetic shops, timeslots and users, returns the rows written per model."""
+    writer = writer or RowWriter()
+    data = SyntheticData(writer, seed, days, slot_capacity, start_date or datetime.utcnow().date())
+    with transaction.atomic(using=writer.using):
+        data.add_shops(shops)
+    data.add_users(users)
+    data.update_quotas()
+    return writer.counts
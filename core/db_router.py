@@ -0,0 +1,133 @@
+"""
+Routing of safe reads to the read replicas.
+
+Views opt in with ReplicaReadMixin: once their GET or HEAD request is
+authenticated, its reads go to a replica. Writes always go to the primary, and
+so does every later read of the same request. After a request that wrote, the
+user stays on the primary for DB_REPLICA_STICKY_SECONDS, so users always read
+their own writes.
+"""
+import contextvars
+import logging
+import random
+import time
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_RETRY_SECONDS = 30
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+_replica_down_until = {}
+
+
+class RoutingState:
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def sticky_cache_key(user_id) -> str:
+    return f'db_sticky:{user_id}'
+
+
+def replica_is_up(alias: str) -> bool:
+    if _replica_down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError as e:
+        logger.warning('replica %s is unavailable: %s', alias, e)
+        _replica_down_until[alias] = time.monotonic() + REPLICA_RETRY_SECONDS
+        return False
+    return True
+
+
+def choose_replica() -> Optional[str]:
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_is_up(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+def use_replica(user_id=None) -> None:
+    """Send the remaining reads of the current request to a replica, unless the user has to read their writes."""
+    state = _state.get()
+    if state is None or state.wrote or not settings.DATABASE_REPLICAS:
+        return
+    if user_id is not None and cache.get(sticky_cache_key(user_id)):
+        return
+    state.replica = choose_replica()
+
+
+def use_primary() -> None:
+    """Send the remaining reads of the current request back to the primary."""
+    state = _state.get()
+    if state is not None:
+        state.replica = None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and not state.wrote:
+            return state.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Keeps the routing state of a request and starts the sticky window after a write."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.start_sticky_window(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.start_sticky_window(request, state)
+        return response
+
+    @staticmethod
+    def start_sticky_window(request, state: RoutingState) -> None:
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            cache.set(sticky_cache_key(user.pk), True, timeout=settings.DB_REPLICA_STICKY_SECONDS)
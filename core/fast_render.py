@@ -0,0 +1,136 @@
+"""
+Fast path json rendering of plain model rows for the hot list routes.
+
+A ModelSerializer calls a field object per value and builds a dict per row. For
+a serializer made of plain columns the rows are read as values_list() tuples
+instead, only the columns whose representation differs from the database
+value are converted, by the serializer's own fields, and the result is encoded
+by orjson. The bytes are the same JSONRenderer renders for serializer.data.
+"""
+import itertools
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# fields whose representation is the database value itself
+PASSTHROUGH_FIELDS = (serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+                      serializers.IntegerField)
+CONVERTED_FIELDS = (serializers.DateField, serializers.DecimalField, serializers.TimeField, serializers.UUIDField)
+Converter = Callable[[Any], Any]
+
+
+def datetime_converter(field: serializers.DateTimeField) -> Converter:
+    """
+    DateTimeField.to_representation with the time zone looked up once per
+    response instead of once per value, for the aware datetimes of USE_TZ.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return convert
+
+
+def get_converter(field: serializers.Field) -> Optional[Callable[[], Converter]]:
+    """The factory of the converter of a column, called for every response, or None to keep the value."""
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # values_list() gives the related pk, json encodes a uuid pk like JSONRenderer
+        return (lambda: field.pk_field.to_representation) if field.pk_field is not None else None
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.DateTimeField):
+        return lambda: datetime_converter(field)
+    if isinstance(field, CONVERTED_FIELDS):
+        return lambda: field.to_representation
+    # floats, json and nested values are not encoded the same way, they stay on the serializer
+    raise ImproperlyConfigured(f'{field.parent.__class__.__name__}.{field.field_name} is a '
+                               f'{field.__class__.__name__}, it can not be rendered from rows')
+
+
+class RowEncoder:
+    """Turn values_list() rows into the representation of a plain ModelSerializer."""
+
+    def __init__(self, serializer_class: Type[serializers.ModelSerializer]):
+        fields = [field for field in serializer_class().fields.values() if not field.write_only]
+        for field in fields:
+            if field.source == '*':
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{field.field_name} is not a column')
+        self.names = [field.field_name for field in fields]
+        self.columns = [field.source.replace('.', '__') for field in fields]
+        self.converters = [(index, converter) for index, converter in enumerate(map(get_converter, fields))
+                           if converter is not None]
+
+    def column_index(self, column: str) -> int:
+        return self.columns.index(column)
+
+    def rows(self, queryset: QuerySet) -> Iterator[Tuple]:
+        return queryset.values_list(*self.columns).iterator()
+
+    def get_conversions(self) -> List[Tuple[int, Converter]]:
+        # the active time zone can change between requests
+        return [(index, converter()) for index, converter in self.converters]
+
+    def to_representation(self, row: Tuple, conversions: List[Tuple[int, Converter]]) -> Dict[str, Any]:
+        values = list(row)
+        for index, convert in conversions:
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        return dict(zip(self.names, values))
+
+    def to_list(self, rows: Iterable[Tuple], conversions: List[Tuple[int, Converter]]) -> List[Dict[str, Any]]:
+        return [self.to_representation(row, conversions) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def get_row_encoder(serializer_class: Type[serializers.ModelSerializer]) -> RowEncoder:
+    return RowEncoder(serializer_class)
+
+
+def encode_default(value: Any) -> Any:
+    # the fallbacks of rest_framework.utils.encoders.JSONEncoder orjson does not know
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'{value.__class__.__name__} is not json serializable')
+
+
+def render_json(data: Any) -> bytes:
+    content = orjson.dumps(data, default=encode_default)
+    # JSONRenderer escapes the javascript line terminators
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def serialize_rows(queryset: QuerySet, serializer_class: Type[serializers.ModelSerializer]) -> List[Dict[str, Any]]:
+    """serializer_class(queryset, many=True).data, as plain dicts."""
+    encoder = get_row_encoder(serializer_class)
+    return encoder.to_list(encoder.rows(queryset), encoder.get_conversions())
+
+
+def serialize_grouped_rows(queryset: QuerySet, serializer_class: Type[serializers.ModelSerializer],
+                           column: str, key: Callable[[Any], Any], name: str,
+                           items_name: str) -> List[Dict[str, Any]]:
+    """
+    [{name: key, items_name: [row, ...]}, ...], grouping consecutive rows by
+    key(column value) while they are read.
+    """
+    encoder = get_row_encoder(serializer_class)
+    index = encoder.column_index(column)
+    conversions = encoder.get_conversions()
+    return [{name: group_key, items_name: encoder.to_list(rows, conversions)}
+            for group_key, rows in itertools.groupby(encoder.rows(queryset), key=lambda row: key(row[index]))]
@@ -0,0 +1,68 @@
+"""
+Geohash helpers for the nearest shop lookup.
+
+A geohash prefix is a rectangular cell, so every point within a radius lies in
+the 3x3 block of cells around the center once the cells are at least as large
+as the radius. Those nine prefixes are matched against the indexed Shop.geohash.
+"""
+import math
+from typing import Set
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    latitude_range, longitude_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value, value_range = (longitude, longitude_range) if even else (latitude, latitude_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(geohash)
+
+
+def cell_size(precision: int):
+    """Height and width in degrees of a geohash cell."""
+    longitude_bits = math.ceil(precision * 5 / 2)
+    latitude_bits = precision * 5 // 2
+    return 180 / 2 ** latitude_bits, 360 / 2 ** longitude_bits
+
+
+def haversine_km(latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float) -> float:
+    phi_1, phi_2 = math.radians(latitude_1), math.radians(latitude_2)
+    d_phi, d_lambda = phi_2 - phi_1, math.radians(longitude_2 - longitude_1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi_1) * math.cos(phi_2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def search_prefixes(latitude: float, longitude: float, radius_km: float) -> Set[str]:
+    """Geohash prefixes of the 3x3 cell block covering the radius around a point."""
+    longitude_scale = max(math.cos(math.radians(latitude)), 0.01)
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height * KM_PER_DEGREE >= radius_km and width * KM_PER_DEGREE * longitude_scale >= radius_km:
+            precision = candidate
+            break
+
+    height, width = cell_size(precision)
+    prefixes = set()
+    for latitude_step in (-1, 0, 1):
+        for longitude_step in (-1, 0, 1):
+            cell_latitude = min(max(latitude + latitude_step * height, -90.0), 90.0)
+            cell_longitude = (longitude + longitude_step * width + 180) % 360 - 180
+            prefixes.add(encode_geohash(cell_latitude, cell_longitude, precision))
+    return prefixes
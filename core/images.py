@@ -0,0 +1,61 @@
+"""
+Resized, compressed copies of item images.
+
+Variants are written next to the original in the same storage, so they work
+the same on S3 and on a local FileSystemStorage.
+"""
+import os
+from io import BytesIO
+from typing import Dict
+
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from core.constants import IMAGE_VARIANTS, IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY
+from core.models import Item
+
+
+def variant_name(name: str, variant: str) -> str:
+    root, _ = os.path.splitext(name)
+    return f'{root}_{variant}.{IMAGE_VARIANT_FORMAT.lower()}'
+
+
+def source_version(item: Item) -> str:
+    storage, name = item.image.storage, item.image.name
+    return f'{storage.size(name)}:{storage.get_modified_time(name).timestamp()}'
+
+
+def has_current_variants(item: Item) -> bool:
+    if not all(item.image_variants.get(variant) == variant_name(item.image.name, variant)
+               for variant in IMAGE_VARIANTS):
+        return False
+    # S3Boto3Storage overwrites an upload with the same name, the names alone do not tell a new image apart
+    return item.image_source == source_version(item)
+
+
+def generate_image_variants(item: Item) -> Dict[str, str]:
+    """Write every variant of the item image and store their names on the item."""
+    storage = item.image.storage
+    version = source_version(item)
+    with item.image.open('rb') as image_file:
+        image = Image.open(image_file)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    variants = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size)
+        content = BytesIO()
+        resized.save(content, IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY)
+
+        name = variant_name(item.image.name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        variants[variant] = storage.save(name, ContentFile(content.getvalue()))
+
+    # update() so the post_save handler is not triggered again
+    Item.objects.filter(pk=item.pk).update(image_variants=variants, image_source=version)
+    item.image_variants, item.image_source = variants, version
+    return variants
@@ -0,0 +1,251 @@
+"""
+Concurrent load test of the booking and checkout flow.
+
+Every virtual user walks the real url routes through the full middleware stack:
+otp login, address, cart, pickup and delivery timeslots, bookings, checkout
+and payment. The SMS and Razorpay gateways are the in-process fakes, so only
+this code base is measured. The report has the latency percentiles and query
+counts per route, as json that can be diffed between releases.
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.constants import AddressType, BookingType, DEFAULT_PREFERENCES, DEFAULT_SHOP
+from core.cron import update_timeslots
+from core.models import Item, Shop, User, WashCategory
+from core.razorpay_gateway import sign_payment
+from core.sms import FakeSMSProvider
+
+LOADTEST_PREFIX = 'loadtest-'
+# +91 79900 xxxxx, valid indian mobile numbers that a real customer can have as well
+LOADTEST_PHONE_PREFIX = '+9179900'
+OWNER_PHONE = f'{LOADTEST_PHONE_PREFIX}99999'
+# the users seeded by a run carry this preferences key, only they are ever deleted
+LOADTEST_MARKER = 'loadtest'
+
+GATEWAY_SETTINGS = {
+    'SMS_PROVIDER': 'core.sms.FakeSMSProvider',
+    'SMS_DELIVERY_EAGER': True,
+    'RAZORPAY_CLIENT': 'core.razorpay_gateway.FakeRazorpayClient',
+}
+
+
+class FlowError(Exception):
+    """Raised when a step of a flow gets an unexpected response."""
+
+
+class SeedError(Exception):
+    """Raised when a phone number of the load test belongs to a user the load test did not seed."""
+
+
+def user_phone(index: int) -> str:
+    return f'{LOADTEST_PHONE_PREFIX}{index:05d}'
+
+
+def seeded_preferences() -> Dict:
+    return {**DEFAULT_PREFERENCES, LOADTEST_MARKER: True}
+
+
+def delete_loadtest_data() -> None:
+    User.objects.filter(phone__startswith=LOADTEST_PHONE_PREFIX, **{f'preferences__{LOADTEST_MARKER}': True}).delete()
+    Item.objects.filter(name__startswith=LOADTEST_PREFIX).delete()
+    WashCategory.objects.filter(name__startswith=LOADTEST_PREFIX).delete()
+
+
+def check_phones_are_free(phones: List[str]) -> None:
+    taken = [phone for phone, preferences in User.objects.filter(phone__in=phones).values_list('phone', 'preferences')
+             if not (preferences or {}).get(LOADTEST_MARKER)]
+    if taken:
+        raise SeedError(f'{len(taken)} load test phone numbers belong to real users, e.g. {taken[0]}')
+
+
+def seed(users: int, shops: int, items: int, wash_categories: int, slot_capacity: int) -> Dict[str, List]:
+    """
+    Replace the data of an earlier run with the virtual users, the shops, their
+    timeslots and the catalog. The virtual users are created here, marked, so
+    the otp login of the flow signs in to them instead of creating users.
+    """
+    phones = [OWNER_PHONE, *map(user_phone, range(users))]
+    check_phones_are_free(phones)
+    delete_loadtest_data()
+    User.objects.bulk_create([User(phone=phone, password=make_password(None), preferences=seeded_preferences())
+                              for phone in phones])
+    owner = User.objects.get(phone=OWNER_PHONE)
+    shop_ids = []
+    for index in range(shops):
+        shop = Shop.objects.create(**{**DEFAULT_SHOP, 'name': f'{LOADTEST_PREFIX}shop-{index}',
+                                      'max_user_limit_per_time_slot': slot_capacity}, user=owner)
+        update_timeslots(shop.id)
+        shop_ids.append(shop.id)
+    item_ids = [Item.objects.create(name=f'{LOADTEST_PREFIX}item-{index}', price=random.randint(5, 50)).id
+                for index in range(items)]
+    wash_category_ids = [WashCategory.objects.create(name=f'{LOADTEST_PREFIX}wash-{index}',
+                                                     extra_per_item=random.randint(0, 5)).id
+                         for index in range(wash_categories)]
+    return {'shops': shop_ids, 'items': [str(pk) for pk in item_ids],
+            'wash_categories': [str(pk) for pk in wash_category_ids]}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class RouteStats:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, route: str, seconds: float, queries: int, ok: bool) -> None:
+        with self.lock:
+            self.samples.setdefault(route, []).append((seconds, queries, ok))
+
+    def report(self) -> Dict[str, Dict]:
+        report = {}
+        for route, samples in sorted(self.samples.items()):
+            latencies = [seconds * 1000 for seconds, _, _ in samples]
+            queries = [count for _, count, _ in samples]
+            report[route] = {
+                'requests': len(samples),
+                'errors': sum(not ok for _, _, ok in samples),
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'mean_queries': round(sum(queries) / len(queries), 2),
+                'max_queries': max(queries),
+            }
+        return report
+
+
+class VirtualUser:
+    """One customer going through the flow with its own client and token."""
+
+    def __init__(self, phone: str, data: Dict[str, List], stats: RouteStats, cart_items: int):
+        self.phone = phone
+        self.data = data
+        self.stats = stats
+        self.cart_items = cart_items
+        # server errors are counted like any other unexpected status instead of raised
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method: str, route: str, expected_status: int, *args, data=None, **params):
+        url = reverse(f'core:{route}', args=args)
+        with ExitStack() as stack:
+            captures = [stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]]
+            start = time.perf_counter()
+            if method == 'get':
+                response = self.client.get(url, params)
+            else:
+                response = self.client.post(url, data, content_type='application/json')
+            seconds = time.perf_counter() - start
+        ok = response.status_code == expected_status
+        self.stats.add(route, seconds, sum(len(capture) for capture in captures), ok)
+        if not ok:
+            raise FlowError(f'{method.upper()} {route} answered {response.status_code}')
+        return response.json()
+
+    def read_otp(self) -> str:
+        # list() copies the deque in one step while other users keep appending
+        for to, body in reversed(list(FakeSMSProvider.outbox)):
+            if to == self.phone:
+                return re.search(r'\d{4,}', body).group()
+        raise FlowError(f'no otp was sent to {self.phone}')
+
+    def login(self) -> None:
+        self.request('post', 'send-otp', 202, data={'phone': self.phone})
+        tokens = self.request('post', 'otp-login', 200, data={'phone': self.phone, 'otp': self.read_otp()})
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {tokens["access"]}'
+
+    def book(self, timeslot_groups: List[Dict], address_id: str, booking_type: BookingType) -> str:
+        timeslots = [timeslot for group in timeslot_groups for timeslot in group['timeslots']]
+        if not timeslots:
+            raise FlowError(f'no {booking_type.value} timeslots left')
+        # spread the users over the first day's slots like real customers would
+        timeslot = random.choice(timeslots[:8])
+        booking = self.request('post', 'book-timeslot', 201, data={
+            'time_slot': timeslot['id'], 'address': address_id, 'booking_type': booking_type.name})
+        return booking['id']
+
+    def run(self) -> None:
+        self.login()
+        address = self.request('post', 'address-list', 201, data={
+            'address_line_1': '1 Load Test Road', 'city': 'Chennai', 'country': 'India',
+            'type': AddressType.PICKUP_AND_DELIVERY.name})
+        self.request('get', 'item-list', 200)
+        # distinct items, adding one again answers 200 instead of 201
+        for item in random.sample(self.data['items'], min(self.cart_items, len(self.data['items']))):
+            self.request('post', 'user-item', 201, data={
+                'item': item, 'wash_category': random.choice(self.data['wash_categories']),
+                'quantity': random.randint(1, 5)})
+
+        timeslots = self.request('get', 'pickup-timeslot-list', 200, shop_id=random.choice(self.data['shops']),
+                                 is_available='true')
+        pickup_booking = self.book(timeslots, address['id'], BookingType.PICKUP)
+        timeslots = self.request('get', 'delivery-timeslot-list', 200, pickup_booking_id=pickup_booking,
+                                 is_available='true')
+        delivery_booking = self.book(timeslots, address['id'], BookingType.DELIVERY)
+
+        order = self.request('post', 'cart_to_order', 201, data={
+            'pickup_booking': pickup_booking, 'delivery_booking': delivery_booking})
+        payment_info = self.request('get', 'payment-list-create', 200, order_id=order['id'])
+        razorpay_order_id = payment_info['razorpay']['id']
+        razorpay_payment_id = f'pay_fake{random.getrandbits(48):012x}'
+        self.request('post', 'payment-retrieve-update-destroy', 200, data={
+            'payment_id': payment_info['payment']['id'],
+            'razorpay_order_id': razorpay_order_id,
+            'razorpay_payment_id': razorpay_payment_id,
+            'razorpay_signature': sign_payment(razorpay_order_id, razorpay_payment_id)})
+        self.request('get', 'list-bookings', 200)
+
+
+def run_flow(phone: str, data: Dict[str, List], stats: RouteStats, cart_items: int) -> str:
+    try:
+        VirtualUser(phone, data, stats, cart_items).run()
+    except FlowError as e:
+        return str(e)
+    except Exception as e:
+        # a crash in one flow is a failed flow, not the end of the whole run
+        return f'{e.__class__.__name__}: {e}'
+    finally:
+        # every pool thread has its own connections
+        connections.close_all()
+    return ''
+
+
+def run_load_test(users: int, concurrency: int, data: Dict[str, List], cart_items: int = 2,
+                  throttle: bool = False) -> Dict:
+    overrides = dict(GATEWAY_SETTINGS)
+    if not throttle:
+        overrides['THROTTLE_STORE'] = 'core.throttling.UnlimitedStore'
+    stats = RouteStats()
+    with override_settings(**overrides):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest') as executor:
+            errors = list(executor.map(run_flow, [user_phone(index) for index in range(users)],
+                                       [data] * users, [stats] * users, [cart_items] * users))
+        seconds = time.perf_counter() - start
+
+    routes = stats.report()
+    failures = [error for error in errors if error]
+    return {
+        'config': {'users': users, 'concurrency': concurrency, 'cart_items': cart_items, 'throttle': throttle,
+                   'shops': len(data['shops']), 'items': len(data['items']),
+                   'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]},
+        'duration_seconds': round(seconds, 3),
+        'throughput_rps': round(sum(route['requests'] for route in routes.values()) / seconds, 2),
+        'flows': {'completed': users - len(failures), 'failed': len(failures), 'errors': sorted(set(failures))[:10]},
+        'routes': routes,
+    }
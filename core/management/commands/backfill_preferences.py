@@ -0,0 +1,38 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from core.constants import PREFERENCES_BACKFILL_BATCH_SIZE
+from core.models import User
+from core.preferences import parse_other_details
+
+
+class Command(BaseCommand):
+    help = 'Convert the other_details of existing users into preferences, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PREFERENCES_BACKFILL_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+
+    @staticmethod
+    def convert_batch(batch_size: int) -> int:
+        # each batch is its own short transaction, skip_locked leaves rows being written to their own save
+        with transaction.atomic():
+            users = list(User.objects.select_for_update(skip_locked=True).filter(
+                preferences__isnull=True).order_by('pk').only('pk', 'other_details')[:batch_size])
+            for user in users:
+                user.preferences = parse_other_details(user.other_details)
+            User.objects.bulk_update(users, ['preferences'])
+        return len(users)
+
+    def handle(self, *args, **options):
+        converted = 0
+        while True:
+            count = self.convert_batch(options['batch_size'])
+            if not count:
+                break
+            converted += count
+            self.stdout.write(f'Preferences converted: {converted}')
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Preferences converted for {converted} users'))
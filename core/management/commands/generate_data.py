@@ -0,0 +1,40 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from core.datagen import RowWriter, generate, synthetic_data_exists
+from core.models import Item, WashCategory
+
+
+class Command(BaseCommand):
+    help = ('Generate production scale synthetic users, addresses, carts, timeslots, bookings, orders and payments, '
+            'about 12 rows per user, on top of the populate_default catalog')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--shops', type=int, help='Defaults to one shop per 2000 users')
+        parser.add_argument('--days', type=int, default=180, help='Days of booking history before today')
+        parser.add_argument('--slot-capacity', type=int, default=10, help='Pickup and delivery quota per timeslot')
+        parser.add_argument('--seed', type=int, default=0, help='The same seed generates the same rows')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create statement')
+        parser.add_argument('--bulk-create', action='store_true', help='Use bulk_create instead of COPY on Postgres')
+
+    def handle(self, *args, **options):
+        if not Item.objects.exists() or not WashCategory.objects.exists():
+            raise CommandError('The catalog is empty, run populate_default first')
+        if synthetic_data_exists():
+            raise CommandError('Synthetic data is already present, generate it into a fresh database')
+
+        shops = options['shops'] or max(1, options['users'] // 2000)
+        writer = RowWriter(batch_size=options['batch_size'], copy=False if options['bulk_create'] else None)
+        start = time.perf_counter()
+        counts = generate(options['users'], shops, days=options['days'], slot_capacity=options['slot_capacity'],
+                          seed=options['seed'], writer=writer)
+        seconds = time.perf_counter() - start
+
+        for model, count in sorted(counts.items()):
+            self.stdout.write(f'{model}: {count}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} rows written in {seconds:.1f}s ({total / seconds:.0f} rows/s, '
+            f'{"copy" if writer.copy else "bulk_create"})'))
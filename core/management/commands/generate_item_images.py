@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from core.catalog import bump_catalog_version
+from core.images import generate_image_variants, has_current_variants
+from core.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized image variants of every item'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist')
+
+    def handle(self, *args, **options):
+        generated = 0
+        for item in Item.objects.exclude(image='').iterator():
+            try:
+                if not options['force'] and has_current_variants(item):
+                    continue
+                generate_image_variants(item)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f'Item image skipped: {item.name} ({e})'))
+                continue
+            generated += 1
+            self.stdout.write(self.style.SUCCESS(f'Item image variants generated: {item.name}'))
+
+        if generated:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Image variants generated for {generated} items'))
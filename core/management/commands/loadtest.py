@@ -0,0 +1,42 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from core.loadtest import SeedError, delete_loadtest_data, run_load_test, seed
+
+
+class Command(BaseCommand):
+    help = 'Seed load test data and run the booking and checkout flow concurrently, printing a json report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Virtual users, each runs the flow once')
+        parser.add_argument('--concurrency', type=int, default=8, help='Users running at the same time')
+        parser.add_argument('--shops', type=int, default=5)
+        parser.add_argument('--items', type=int, default=20)
+        parser.add_argument('--wash-categories', type=int, default=5)
+        parser.add_argument('--slot-capacity', type=int, default=1000, help='Pickup and delivery quota per timeslot')
+        parser.add_argument('--cart-items', type=int, default=2)
+        parser.add_argument('--throttle', action='store_true', help='Keep the configured throttles on')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the seeded rows after the run')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            data = seed(options['users'], options['shops'], options['items'], options['wash_categories'],
+                        options['slot_capacity'])
+        except SeedError as e:
+            raise CommandError(e)
+        try:
+            report = run_load_test(options['users'], options['concurrency'], data,
+                                   cart_items=options['cart_items'], throttle=options['throttle'])
+        finally:
+            if not options['keep_data']:
+                delete_loadtest_data()
+
+        content = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+        else:
+            self.stdout.write(content)
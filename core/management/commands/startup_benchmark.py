@@ -0,0 +1,35 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from core.startup import budget_errors, run_startup_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Measure the cold start time and memory of a production worker, printing a json report and failing '
+            'when it is over budget, over the baseline or imports a lazy sdk')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts, the median is reported')
+        parser.add_argument('--debug', action='store_true', help='Start the workers with DEBUG on')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+        parser.add_argument('--baseline', help='A report of an earlier run on the same machine to compare against')
+
+    def handle(self, *args, **options):
+        report = run_startup_benchmark(runs=options['runs'], debug=options['debug'])
+
+        content = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+        else:
+            self.stdout.write(content)
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+        errors = budget_errors(report, baseline)
+        if errors:
+            raise CommandError('; '.join(errors))
@@ -0,0 +1,242 @@
+"""
+Request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and counts its database queries through
+an execute wrapper that every connection gets when it is opened. The route label
+is the url pattern, never the path, so the number of series stays bounded.
+Cache lookups and gateway calls are counted where they happen. Samples are plain
+float additions under one lock, and the text is only rendered when scraped.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRICS = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by route.'),
+    'http_db_queries_total': ('counter', 'Database queries run by requests of the route.'),
+    'http_db_query_seconds_total': ('counter', 'Time spent in database queries by requests of the route.'),
+    'cache_lookups_total': ('counter', 'Cache lookups by cache and result.'),
+    'gateway_request_duration_seconds': ('histogram', 'Outbound gateway call latency.'),
+}
+
+_request = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+def escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def series(name: str, **labels) -> str:
+    if not labels:
+        return name
+    values = ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+    return f'{name}{{{values}}}'
+
+
+def sort_key(key: str):
+    # buckets of a series in ascending le order, +Inf last
+    base, _, le = key.partition(',le="')
+    return base, float(le.rstrip('"}')) if le else 0.0
+
+
+@lru_cache(maxsize=4096)
+def histogram_keys(name: str, labels: tuple):
+    buckets = [series(f'{name}_bucket', **dict(labels), le=bucket) for bucket in LATENCY_BUCKETS]
+    infinity = series(f'{name}_bucket', **dict(labels), le='+Inf')
+    return buckets, infinity, series(f'{name}_sum', **dict(labels)), series(f'{name}_count', **dict(labels))
+
+
+def histogram_samples(name: str, value: float, **labels):
+    # the keys of a label set are built once, a request only compares and adds
+    buckets, infinity, sum_key, count_key = histogram_keys(name, tuple(labels.items()))
+    samples = {key: int(value <= bucket) for key, bucket in zip(buckets, LATENCY_BUCKETS)}
+    samples.update({infinity: 1, sum_key: value, count_key: 1})
+    return samples
+
+
+class LocalMetricsStore:
+    """Per process store, the stand-in for tests and single worker runs."""
+
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, samples) -> None:
+        with self.lock:
+            for key, value in samples.items():
+                self.samples[key] = self.samples.get(key, 0) + value
+
+    def collect(self):
+        with self.lock:
+            return dict(self.samples)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.samples.clear()
+
+
+class RedisMetricsStore(LocalMetricsStore):
+    """
+    Store shared by every worker, samples are buffered and flushed to one redis
+    hash. A flush runs in the request path, when redis is unreachable the
+    samples are kept in the buffer for the next flush instead of failing the
+    request.
+    """
+    key = 'metrics'
+
+    def __init__(self):
+        super().__init__()
+        self.client = redis.Redis.from_url(settings.METRICS_REDIS_URL)
+        self.flushed_at = time.monotonic()
+
+    def add(self, samples) -> None:
+        super().add(samples)
+        if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            samples, self.samples = self.samples, {}
+            self.flushed_at = time.monotonic()
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in samples.items():
+            pipeline.hincrbyfloat(self.key, key, value)
+        try:
+            pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning('metrics flush failed: %s', e)
+            super().add(samples)
+
+    def collect(self):
+        self.flush()
+        return {key.decode(): float(value) for key, value in self.client.hgetall(self.key).items()}
+
+    def clear(self) -> None:
+        super().clear()
+        self.client.delete(self.key)
+
+
+_stores = {}
+
+
+def get_store():
+    """Return the configured metrics store, one instance per process."""
+    path = settings.METRICS_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper counting the queries of the current request."""
+    metrics = _request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    # connection_created fires again on every reconnect of the same connection
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_cache_lookup(cache_name: str, hit: bool, count: int = 1) -> None:
+    if count:
+        get_store().add({series('cache_lookups_total', cache=cache_name, result='hit' if hit else 'miss'): count})
+
+
+@contextmanager
+def gateway_timer(gateway: str):
+    """Time an outbound gateway call, also usable around an await."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_store().add(histogram_samples('gateway_request_duration_seconds', time.perf_counter() - start,
+                                          gateway=gateway))
+
+
+def render_metrics() -> str:
+    samples = get_store().collect()
+    lines = []
+    for name, (metric_type, description) in METRICS.items():
+        names = {f'{name}_bucket', f'{name}_sum', f'{name}_count'} if metric_type == 'histogram' else {name}
+        family = sorted((key for key in samples if key.split('{', 1)[0] in names), key=sort_key)
+        if not family:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.extend(f'{key} {samples[key]!r}' for key in family)
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Records the latency and the database time of every request under its route."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _request.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _request.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def record(request, response, metrics: RequestMetrics, duration: float) -> None:
+        match = request.resolver_match
+        labels = {
+            'route': match.route if match else 'unmatched',
+            'method': request.method,
+            'status': response.status_code,
+        }
+        samples = histogram_samples('http_request_duration_seconds', duration, **labels)
+        samples[series('http_db_queries_total', **labels)] = metrics.queries
+        samples[series('http_db_query_seconds_total', **labels)] = metrics.query_seconds
+        get_store().add(samples)
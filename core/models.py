@@ -1,7 +1,6 @@
 import uuid
 from datetime import timedelta, time
 
-import phonenumbers as phonenumbers
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -9,10 +8,13 @@ from django.contrib.auth.models import (
 )
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models.fields.json import KeyTransform
 
 from WashForMe_Backend import settings
 from core.constants import PaymentSource, PaymentStatus, OrderStatus, BookingType, AddressType
 from core.custom_model_fields import PositiveDecimalField, CustomPositiveInteger
+from core.phone import normalize_phone
+from core.preferences import parse_other_details
 from django.db.models import Q
 
 
@@ -23,8 +25,7 @@ class UserManager(BaseUserManager):
         """Create, save and returns a user."""
         if not phone or phone.isalpha():
             raise ValueError('Phone number must be number.')
-        elif not phonenumbers.is_valid_number(phonenumbers.parse(phone)):
-            raise ValueError('Phone number is not valid.')
+        phone = normalize_phone(phone)
 
         try:
             user = self.model.objects.get(phone=phone)
@@ -44,6 +45,10 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def with_notifications(self):
+        """Users with notifications on, served by the user_notifications_idx expression index."""
+        return self.filter(preferences__notifications='On')
+
     def create_superuser(self, phone, password=None, **extra_fields):
         """Create, save and returns a superuser."""
         user = self.create_user(phone, password, **extra_fields)
@@ -68,7 +73,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     dictionary = dict(availability='Yes', notifications='On',
                       language='English', dark_mode='No')
+    # replaced by preferences, rows are converted on save and by the backfill_preferences command
     other_details = models.TextField(default=dictionary, blank=True)
+    preferences = models.JSONField(null=True, blank=True)
     cart_total_price = PositiveDecimalField(
         max_digits=10, decimal_places=2, default=0.0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -77,20 +84,59 @@ class User(AbstractBaseUser, PermissionsMixin):
     objects = UserManager()
     USERNAME_FIELD = 'phone'
 
+    class Meta:
+        indexes = [
+            models.Index(KeyTransform('notifications', 'preferences'), name='user_notifications_idx'),
+        ]
+
     def __str__(self):
         return self.phone
 
+    def save(self, *args, **kwargs):
+        # a principal saves only its loaded fields, its preferences are converted once loaded
+        if 'preferences' not in self.get_deferred_fields() and self.preferences is None:
+            self.preferences = parse_other_details(self.other_details)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'preferences'}
+        super().save(*args, **kwargs)
+
+
+class UserPrincipal(User):
+    """
+    User built by the authentication from a few cached columns.
+
+    The first access to any other field loads all missing fields in one query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and deferred_fields and set(fields) <= deferred_fields:
+            fields = deferred_fields
+        super().refresh_from_db(using=using, fields=fields)
+
 
 class Item(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=55, unique=True)
     image = models.FileField(upload_to='images/', blank=True)
+    # variant name -> storage name of the resized copy, see core.images
+    image_variants = models.JSONField(default=dict, blank=True)
+    # size and modified time of the image the variants were made from
+    image_source = models.CharField(max_length=64, blank=True)
     price = PositiveDecimalField(max_digits=10, decimal_places=2, default=0.0)
     count = models.IntegerField(default=0)
     extras = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count', 'name'], name='item_popularity_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -100,9 +146,15 @@ class WashCategory(models.Model):
     name = models.CharField(max_length=55, unique=True)
     extra_per_item = PositiveDecimalField(
         max_digits=10, decimal_places=2, default=0.0)
+    count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count', 'name'], name='wash_category_popularity_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -119,6 +171,10 @@ class Address(models.Model):
     city = models.CharField(max_length=255)
     country = models.CharField(max_length=255)
     pincode = models.IntegerField(default=000000)
+    latitude = models.FloatField(null=True, blank=True,
+                                 validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True,
+                                  validators=[MinValueValidator(-180), MaxValueValidator(180)])
     type = models.CharField(max_length=20,
                             choices=[(tag.name, tag.value) for tag in AddressType])
     is_primary = models.BooleanField(default=False)
@@ -165,10 +221,29 @@ class Shop(models.Model):
                                               validators=[MinValueValidator(timedelta(hours=1))])
     active = models.BooleanField(default=True)
     max_user_limit_per_time_slot = CustomPositiveInteger(default=10)
+    latitude = models.FloatField(null=True, blank=True,
+                                 validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True,
+                                  validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    # set from the coordinates on save, db_index adds the LIKE prefix index on postgres
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class ShopRating(models.Model):
+    """Review aggregates of a shop, kept in step with every Review write."""
+    shop = models.OneToOneField(Shop, on_delete=models.CASCADE, primary_key=True, related_name='rating')
+    count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 class Timeslot(models.Model):
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
@@ -178,6 +253,9 @@ class Timeslot(models.Model):
 
     class Meta:
         ordering = ['shop', 'start_datetime']
+        indexes = [
+            models.Index(fields=['shop', 'start_datetime'], name='timeslot_shop_start_idx'),
+        ]
 
 
 class BookTimeslot(models.Model):
@@ -222,6 +300,14 @@ class OrderDetails(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class PopularityDelta(models.Model):
+    """Ordered quantity not yet added to Item.count and WashCategory.count."""
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    wash_category = models.ForeignKey(WashCategory, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class Payment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
@@ -254,7 +340,18 @@ class Review(models.Model):
         Shop, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
-    rating = models.PositiveIntegerField(validators=[MaxValueValidator(5)])
+    rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class OTPToken(models.Model):
+    """Issued otp per phone number, shared by every worker through the database."""
+    phone = models.CharField(max_length=255, unique=True)
+    otp = models.CharField(max_length=8)
+    expires_at = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    attempts_expire_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
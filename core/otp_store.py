@@ -0,0 +1,127 @@
+"""
+Storage for issued otps.
+
+Every worker has to see the same otp and the same attempt counter, so otps are
+kept either in the database (default) or in a shared cache such as redis. Both
+stores consume an otp atomically: of two concurrent correct submissions only
+one is verified.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.constants import OTPCheckResult, OTP_TIMEOUT, OTP_MAX_ATTEMPTS, OTP_ATTEMPTS_TIMEOUT
+from core.models import OTPToken
+
+
+class DatabaseOTPStore:
+    """Keeps one OTPToken row per phone number."""
+
+    def issue(self, phone: str, otp: str) -> None:
+        now = timezone.now()
+        with transaction.atomic():
+            token, created = OTPToken.objects.select_for_update().get_or_create(
+                phone=phone,
+                defaults={'otp': otp,
+                          'expires_at': now + timedelta(seconds=OTP_TIMEOUT),
+                          'attempts_expire_at': now + timedelta(seconds=OTP_ATTEMPTS_TIMEOUT)}
+            )
+            if created:
+                return
+            token.otp = otp
+            token.expires_at = now + timedelta(seconds=OTP_TIMEOUT)
+            # a new otp does not reset the attempt counter until its window has passed
+            if token.attempts_expire_at <= now:
+                token.attempts = 0
+                token.attempts_expire_at = now + timedelta(seconds=OTP_ATTEMPTS_TIMEOUT)
+            token.save()
+
+    def consume(self, phone: str, otp: str) -> OTPCheckResult:
+        tokens = OTPToken.objects.filter(phone=phone)
+        if not tokens.filter(attempts__lt=OTP_MAX_ATTEMPTS).update(attempts=F('attempts') + 1):
+            return OTPCheckResult.LOCKED if tokens.exists() else OTPCheckResult.EXPIRED
+
+        deleted, _ = tokens.filter(otp=otp, expires_at__gt=timezone.now()).delete()
+        return OTPCheckResult.VERIFIED if deleted else OTPCheckResult.MISMATCH
+
+    def delete_expired(self) -> None:
+        now = timezone.now()
+        OTPToken.objects.filter(expires_at__lte=now, attempts_expire_at__lte=now).delete()
+
+
+class CacheOTPStore:
+    """Keeps otps in the OTP_CACHE_ALIAS cache, point it at redis to share it between nodes."""
+
+    @property
+    def cache(self):
+        return caches[settings.OTP_CACHE_ALIAS]
+
+    @staticmethod
+    def otp_key(phone: str) -> str:
+        return f'otp:{phone}'
+
+    @staticmethod
+    def attempts_key(phone: str) -> str:
+        return f'otp_attempts:{phone}'
+
+    def issue(self, phone: str, otp: str) -> None:
+        self.cache.set(self.otp_key(phone), otp, timeout=OTP_TIMEOUT)
+
+    def increment_attempts(self, phone: str) -> int:
+        key = self.attempts_key(phone)
+        if self.cache.add(key, 1, timeout=OTP_ATTEMPTS_TIMEOUT):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # the counter expired between add and incr
+            self.cache.set(key, 1, timeout=OTP_ATTEMPTS_TIMEOUT)
+            return 1
+
+    def consume(self, phone: str, otp: str) -> OTPCheckResult:
+        if self.increment_attempts(phone) > OTP_MAX_ATTEMPTS:
+            return OTPCheckResult.LOCKED
+
+        stored_otp = self.cache.get(self.otp_key(phone))
+        if stored_otp is None:
+            return OTPCheckResult.EXPIRED
+        if stored_otp != otp:
+            return OTPCheckResult.MISMATCH
+        # only the request that actually removes the key wins
+        if not self.cache.delete(self.otp_key(phone)):
+            return OTPCheckResult.EXPIRED
+
+        self.cache.delete(self.attempts_key(phone))
+        return OTPCheckResult.VERIFIED
+
+    def delete_expired(self) -> None:
+        # the cache expires keys on its own
+        pass
+
+
+_stores = {}
+
+
+def get_store():
+    """Return the configured otp store, one instance per process."""
+    path = settings.OTP_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def issue_otp(phone: str, otp: str) -> None:
+    get_store().issue(phone, otp)
+
+
+def check_otp(phone: str, otp: str) -> OTPCheckResult:
+    """Count the attempt and consume the otp if it matches, a locked phone stays locked for the bypass code too."""
+    result = get_store().consume(phone, otp)
+    if result != OTPCheckResult.LOCKED and settings.OTP_BYPASS_CODE and otp == settings.OTP_BYPASS_CODE:
+        return OTPCheckResult.VERIFIED
+    return result
@@ -0,0 +1,15 @@
+from functools import lru_cache
+
+import phonenumbers
+
+
+@lru_cache(maxsize=4096)
+def normalize_phone(phone: str) -> str:
+    """Return the canonical E.164 form of a phone number, ValueError if it is not valid."""
+    try:
+        number = phonenumbers.parse(phone)
+    except phonenumbers.NumberParseException as e:
+        raise ValueError('Phone number is not valid.') from e
+    if not phonenumbers.is_valid_number(number):
+        raise ValueError('Phone number is not valid.')
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
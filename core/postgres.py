@@ -0,0 +1,24 @@
+"""
+Postgres only extensions and indexes.
+
+Migrations are generated on deploy by makemigrations, which can not create
+extensions or operator class indexes, so these are applied after every migrate.
+"""
+from django.db import connections
+
+POSTGRES_STATEMENTS = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # matches the UPPER("name"::text) LIKE ... of name__icontains and name__istartswith
+    'CREATE INDEX IF NOT EXISTS item_name_trgm_idx ON core_item USING gin (UPPER(name::text) gin_trgm_ops)',
+    # serves extras__contains (@>) and extras__has_keys (?&)
+    'CREATE INDEX IF NOT EXISTS item_extras_gin_idx ON core_item USING gin (extras)',
+]
+
+
+def apply_postgres_indexes(using='default', **kwargs) -> None:
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for statement in POSTGRES_STATEMENTS:
+            cursor.execute(statement)
@@ -0,0 +1,28 @@
+"""
+User preferences, converted from the other_details text.
+
+other_details holds the repr of a python dict, it is parsed once into the
+preferences JSONField so preference keys can be filtered and indexed.
+"""
+import ast
+import json
+from typing import Dict
+
+from core.constants import DEFAULT_PREFERENCES
+
+
+def parse_other_details(other_details) -> Dict:
+    """Preferences of an other_details value, unknown keys are dropped and missing ones defaulted."""
+    if isinstance(other_details, dict):
+        details = other_details
+    else:
+        try:
+            details = ast.literal_eval(other_details or '{}')
+        except (ValueError, SyntaxError):
+            try:
+                details = json.loads(other_details)
+            except ValueError:
+                details = {}
+    if not isinstance(details, dict):
+        details = {}
+    return {key: details.get(key, default) for key, default in DEFAULT_PREFERENCES.items()}
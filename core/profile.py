@@ -0,0 +1,34 @@
+"""
+Rendered user_details profiles, cached per user.
+
+The profile is the user row with its nested addresses. It is dropped from the
+cache after every User or Address write is committed, and its ETag is a hash of
+the rendered bytes, so an unchanged profile still answers 304 after a rebuild.
+"""
+import hashlib
+from typing import Callable, Tuple
+
+from django.core.cache import cache
+
+from core.constants import PROFILE_CACHE_TIMEOUT
+from core.metrics import record_cache_lookup
+
+
+def profile_cache_key(user_id) -> str:
+    return f'profile:{user_id}'
+
+
+def invalidate_profile(user_id) -> None:
+    cache.delete(profile_cache_key(user_id))
+
+
+def get_rendered_profile(user_id, render: Callable[[], bytes]) -> Tuple[str, bytes]:
+    """ETag and json bytes of the profile, render is only called on a cache miss."""
+    key = profile_cache_key(user_id)
+    profile = cache.get(key)
+    record_cache_lookup('profile', profile is not None)
+    if profile is None:
+        content = render()
+        profile = (f'"{hashlib.md5(content).hexdigest()}"', content)
+        cache.set(key, profile, timeout=PROFILE_CACHE_TIMEOUT)
+    return profile
@@ -0,0 +1,72 @@
+"""
+Razorpay clients of the payment views.
+
+RAZORPAY_CLIENT picks the client class. razorpay.Client talks to the gateway,
+FakeRazorpayClient keeps its orders in process for local runs and load tests.
+The fake still checks real signatures, sign_payment makes them. The razorpay
+sdk is imported at first use only, it is not needed to serve other routes.
+"""
+import hashlib
+import hmac
+import threading
+import time
+import uuid
+from typing import Any, Dict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class FakeOrders:
+    orders = {}
+    lock = threading.Lock()
+
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        latency = getattr(settings, 'FAKE_RAZORPAY_LATENCY', 0)
+        if latency:
+            time.sleep(latency)
+        order = {
+            'id': f'order_fake{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': data['amount'],
+            'amount_paid': 0,
+            'amount_due': data['amount'],
+            'currency': data['currency'],
+            'receipt': None,
+            'offer_id': None,
+            'status': 'created',
+            'attempts': 0,
+            'notes': data.get('notes', {}),
+            'created_at': int(time.time()),
+        }
+        with self.lock:
+            self.orders[order['id']] = order
+        return order
+
+    def fetch(self, order_id: str) -> Dict[str, Any]:
+        with self.lock:
+            order = self.orders.get(order_id)
+        if order is None:
+            from razorpay.errors import BadRequestError
+            raise BadRequestError('The id provided does not exist')
+        return order
+
+
+class FakeRazorpayClient:
+    """In-process stand-in for razorpay.Client with the order and utility calls of the payment views."""
+
+    def __init__(self, auth=None):
+        self.auth = auth
+        self.order = FakeOrders()
+        from razorpay.utility.utility import Utility
+        self.utility = Utility(self)
+
+
+def get_client():
+    return import_string(settings.RAZORPAY_CLIENT)(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+
+def sign_payment(razorpay_order_id: str, razorpay_payment_id: str) -> str:
+    """The signature the checkout returns for a payment of the order."""
+    return hmac.new(settings.RAZORPAY_KEY_SECRET.encode(), f'{razorpay_order_id}|{razorpay_payment_id}'.encode(),
+                    hashlib.sha256).hexdigest()
@@ -0,0 +1,74 @@
+"""
+Compact columnar json for the large list responses.
+
+The timeslot, booking and order lists repeat every field name in every row
+and, within a shop, mostly the same values. In the columnar format every list
+of objects is sent as {"count": n, "constants": {...}, "columns": {...}}, a
+field with the same value in every row is sent once in constants and every
+other field as one array of values in columns. Nested lists are encoded the
+same way. Clients ask for it with the Accept header or ?format=columnar, plain
+json stays the default.
+"""
+from typing import Any, Dict, Type
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema_serializer
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+COLUMNAR_MEDIA_TYPE = 'application/vnd.washforme.columnar+json'
+
+
+def to_columnar(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    if not isinstance(data, list):
+        return data
+    if data and not all(isinstance(row, dict) and row.keys() == data[0].keys() for row in data):
+        return [to_columnar(value) for value in data]
+
+    names = list(data[0]) if data else []
+    columns = {name: [to_columnar(row[name]) for row in data] for name in names}
+    constants = {}
+    if len(data) > 1:
+        for name in names:
+            first, *values = columns[name]
+            if all(type(value) is type(first) and value == first for value in values):
+                constants[name] = columns.pop(name)[0]
+    return {'count': len(data), 'constants': constants, 'columns': columns}
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = COLUMNAR_MEDIA_TYPE
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columnar(data), accepted_media_type, renderer_context)
+
+
+@extend_schema_serializer(many=False)
+class ColumnarSerializer(serializers.Serializer):
+    """
+    A list in the columnar format. Every list of objects, at any depth, and
+    every empty list is encoded like this, row i has constants[field] or
+    columns[field][i] for every field.
+    """
+    count = serializers.IntegerField(help_text='Number of rows')
+    constants = serializers.DictField(help_text='Fields with the same value in every row, when there is more than one')
+    columns = serializers.DictField(child=serializers.ListField(), help_text='The values of every other field, '
+                                                                            'in row order')
+
+
+FORMAT_PARAMETER = OpenApiParameter(
+    name='format', type=OpenApiTypes.STR, enum=['json', 'columnar'],
+    description=f'columnar answers in the compact {COLUMNAR_MEDIA_TYPE} format, '
+                f'the same as sending it in the Accept header')
+
+
+def columnar_responses(serializer: Type[serializers.BaseSerializer]) -> Dict:
+    """The responses of a list route in plain json and in the columnar format."""
+    return {
+        (200, JSONRenderer.media_type): serializer,
+        (200, COLUMNAR_MEDIA_TYPE): OpenApiResponse(ColumnarSerializer,
+                                                    description='The same list in the columnar format'),
+    }
@@ -1,8 +1,16 @@
 import logging
 
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver, Signal
 
+from .authentication import invalidate_principal
+from .catalog import bump_catalog_version
 from .cron import delete_shop_timeslots, update_timeslots
+from .geo import encode_geohash
+from .images import generate_image_variants, has_current_variants
+from .models import User, UserPrincipal, Item, WashCategory, PopularityDelta, Shop, Address
+from .profile import invalidate_profile
 
 logger = __import__("logging").getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -30,5 +38,59 @@ payment_success_signal = Signal()
 
 @receiver(payment_success_signal)
 def handle_payment_success_signal(sender, **kwargs):
-    logger.info(f'handle_payment_success_signal')
-    pass
+    order = kwargs.get('order')
+    # counted into Item/WashCategory.count later by cron.flush_popularity_counters
+    PopularityDelta.objects.bulk_create([
+        PopularityDelta(item_id=order_detail.product_id, wash_category_id=order_detail.wash_category_id,
+                        quantity=order_detail.quantity)
+        for order_detail in order.order_details.all()
+    ])
+    logger.info(f'popularity recorded for order {order.id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserPrincipal)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=UserPrincipal)
+def handle_user_change(sender, instance, **kwargs):
+    # saves and deactivations must not be hidden by the cached principal
+    user_id = instance.pk
+    invalidate_principal(user_id)
+    # after commit, a read racing the write could cache the old profile again
+    transaction.on_commit(lambda: invalidate_profile(user_id))
+
+
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def handle_address_change(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_profile(user_id))
+
+
+@receiver(post_save, sender=Item)
+def handle_item_image_upload(sender, instance, **kwargs):
+    # connected before handle_catalog_change so the new variants are part of the bumped catalog
+    if not instance.image:
+        return
+    try:
+        if not has_current_variants(instance):
+            generate_image_variants(instance)
+    except Exception as e:
+        logger.warning(f'image variants are not generated for {instance.name}: {e}')
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=WashCategory)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=WashCategory)
+def handle_catalog_change(sender, **kwargs):
+    # bumped after commit so a concurrent read can not cache the old rows under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=Shop)
+def handle_shop_location(sender, instance, **kwargs):
+    if instance.latitude is None or instance.longitude is None:
+        instance.geohash = ''
+    else:
+        instance.geohash = encode_geohash(instance.latitude, instance.longitude)
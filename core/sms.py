@@ -0,0 +1,200 @@
+"""
+Outbound SMS delivery.
+
+Messages are handed to a small background executor so the request thread never
+waits on the SMS gateway. The delivery status is kept in the cache under the
+delivery id returned to the caller. The async views await the gateway on their
+event loop instead, through asend. twilio is only imported by the first
+TwilioSMSProvider, processes that never send a message do not load it.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from core.aio_http import get_session
+from core.constants import SMSDeliveryStatus, SMS_DELIVERY_STATUS_TIMEOUT
+from core.metrics import gateway_timer
+
+if TYPE_CHECKING:
+    from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+
+class SMSDeliveryError(Exception):
+    """Raised by providers when the gateway rejects a message."""
+
+
+class TwilioSMSProvider:
+    """Sends messages through one Twilio client that keeps its HTTP connections pooled."""
+    error_messages = {
+        21211: 'Invalid phone number',
+        21608: 'The number is unverified.',
+    }
+
+    def __init__(self):
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        http_client = TwilioHttpClient(pool_connections=True, timeout=settings.SMS_GATEWAY_TIMEOUT)
+        self.client = Client(settings.ACCOUNT_SID, settings.AUTH_TOKEN, http_client=http_client)
+        self.async_clients = weakref.WeakKeyDictionary()
+
+    def send(self, to: str, body: str) -> str:
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            with gateway_timer('twilio'):
+                message = self.client.messages.create(
+                    body=body,
+                    to=to,
+                    from_=settings.TWILIO_PHONE_NUMBER,
+                )
+        except TwilioRestException as e:
+            raise SMSDeliveryError(self.error_messages.get(e.code, str(e))) from e
+        return message.sid
+
+    def get_async_client(self) -> 'Client':
+        from twilio.http.async_http_client import AsyncTwilioHttpClient
+        from twilio.rest import Client
+
+        loop = asyncio.get_running_loop()
+        client = self.async_clients.get(loop)
+        if client is None:
+            client = Client(settings.ACCOUNT_SID, settings.AUTH_TOKEN, http_client=AsyncTwilioHttpClient(
+                pool_connections=False, timeout=settings.SMS_GATEWAY_TIMEOUT))
+            self.async_clients[loop] = client
+        # requests go through the pooled session of the loop instead of a session per message
+        client.http_client.session = get_session()
+        return client
+
+    async def asend(self, to: str, body: str) -> str:
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            with gateway_timer('twilio'):
+                # AsyncTwilioHttpClient passes timeout=None to the session, which turns its timeout off
+                message = await asyncio.wait_for(self.get_async_client().messages.create_async(
+                    body=body,
+                    to=to,
+                    from_=settings.TWILIO_PHONE_NUMBER,
+                ), settings.SMS_GATEWAY_TIMEOUT)
+        except TwilioRestException as e:
+            raise SMSDeliveryError(self.error_messages.get(e.code, str(e))) from e
+        except asyncio.TimeoutError as e:
+            raise SMSDeliveryError('The SMS gateway timed out.') from e
+        return message.sid
+
+
+class FakeSMSProvider:
+    """In-process provider for local runs and load tests, nothing leaves the machine."""
+    outbox = deque(maxlen=1000)
+
+    def record(self, to: str, body: str) -> str:
+        if to in getattr(settings, 'FAKE_SMS_FAILING_NUMBERS', ()):
+            raise SMSDeliveryError('Invalid phone number')
+        self.outbox.append((to, body))
+        return f'fake-{uuid.uuid4().hex}'
+
+    def send(self, to: str, body: str) -> str:
+        latency = getattr(settings, 'FAKE_SMS_LATENCY', 0)
+        if latency:
+            time.sleep(latency)
+        return self.record(to, body)
+
+    async def asend(self, to: str, body: str) -> str:
+        latency = getattr(settings, 'FAKE_SMS_LATENCY', 0)
+        if latency:
+            await asyncio.sleep(latency)
+        return self.record(to, body)
+
+
+_providers = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_provider():
+    """Return the configured provider, one instance per process."""
+    path = settings.SMS_PROVIDER
+    if path not in _providers:
+        _providers[path] = import_string(path)()
+    return _providers[path]
+
+
+def get_executor() -> ThreadPoolExecutor:
+    # created on first use so no threads exist before the server forks its workers
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.SMS_DELIVERY_WORKERS,
+                                               thread_name_prefix='sms-delivery')
+    return _executor
+
+
+def _status_key(delivery_id: str) -> str:
+    return f'sms_delivery:{delivery_id}'
+
+
+def set_delivery_status(delivery_id: str, status: SMSDeliveryStatus, message: str = '') -> None:
+    cache.set(_status_key(delivery_id), {'status': status.value, 'message': message},
+              timeout=SMS_DELIVERY_STATUS_TIMEOUT)
+
+
+def get_delivery_status(delivery_id: str) -> Optional[Dict[str, str]]:
+    return cache.get(_status_key(delivery_id))
+
+
+def deliver(delivery_id: str, to: str, body: str) -> None:
+    try:
+        get_provider().send(to, body)
+    except SMSDeliveryError as e:
+        set_delivery_status(delivery_id, SMSDeliveryStatus.FAILED, str(e))
+    except Exception:
+        logger.exception('sms delivery %s crashed', delivery_id)
+        set_delivery_status(delivery_id, SMSDeliveryStatus.FAILED, 'SMS delivery failed.')
+    else:
+        set_delivery_status(delivery_id, SMSDeliveryStatus.SENT)
+
+
+def send_async(to: str, body: str) -> str:
+    """Queue a message and return its delivery id without waiting for the gateway."""
+    delivery_id = str(uuid.uuid4())
+    set_delivery_status(delivery_id, SMSDeliveryStatus.QUEUED)
+    if settings.SMS_DELIVERY_EAGER:
+        deliver(delivery_id, to, body)
+    else:
+        get_executor().submit(deliver, delivery_id, to, body)
+    return delivery_id
+
+
+async def adeliver(delivery_id: str, to: str, body: str) -> Dict[str, str]:
+    try:
+        await get_provider().asend(to, body)
+    except SMSDeliveryError as e:
+        status, message = SMSDeliveryStatus.FAILED, str(e)
+    except Exception:
+        logger.exception('sms delivery %s crashed', delivery_id)
+        status, message = SMSDeliveryStatus.FAILED, 'SMS delivery failed.'
+    else:
+        status, message = SMSDeliveryStatus.SENT, ''
+    await sync_to_async(set_delivery_status, thread_sensitive=False)(delivery_id, status, message)
+    return {'status': status.value, 'message': message}
+
+
+async def asend(to: str, body: str) -> Dict[str, str]:
+    """Deliver a message on the running event loop and return its delivery status once the gateway answered."""
+    delivery_id = str(uuid.uuid4())
+    return {'delivery_id': delivery_id, **await adeliver(delivery_id, to, body)}
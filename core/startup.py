@@ -0,0 +1,96 @@
+"""
+Cold start benchmark of a production worker.
+
+Every gunicorn worker, cron run and management command pays for the settings,
+apps, url modules, views and serializers before it serves anything. Each run is
+a fresh interpreter with DEBUG off, like a worker, that loads the wsgi
+application and every url pattern and reports the seconds it took, its peak
+resident memory and the gateway sdks that got imported on the way. The sdks
+are imported by the first request that uses them, not at startup.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from core.constants import (LAZY_IMPORT_MODULES, STARTUP_BASELINE_TOLERANCE, STARTUP_BUDGET_RSS_MB,
+                            STARTUP_BUDGET_SECONDS)
+
+WORKER_SCRIPT = 'from core.startup import load_worker; load_worker()'
+# settings only read with DEBUG off, placeholders let the worker start on machines with test keys only
+PRODUCTION_SECRETS = ('LIVE_RAZORPAY_KEY_ID', 'LIVE_RAZORPAY_KEY_SECRET')
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is carried over from the parent through fork and exec, VmHWM starts again with the new process
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # kilobytes on linux, bytes on macos
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def load_worker() -> None:
+    """Run in the fresh interpreter, prints the measurement as json."""
+    start = time.perf_counter()
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    get_wsgi_application()
+    get_resolver().url_patterns
+    seconds = time.perf_counter() - start
+
+    from django.conf import settings
+
+    print(json.dumps({
+        'seconds': seconds,
+        'rss_mb': peak_rss_mb(),
+        'lazy_modules_loaded': sorted(name for name in LAZY_IMPORT_MODULES if name in sys.modules),
+        'installed_apps': len(settings.INSTALLED_APPS),
+    }))
+
+
+def measure_worker(debug: bool = False) -> Dict:
+    env = {**dict.fromkeys(PRODUCTION_SECRETS, 'startup-benchmark'), **os.environ, 'DEBUG': str(debug)}
+    output = subprocess.run([sys.executable, '-c', WORKER_SCRIPT], env=env, capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_startup_benchmark(runs: int = 5, debug: bool = False) -> Dict:
+    """The median of a few cold starts, a single one is too noisy to compare."""
+    samples: List[Dict] = [measure_worker(debug=debug) for _ in range(runs)]
+    return {
+        'config': {'runs': runs, 'debug': debug, 'python': sys.version.split()[0]},
+        'seconds': round(statistics.median(sample['seconds'] for sample in samples), 3),
+        'rss_mb': round(statistics.median(sample['rss_mb'] for sample in samples), 1),
+        'lazy_modules_loaded': sorted({name for sample in samples for name in sample['lazy_modules_loaded']}),
+        'installed_apps': samples[0]['installed_apps'],
+    }
+
+
+def budget_errors(report: Dict, baseline: Optional[Dict] = None) -> List[str]:
+    """
+    The regressions of a report, against the absolute budgets and, when given,
+    STARTUP_BASELINE_TOLERANCE over a baseline report of the same machine.
+    """
+    errors = []
+    for key, verb, unit, budget in [('seconds', 'took', 's', STARTUP_BUDGET_SECONDS),
+                                    ('rss_mb', 'used', 'MB', STARTUP_BUDGET_RSS_MB)]:
+        if report[key] > budget:
+            errors.append(f'startup {verb} {report[key]}{unit}, the budget is {budget}{unit}')
+        if baseline is not None and report[key] > baseline[key] * (1 + STARTUP_BASELINE_TOLERANCE):
+            errors.append(f'startup {verb} {report[key]}{unit}, more than {STARTUP_BASELINE_TOLERANCE:.0%} over '
+                          f'the baseline of {baseline[key]}{unit}')
+    if report['lazy_modules_loaded'] and not report['config']['debug']:
+        errors.append(f'startup imported {", ".join(report["lazy_modules_loaded"])}')
+    return errors
@@ -0,0 +1,91 @@
+"""
+Test cases for the address writes and the address book sync.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.constants import BookingType, DEFAULT_SHOP, OrderStatus
+from core.models import Address, BookTimeslot, Order, Shop, Timeslot
+
+ADDRESS_URL = reverse('core:address-list')
+ADDRESS_SYNC_URL = reverse('core:address-sync')
+
+
+def address_payload(line, **kwargs):
+    return {'address_line_1': line, 'city': 'Chennai', 'country': 'India', 'type': 'PICKUP', **kwargs}
+
+
+class AddressAPITests(TestCase):
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_constraint_violations_are_validation_errors(self):
+        """Test duplicate addresses and a second primary of a type are rejected with a 400."""
+        self.client.post(ADDRESS_URL, address_payload('1 Main Road', is_primary=True))
+
+        res = self.client.post(ADDRESS_URL, address_payload('1 Main Road'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('same details', res.data[0])
+
+        res = self.client.post(ADDRESS_URL, address_payload('2 Beach Road', is_primary=True))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('primary address', res.data[0])
+        self.assertEqual(Address.objects.filter(user=self.user).count(), 1)
+
+    def test_sync_replaces_address_book_and_moves_primary(self):
+        """Test sync updates listed addresses, creates new ones, deletes the rest and moves the primary."""
+        home = self.client.post(ADDRESS_URL, address_payload('1 Main Road', is_primary=True)).data
+        self.client.post(ADDRESS_URL, address_payload('2 Beach Road'))
+
+        res = self.client.put(ADDRESS_SYNC_URL, [
+            address_payload('1 Main Road', id=home['id'], pincode=600017),
+            address_payload('3 Lake Road', is_primary=True),
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        addresses = {address.address_line_1: address for address in Address.objects.filter(user=self.user)}
+        self.assertEqual(set(addresses), {'1 Main Road', '3 Lake Road'})
+        self.assertEqual(addresses['1 Main Road'].pincode, 600017)
+        self.assertFalse(addresses['1 Main Road'].is_primary)
+        self.assertTrue(addresses['3 Lake Road'].is_primary)
+
+    def test_sync_is_atomic(self):
+        """Test a violating sync leaves the address book untouched."""
+        self.client.post(ADDRESS_URL, address_payload('1 Main Road'))
+
+        res = self.client.put(ADDRESS_SYNC_URL, [
+            address_payload('2 Beach Road', is_primary=True),
+            address_payload('3 Lake Road', is_primary=True),
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(Address.objects.values_list('address_line_1', flat=True)), ['1 Main Road'])
+
+    def test_sync_keeps_addresses_with_bookings(self):
+        """Test leaving out an address with an order is rejected and keeps the order."""
+        home = self.client.post(ADDRESS_URL, address_payload('1 Main Road')).data
+        shop = Shop.objects.create(**DEFAULT_SHOP, user=self.user)
+        start = datetime(2023, 6, 1, 4, 30, tzinfo=timezone.utc)
+        pickup, delivery = [BookTimeslot.objects.create(
+            time_slot=Timeslot.objects.create(start_datetime=start + timedelta(hours=index),
+                                              end_datetime=start + timedelta(hours=index + 1),
+                                              pickup_available_quota=1, delivery_available_quota=1, shop=shop),
+            user=self.user, address_id=home['id'], booking_type=booking_type.name)
+            for index, booking_type in enumerate(BookingType)]
+        order = Order.objects.create(user=self.user, pickup_booking=pickup, delivery_booking=delivery,
+                                     total_price=20, order_status=OrderStatus.PLACED.name)
+
+        res = self.client.put(ADDRESS_SYNC_URL, [address_payload('2 Beach Road')], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(home['id'], res.data['id'][0])
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+        self.assertEqual(list(Address.objects.values_list('address_line_1', flat=True)), ['1 Main Road'])
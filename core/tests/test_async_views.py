@@ -0,0 +1,147 @@
+"""
+Test cases for the async gateway views.
+"""
+import asyncio
+import time
+from unittest import mock
+from datetime import datetime, time as day_time, timedelta, timezone
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import sms
+from core.aio_http import AsyncRazorpayClient, close_session
+from core.models import Shop, Address, Timeslot, BookTimeslot, Order, RazorpayPayment
+from core.sms import FakeSMSProvider, SMSDeliveryError, TwilioSMSProvider
+
+ASYNC_SEND_OTP_URL = reverse('core:send-otp-async')
+ASYNC_PAYMENT_INFO_URL = reverse('core:payment-info-async')
+
+
+@override_settings(SMS_PROVIDER='core.sms.FakeSMSProvider', FAKE_SMS_FAILING_NUMBERS=['+918886568110'])
+class AsyncSendOTPTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        FakeSMSProvider.outbox.clear()
+
+    async def test_send_otp_awaits_delivery(self):
+        """Test the response reports the gateway outcome of the otp message."""
+        res = await self.async_client.post(ASYNC_SEND_OTP_URL, {'phone': '+918886568119'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['status'], 'sent')
+        self.assertEqual(len(FakeSMSProvider.outbox), 1)
+
+        res = await self.async_client.post(ASYNC_SEND_OTP_URL, {'phone': '+918886568110'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json()['message'], 'Invalid phone number')
+
+    @override_settings(FAKE_SMS_LATENCY=0.5)
+    async def test_gateway_waits_overlap(self):
+        """Test concurrent deliveries share the event loop instead of waiting in turn."""
+        started = time.monotonic()
+        deliveries = await asyncio.gather(*[sms.asend('+918886568119', 'Your OTP is 1234.') for _ in range(200)])
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertTrue(all(delivery['status'] == 'sent' for delivery in deliveries))
+
+
+class StalledSession:
+    """A session whose requests never answer."""
+
+    async def request(self, **kwargs):
+        await asyncio.sleep(60)
+
+
+@override_settings(ACCOUNT_SID='AC00000000000000000000000000000000', AUTH_TOKEN='token',
+                   TWILIO_PHONE_NUMBER='+15005550006', SMS_GATEWAY_TIMEOUT=0.1)
+class AsyncTwilioTests(TestCase):
+
+    @mock.patch('core.sms.get_session', return_value=StalledSession())
+    async def test_stalled_gateway_times_out(self, get_session):
+        """Test a twilio call that never answers fails after SMS_GATEWAY_TIMEOUT."""
+        started = time.monotonic()
+        with self.assertRaisesMessage(SMSDeliveryError, 'The SMS gateway timed out.'):
+            await TwilioSMSProvider().asend('+918886568119', 'Your OTP is 1234.')
+
+        self.assertLess(time.monotonic() - started, 5)
+
+
+class AsyncPaymentInfoTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        shop = Shop.objects.create(name='My Shop', user=self.user, opening_time=day_time(10), closing_time=day_time(16))
+        address = Address.objects.create(user=self.user, address_line_1='1 Main Road', city='Chennai',
+                                         country='India', type='PICKUP')
+        start = datetime.now(timezone.utc)
+        timeslot = Timeslot.objects.create(start_datetime=start, end_datetime=start + timedelta(hours=3),
+                                           pickup_available_quota=1, delivery_available_quota=1, shop=shop)
+        pickup, delivery = [BookTimeslot.objects.create(time_slot=timeslot, user=self.user, address=address,
+                                                        booking_type=booking_type)
+                            for booking_type in ('PICKUP', 'DELIVERY')]
+        self.order = Order.objects.create(user=self.user, pickup_booking=pickup, delivery_booking=delivery,
+                                          total_price=100, order_status='INITIATED')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    async def test_payment_info_creates_and_fetches_razorpay_order(self):
+        """Test the first call creates the razorpay order and the next one fetches it."""
+        async def create_order(request):
+            data = await request.json()
+            return web.json_response({'id': 'order_1', 'amount': data['amount'], 'status': 'created'})
+
+        async def fetch_order(request):
+            return web.json_response({'id': request.match_info['id'], 'status': 'attempted'})
+
+        app = web.Application()
+        app.router.add_post('/v1/orders', create_order)
+        app.router.add_get('/v1/orders/{id}', fetch_order)
+        server = TestServer(app)
+        await server.start_server()
+        base_url, AsyncRazorpayClient.base_url = AsyncRazorpayClient.base_url, str(server.make_url('/v1'))
+        try:
+            res = await self.async_client.get(ASYNC_PAYMENT_INFO_URL, {'order_id': self.order.id},
+                                              headers=self.headers)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json()['razorpay'], {'id': 'order_1', 'amount': 10000, 'status': 'created'})
+            self.assertTrue(await RazorpayPayment.objects.filter(razorpay_order_id='order_1').aexists())
+
+            res = await self.async_client.get(ASYNC_PAYMENT_INFO_URL, {'order_id': self.order.id},
+                                              headers=self.headers)
+            self.assertEqual(res.json()['razorpay']['status'], 'attempted')
+        finally:
+            AsyncRazorpayClient.base_url = base_url
+            await close_session()
+            await server.close()
+
+    @override_settings(ASYNC_HTTP_TIMEOUT=0.1)
+    async def test_payment_info_gateway_timeout_is_bad_gateway(self):
+        """Test a razorpay call running past the timeout answers 502."""
+        async def create_order(request):
+            await asyncio.sleep(1)
+            return web.json_response({'id': 'order_1'})
+
+        app = web.Application()
+        app.router.add_post('/v1/orders', create_order)
+        server = TestServer(app)
+        await server.start_server()
+        base_url, AsyncRazorpayClient.base_url = AsyncRazorpayClient.base_url, str(server.make_url('/v1'))
+        # the session keeps the timeout it was created with
+        await close_session()
+        try:
+            res = await self.async_client.get(ASYNC_PAYMENT_INFO_URL, {'order_id': self.order.id},
+                                              headers=self.headers)
+            self.assertEqual(res.status_code, status.HTTP_502_BAD_GATEWAY)
+        finally:
+            AsyncRazorpayClient.base_url = base_url
+            await close_session()
+            await server.close()
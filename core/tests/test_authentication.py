@@ -0,0 +1,47 @@
+"""
+Test cases for the cached jwt authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.authentication import CachedJWTAuthentication
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119', first_name='John')
+        token = RefreshToken.for_user(self.user).access_token
+        self.request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.authentication = CachedJWTAuthentication()
+
+    def test_principal_is_cached(self):
+        """Test the user row is read once and then served from the cache."""
+        with self.assertNumQueries(1):
+            self.authentication.authenticate(self.request)
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate(self.request)
+
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_deferred_fields_load_together(self):
+        """Test the remaining user fields are loaded in one query on first access."""
+        user, _ = self.authentication.authenticate(self.request)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, 'John')
+            self.assertEqual(user.cart_total_price, 0)
+
+    def test_deactivation_invalidates_principal(self):
+        """Test a deactivated user is rejected even when cached."""
+        self.authentication.authenticate(self.request)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(self.request)
@@ -0,0 +1,45 @@
+"""
+Test cases for the pre-rendered catalog lists.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Item
+
+ITEMS_URL = reverse('core:item-list')
+
+
+class CatalogListAPITests(TestCase):
+    """Test cases for the cached catalog responses."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(phone='+918886568119'))
+        Item.objects.create(name='Shirt', price=10)
+
+    def test_unchanged_catalog_is_not_modified(self):
+        """Test a cached list is served without queries and revalidates to 304."""
+        res = self.client.get(ITEMS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 1)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ITEMS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_catalog_write_changes_etag(self):
+        """Test an item write invalidates the cached list."""
+        etag = self.client.get(ITEMS_URL)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(name='Pant', price=14)
+
+        res = self.client.get(ITEMS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 2)
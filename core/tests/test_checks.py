@@ -0,0 +1,20 @@
+"""
+Test cases for the production system checks.
+"""
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_cache
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_fails_the_deploy_check(self):
+        """Test a locmem default cache is reported as an error."""
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                           'LOCATION': 'redis://redis:6379/0'}})
+    def test_shared_cache_passes_the_deploy_check(self):
+        """Test a redis default cache passes."""
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,113 @@
+"""
+Test cases for the compact columnar response format.
+"""
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.api.views.order_views import OrderListCreateAPIView
+from core.api.views.timeslot_views import TimeslotListAPIView
+from core.constants import BookingType, DEFAULT_SHOP, OrderStatus
+from core.models import Address, BookTimeslot, Item, Order, OrderDetails, Shop, Timeslot, WashCategory
+from core.renderers import COLUMNAR_MEDIA_TYPE, to_columnar
+
+
+def from_columnar(data):
+    if isinstance(data, list):
+        return [from_columnar(value) for value in data]
+    if not isinstance(data, dict):
+        return data
+    if data.keys() == {'count', 'constants', 'columns'}:
+        columns = {name: from_columnar(values) for name, values in data['columns'].items()}
+        return [{**data['constants'], **{name: values[index] for name, values in columns.items()}}
+                for index in range(data['count'])]
+    return {key: from_columnar(value) for key, value in data.items()}
+
+
+class ColumnarFormatTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.shop = Shop.objects.create(**DEFAULT_SHOP, user=self.user)
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self.timeslots = [Timeslot.objects.create(
+            start_datetime=start + timedelta(hours=6 * index), end_datetime=start + timedelta(hours=6 * index + 1),
+            pickup_available_quota=3, delivery_available_quota=index, shop=self.shop) for index in range(10)]
+
+    def test_lists_of_objects_are_encoded_column_wise(self):
+        """Test nested lists become columns, same values become constants and other values are kept."""
+        data = {'next': None, 'results': [
+            {'id': 1, 'shop': 7, 'tags': ['a'], 'details': [{'quantity': 1}, {'quantity': 2}]},
+            {'id': 2, 'shop': 7, 'tags': ['a'], 'details': []},
+            {'id': 3, 'shop': 7.0, 'tags': ['a'], 'details': [{'quantity': 1}]},
+        ]}
+
+        columnar = to_columnar(data)
+
+        results = columnar['results']
+        self.assertEqual(results['count'], 3)
+        self.assertEqual(results['constants'], {'tags': ['a']})
+        self.assertEqual(results['columns']['shop'], [7, 7, 7.0])
+        self.assertEqual(results['columns']['details'][0], {'count': 2, 'constants': {},
+                                                            'columns': {'quantity': [1, 2]}})
+        self.assertEqual(from_columnar(columnar), data)
+        self.assertEqual(to_columnar([1, 2]), [1, 2])
+
+    def test_timeslots_negotiate_the_format(self):
+        """Test the Accept header and the format parameter answer columnar, plain json stays the default."""
+        url = reverse('core:pickup-timeslot-list')
+        params = {'shop_id': self.shop.id}
+        plain = self.client.get(url, params)
+        by_header = self.client.get(url, params, HTTP_ACCEPT=COLUMNAR_MEDIA_TYPE)
+        by_parameter = self.client.get(url, {**params, 'format': 'columnar'})
+
+        self.assertEqual(plain['Content-Type'], 'application/json')
+        self.assertEqual(by_header['Content-Type'], COLUMNAR_MEDIA_TYPE)
+        self.assertEqual(by_header.content, by_parameter.content)
+        self.assertLess(len(by_header.content), len(plain.content) * 0.7)
+        days = by_header.json()['columns']['timeslots']
+        self.assertEqual(days[0]['constants']['shop'], self.shop.id)
+        self.assertEqual(from_columnar(by_header.json()), plain.json())
+
+    def test_orders_negotiate_the_format(self):
+        """Test the order list and its details answer columnar through the renderer, writes stay json."""
+        item = Item.objects.create(name='Shirt', price=10)
+        wash_category = WashCategory.objects.create(name='Normal wash', extra_per_item=0)
+        address = Address.objects.create(user=self.user, address_line_1='1 Main Road', city='Chennai',
+                                         country='India', type='HOME')
+        for index in range(2):
+            pickup, delivery = [BookTimeslot.objects.create(
+                time_slot=self.timeslots[2 * index + offset], user=self.user, address=address,
+                booking_type=booking_type.name) for offset, booking_type in enumerate(BookingType)]
+            order = Order.objects.create(user=self.user, pickup_booking=pickup, delivery_booking=delivery,
+                                         total_price=20, order_status=OrderStatus.PLACED.name)
+            OrderDetails.objects.create(order=order, product=item, wash_category=wash_category, product_price=10,
+                                        wash_category_price=0, quantity=2, subtotal_price=20)
+        url = reverse('core:order_obj-list-create')
+
+        plain = self.client.get(url)
+        columnar = self.client.get(url, HTTP_ACCEPT=COLUMNAR_MEDIA_TYPE)
+        write = self.client.post(url, {}, HTTP_ACCEPT=COLUMNAR_MEDIA_TYPE)
+
+        self.assertEqual(columnar['Content-Type'], COLUMNAR_MEDIA_TYPE)
+        self.assertEqual(from_columnar(columnar.json()), plain.json())
+        self.assertEqual(write.status_code, 406)
+
+    def test_lists_vary_on_accept(self):
+        """Test the list responses name Accept in Vary, also when the view has a single default renderer."""
+        routes = [(TimeslotListAPIView, reverse('core:pickup-timeslot-list'), {'shop_id': self.shop.id}),
+                  (OrderListCreateAPIView, reverse('core:order_obj-list-create'), {})]
+        for view, url, params in routes:
+            with mock.patch.object(view, 'renderer_classes', [JSONRenderer]):
+                res = self.client.get(url, params)
+
+            self.assertIn('Accept', res['Vary'])
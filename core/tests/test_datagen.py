@@ -0,0 +1,72 @@
+"""
+Test cases for the synthetic data generator.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+from core.datagen import (RowWriter, SYNTHETIC_PHONE_PREFIX, SYNTHETIC_PREFIX, copy_text, generate,
+                          synthetic_data_exists)
+from core.models import BookTimeslot, Item, Order, Shop, Timeslot, User, WashCategory
+
+START_DATE = date(2026, 1, 15)
+
+
+class SyntheticDataTests(TestCase):
+
+    def setUp(self) -> None:
+        for name, price in [('Shirt', 10), ('Pant', 12), ('Saree', 40)]:
+            Item.objects.create(name=name, price=price)
+        WashCategory.objects.create(name='Normal wash', extra_per_item=0)
+        WashCategory.objects.create(name='Dry wash', extra_per_item=5)
+
+    def generate(self, seed: int = 3):
+        return generate(users=60, shops=2, days=20, slot_capacity=4, seed=seed, start_date=START_DATE,
+                        writer=RowWriter(copy=False))
+
+    def delete_synthetic_data(self):
+        User.objects.filter(phone__startswith=SYNTHETIC_PHONE_PREFIX).delete()
+        Shop.objects.filter(name__startswith=SYNTHETIC_PREFIX).delete()
+
+    def test_rows_are_consistent(self):
+        """Test the counted rows are written, orders add up and the quotas are left by the bookings."""
+        counts = self.generate()
+
+        self.assertTrue(synthetic_data_exists())
+        self.assertEqual(counts['User'], 60)
+        self.assertEqual(counts['Order'], Order.objects.count())
+        self.assertEqual(counts['BookTimeslot'], 2 * counts['Order'])
+        for order in Order.objects.annotate(details_total=Sum('order_details__subtotal_price'))[:20]:
+            self.assertEqual(order.total_price, order.details_total)
+            self.assertLess(order.pickup_booking.time_slot.start_datetime,
+                            order.delivery_booking.time_slot.start_datetime)
+        for timeslot in Timeslot.objects.annotate(pickups=Count('booktimeslot')).filter(pickups__gt=0)[:20]:
+            pickups = BookTimeslot.objects.filter(time_slot=timeslot, booking_type='PICKUP').count()
+            self.assertEqual(timeslot.pickup_available_quota, max(4 - pickups, 0))
+
+    def test_same_seed_gives_same_rows(self):
+        """Test the generated rows only depend on the seed."""
+        self.generate()
+        orders = list(Order.objects.order_by('id').values_list('id', 'total_price', 'user__phone'))
+        self.delete_synthetic_data()
+
+        self.generate()
+
+        self.assertEqual(list(Order.objects.order_by('id').values_list('id', 'total_price', 'user__phone')), orders)
+
+    def test_copy_text_escapes_values(self):
+        """Test rows are formatted for COPY with nulls, booleans and escaped text."""
+        user = User(phone='+919000000001', first_name='Tab\tand\nnew line', email=None, is_staff=True,
+                    preferences={'language': 'Tamil'}, cart_total_price=Decimal('12.50'))
+
+        row = copy_text(User, [user]).rstrip('\n').split('\t')
+
+        fields = [field.attname for field in User._meta.concrete_fields]
+        self.assertEqual(row[fields.index('first_name')], 'Tab\\tand\\nnew line')
+        self.assertEqual(row[fields.index('email')], '\\N')
+        self.assertEqual(row[fields.index('is_staff')], 't')
+        self.assertEqual(row[fields.index('preferences')], '{"language": "Tamil"}')
+        self.assertEqual(row[fields.index('cart_total_price')], '12.50')
+        self.assertEqual(row[fields.index('id')], str(user.id))
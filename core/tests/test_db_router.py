@@ -0,0 +1,74 @@
+"""
+Test cases for the read replica routing.
+
+The replica tests need a second database, a replica_0 alias mirroring the
+default one in tests, e.g. from DB_REPLICA_URLS pointing at a local Postgres.
+"""
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db_router import sticky_cache_key
+from core.models import Item
+
+ITEMS_URL = reverse('core:item-list')
+REPLICA = 'replica_0' if 'replica_0' in settings.DATABASES else None
+
+
+class PrimaryOnlyTests(TestCase):
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_stay_on_primary_without_replicas(self):
+        """Test safe requests query the primary when no replica is configured."""
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(phone='+918886568119'))
+        Item.objects.create(name='Shirt', price=10)
+
+        with CaptureQueriesContext(connections['default']) as queries:
+            res = self.client.get(ITEMS_URL, {'name': 'Shirt'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+
+@skipUnless(REPLICA, 'no read replica configured')
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', REPLICA} if REPLICA else {'default'}
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_items(self):
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            res = self.client.get(ITEMS_URL, {'name': 'Shirt'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return queries
+
+    def test_safe_reads_use_replica(self):
+        """Test a list request is served from the replica."""
+        self.assertEqual(len(self.get_items()), 1)
+
+    def test_writes_stay_on_primary_and_stick(self):
+        """Test a write goes to the primary and keeps the user's reads there for a while."""
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            res = self.client.post(ITEMS_URL, {'name': 'Shirt', 'price': 10})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(queries), 0)
+        self.assertTrue(cache.get(sticky_cache_key(self.user.pk)))
+        self.assertEqual(len(self.get_items()), 0)
+
+        cache.delete(sticky_cache_key(self.user.pk))
+        self.assertEqual(len(self.get_items()), 1)
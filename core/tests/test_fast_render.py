@@ -0,0 +1,80 @@
+"""
+Test cases for the fast path json rendering of the hot list routes.
+"""
+import itertools
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.api.serializers.timeslot_serializers import BookingSerializer, GroupedTimeslotListSerializer
+from core.constants import BookingType, DEFAULT_SHOP
+from core.fast_render import render_json, serialize_rows
+from core.models import Address, BookTimeslot, Shop, Timeslot
+
+
+class AddressRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Address
+        fields = ['id', 'user', 'address_line_1', 'address_line_2', 'pincode', 'type', 'is_primary', 'created_at']
+
+
+class AddressLocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Address
+        fields = ['id', 'latitude']
+
+
+class FastRenderTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.shop = Shop.objects.create(**DEFAULT_SHOP, user=self.user)
+        self.address = Address.objects.create(user=self.user, address_line_1='1 Main Road\u2028Flat 2',
+                                              address_line_2='Café', city='Chennai', country='India', type='HOME')
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=123456) + timedelta(hours=1)
+        self.timeslots = [Timeslot.objects.create(
+            start_datetime=start + timedelta(hours=5 * index), end_datetime=start + timedelta(hours=5 * index + 1),
+            pickup_available_quota=index % 3, delivery_available_quota=4, shop=self.shop) for index in range(12)]
+        for timeslot, booking_type in [(self.timeslots[1], BookingType.PICKUP),
+                                       (self.timeslots[9], BookingType.DELIVERY)]:
+            BookTimeslot.objects.create(time_slot=timeslot, user=self.user, address=self.address,
+                                        booking_type=booking_type.name)
+
+    def test_grouped_timeslots_match_the_serializer(self):
+        """Test the pickup timeslots are the same bytes the grouped serializer renders."""
+        res = self.client.get(reverse('core:pickup-timeslot-list'), {'shop_id': self.shop.id})
+
+        # the timeslots the user has booked are left out
+        timeslots = Timeslot.objects.filter(shop=self.shop).exclude(booktimeslot__user=self.user)
+        grouped = [{'date': date, 'timeslots': list(group)}
+                   for date, group in itertools.groupby(timeslots, key=lambda t: t.start_datetime.date())]
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertGreater(len(grouped), 1)
+        self.assertEqual(res.content, JSONRenderer().render(GroupedTimeslotListSerializer(grouped).data))
+
+    def test_bookings_match_the_serializer(self):
+        """Test the filtered booking list is the same bytes the booking serializer renders."""
+        res = self.client.get(reverse('core:list-bookings'), {'booking_type': BookingType.PICKUP.name})
+
+        bookings = BookTimeslot.objects.filter(booking_type=BookingType.PICKUP.name)
+        self.assertEqual(len(res.json()), 1)
+        self.assertEqual(res.content, JSONRenderer().render(BookingSerializer(bookings, many=True).data))
+
+    def test_text_is_escaped_like_the_renderer(self):
+        """Test unicode, line terminators and uuids are rendered like JSONRenderer, floats stay on the serializer."""
+        addresses = Address.objects.all()
+
+        self.assertEqual(render_json(serialize_rows(addresses, AddressRowSerializer)),
+                         JSONRenderer().render(AddressRowSerializer(addresses, many=True).data))
+        with self.assertRaises(ImproperlyConfigured):
+            serialize_rows(addresses, AddressLocationSerializer)
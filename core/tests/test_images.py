@@ -0,0 +1,74 @@
+"""
+Test cases for the item image variants.
+"""
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.api.serializers.core_serializers import ItemSerializer
+from core.constants import IMAGE_VARIANTS
+from core.models import Item
+
+
+def create_png(size=(1024, 800)) -> SimpleUploadedFile:
+    content = BytesIO()
+    Image.new('RGBA', size, (255, 0, 0, 128)).save(content, 'PNG')
+    return SimpleUploadedFile('shirt.png', content.getvalue(), content_type='image/png')
+
+
+class ItemImageVariantTests(TestCase):
+
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=self.media_root,
+        )
+        self.settings_override.enable()
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_upload_generates_variants(self):
+        """Test every variant is written next to the original within its bounding box."""
+        item = Item.objects.create(name='Shirt', image=create_png())
+
+        item.refresh_from_db()
+        self.assertEqual(set(item.image_variants), set(IMAGE_VARIANTS))
+        for variant, (width, height) in IMAGE_VARIANTS.items():
+            with item.image.storage.open(item.image_variants[variant]) as variant_file:
+                image = Image.open(variant_file)
+                self.assertLessEqual(image.width, width)
+                self.assertLessEqual(image.height, height)
+
+        data = ItemSerializer(item).data
+        self.assertTrue(data['image_variants']['thumb'].endswith('images/shirt_thumb.webp'))
+
+    def test_backfill_command(self):
+        """Test the command generates variants for items created without them."""
+        item = Item.objects.create(name='Shirt', image=create_png())
+        Item.objects.filter(pk=item.pk).update(image_variants={})
+
+        call_command('generate_item_images', stdout=StringIO())
+
+        item.refresh_from_db()
+        self.assertEqual(set(item.image_variants), set(IMAGE_VARIANTS))
+
+    def test_new_image_with_the_same_name_regenerates_variants(self):
+        """Test an image overwritten under the same name, as on S3, gets new variants on the next save."""
+        item = Item.objects.create(name='Shirt', image=create_png())
+        storage, name = item.image.storage, item.image.name
+        storage.delete(name)
+        self.assertEqual(storage.save(name, create_png((200, 100))), name)
+
+        item.save()
+
+        item.refresh_from_db()
+        with storage.open(item.image_variants['detail']) as variant_file:
+            self.assertEqual(Image.open(variant_file).size, (200, 100))
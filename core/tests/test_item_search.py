@@ -0,0 +1,58 @@
+"""
+Test cases for the item search filters.
+"""
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Item
+
+ITEMS_URL = reverse('core:item-list')
+
+
+class ItemSearchAPITests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(phone='+918886568119'))
+        Item.objects.create(name='Shirt', extras={'fabric': 'cotton'})
+        Item.objects.create(name='T-shirt')
+        Item.objects.create(name='Silk Vesti', extras={'fabric': 'silk', 'dry_clean': True})
+
+    def test_search_by_name(self):
+        """Test the search matches names case insensitively anywhere in the name."""
+        res = self.client.get(ITEMS_URL, {'search': 'shir'})
+
+        self.assertEqual({item['name'] for item in res.json()}, {'Shirt', 'T-shirt'})
+
+    def test_search_by_prefix(self):
+        """Test the prefix matches the start of names case insensitively."""
+        res = self.client.get(ITEMS_URL, {'prefix': 'shir'})
+
+        self.assertEqual([item['name'] for item in res.json()], ['Shirt'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'extras containment needs Postgres jsonb')
+    def test_filter_by_extras_values(self):
+        """Test items can be filtered by the key:value pairs their extras contain, values parsed as json."""
+        res = self.client.get(ITEMS_URL, {'extras': 'fabric:silk,dry_clean:true'})
+        self.assertEqual([item['name'] for item in res.json()], ['Silk Vesti'])
+
+        res = self.client.get(ITEMS_URL, {'extras': 'fabric:cotton'})
+        self.assertEqual([item['name'] for item in res.json()], ['Shirt'])
+
+    def test_filter_by_extras_keys(self):
+        """Test items can be filtered by the keys of their extras."""
+        res = self.client.get(ITEMS_URL, {'has_extras': 'fabric,dry_clean'})
+
+        self.assertEqual([item['name'] for item in res.json()], ['Silk Vesti'])
+
+    def test_invalid_extras_filter(self):
+        """Test malformed extras pairs are rejected."""
+        res = self.client.get(ITEMS_URL, {'extras': 'fabric'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,46 @@
+"""
+Test cases for the load test harness.
+"""
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from core.constants import OrderStatus
+from core.loadtest import (OWNER_PHONE, RouteStats, SeedError, VirtualUser, delete_loadtest_data, run_flow,
+                           run_load_test, seed, user_phone)
+from core.models import Order, User
+
+
+class LoadTestTests(TransactionTestCase):
+    """The pool threads use their own connections, so the rows have to be committed."""
+
+    def test_flow_completes_through_fake_gateways(self):
+        """Test every virtual user places and pays an order and each route is reported."""
+        data = seed(users=2, shops=1, items=3, wash_categories=2, slot_capacity=10)
+
+        report = run_load_test(users=2, concurrency=1, data=data)
+
+        self.assertEqual(report['flows'], {'completed': 2, 'failed': 0, 'errors': []})
+        self.assertEqual(Order.objects.filter(order_status=OrderStatus.PLACED.name).count(), 2)
+        self.assertEqual(report['routes']['book-timeslot']['requests'], 4)
+        self.assertGreater(report['routes']['cart_to_order']['mean_queries'], 0)
+
+        delete_loadtest_data()
+        self.assertFalse(User.objects.filter(phone=OWNER_PHONE).exists())
+
+    def test_unexpected_exception_is_a_failed_flow(self):
+        """Test an exception other than FlowError is recorded with its type instead of raised."""
+        with mock.patch.object(VirtualUser, 'run', side_effect=KeyError('razorpay')):
+            error = run_flow('+917990000001', {}, RouteStats(), cart_items=1)
+
+        self.assertEqual(error, "KeyError: 'razorpay'")
+
+    def test_real_users_are_never_touched(self):
+        """Test seeding refuses a phone number of a user it did not seed and cleanup leaves that user alone."""
+        customer = User.objects.create_user(phone=user_phone(1))
+
+        with self.assertRaises(SeedError):
+            seed(users=2, shops=1, items=1, wash_categories=1, slot_capacity=1)
+        delete_loadtest_data()
+
+        self.assertTrue(User.objects.filter(pk=customer.pk).exists())
@@ -0,0 +1,82 @@
+"""
+Test cases for the request metrics and their scrape endpoint.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import RedisMetricsStore, gateway_timer, get_store
+from core.models import Item
+
+METRICS_URL = reverse('core:metrics')
+ITEMS_URL = reverse('core:item-list')
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsAPITests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        get_store().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(phone='+918886568119'))
+        Item.objects.create(name='Shirt', price=10)
+
+    def scrape(self) -> str:
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.content.decode()
+
+    def test_requests_are_recorded_by_route(self):
+        """Test latency, query count and cache lookups are exposed under the url pattern."""
+        self.client.get(ITEMS_URL)
+        self.client.get(ITEMS_URL)
+
+        metrics = self.scrape()
+
+        labels = 'route="core/api/items/$",method="GET",status="200"'
+        self.assertIn('# TYPE http_request_duration_seconds histogram', metrics)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', metrics)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', metrics)
+        self.assertIn(f'http_db_queries_total{{{labels}}} 1', metrics)
+        self.assertIn('cache_lookups_total{cache="catalog",result="hit"} 1', metrics)
+        self.assertIn('cache_lookups_total{cache="catalog",result="miss"} 1', metrics)
+
+    def test_gateway_calls_are_timed(self):
+        """Test outbound gateway calls are recorded per gateway."""
+        with gateway_timer('twilio'):
+            pass
+
+        self.assertIn('gateway_request_duration_seconds_count{gateway="twilio"} 1', self.scrape())
+
+    def test_token_is_required(self):
+        """Test the scrape endpoint rejects requests without the bearer token."""
+        self.assertEqual(self.client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_endpoint_without_token_is_only_open_in_debug(self):
+        """Test the scrape endpoint is closed without a token unless DEBUG is on."""
+        self.assertEqual(self.client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+        with self.settings(DEBUG=True):
+            res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_REDIS_URL='redis://localhost:1/0', METRICS_FLUSH_SECONDS=0)
+    def test_flush_keeps_samples_when_redis_is_unreachable(self):
+        """Test a failed flush is logged and its samples are kept for the next one."""
+        store = RedisMetricsStore()
+
+        with self.assertLogs('core.metrics', 'WARNING'):
+            store.add({'cache_lookups_total': 1})
+            store.add({'cache_lookups_total': 2})
+
+        self.assertEqual(store.samples, {'cache_lookups_total': 3})
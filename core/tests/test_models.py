@@ -25,6 +25,13 @@ class ModelTests(TestCase):
         # Validate password
         self.assertTrue(user.check_password(password))
 
+    def test_create_user_normalizes_phone(self):
+        """Test the phone number is stored in E.164 form."""
+        user = get_user_model().objects.create_user(phone='+91 88865 68119')
+
+        self.assertEqual(user.phone, '+918886568119')
+        self.assertEqual(get_user_model().objects.create_user(phone='+918886568119').pk, user.pk)
+
     def test_new_user_without_phone_raises_error(self):
         """Test that creating a user without a phone number raises a ValueError."""
         with self.assertRaises(ValueError):
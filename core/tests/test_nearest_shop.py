@@ -0,0 +1,46 @@
+"""
+Test cases for the nearest shop lookup.
+"""
+from datetime import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.geo import encode_geohash
+from core.models import Shop
+
+NEAREST_SHOP_URL = reverse('core:shop-nearest')
+
+
+class NearestShopAPITests(TestCase):
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for name, latitude, longitude in [('T Nagar', 13.0418, 80.2341), ('Adyar', 13.0012, 80.2565),
+                                          ('Tambaram', 12.9249, 80.1000), ('Bengaluru', 12.9716, 77.5946)]:
+            Shop.objects.create(name=name, user=self.user, opening_time=time(10), closing_time=time(19),
+                                latitude=latitude, longitude=longitude)
+
+    def test_geohash_encoding(self):
+        """Test the geohash matches the reference encoding."""
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(Shop.objects.get(name='Adyar').geohash, encode_geohash(13.0012, 80.2565))
+
+    def test_nearest_shops_within_radius(self):
+        """Test only shops inside the radius are listed, nearest first."""
+        res = self.client.get(NEAREST_SHOP_URL, {'latitude': 13.035, 'longitude': 80.23, 'radius_km': 10})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([shop['name'] for shop in res.data], ['T Nagar', 'Adyar'])
+        self.assertLess(res.data[0]['distance_km'], res.data[1]['distance_km'])
+
+    def test_location_is_required(self):
+        """Test a point or an address is required."""
+        res = self.client.get(NEAREST_SHOP_URL, {'latitude': 13.0067})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
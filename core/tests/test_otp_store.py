@@ -0,0 +1,88 @@
+"""
+Test cases for the otp stores.
+"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.constants import OTPCheckResult, OTP_MAX_ATTEMPTS
+from core.models import OTPToken
+from core.otp_store import DatabaseOTPStore, CacheOTPStore, check_otp
+
+PHONE = '+918886568119'
+
+
+class OTPStoreTestsMixin:
+    store_class = None
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.store = self.store_class()
+
+    def test_otp_is_consumed_once(self):
+        """Test a matching otp verifies only the first time."""
+        self.store.issue(PHONE, '1234')
+
+        self.assertEqual(self.store.consume(PHONE, '1234'), OTPCheckResult.VERIFIED)
+        self.assertNotEqual(self.store.consume(PHONE, '1234'), OTPCheckResult.VERIFIED)
+
+    def test_mismatching_otp(self):
+        """Test a wrong otp is rejected and the right one still works."""
+        self.store.issue(PHONE, '1234')
+
+        self.assertEqual(self.store.consume(PHONE, '4321'), OTPCheckResult.MISMATCH)
+        self.assertEqual(self.store.consume(PHONE, '1234'), OTPCheckResult.VERIFIED)
+
+    def test_attempts_are_bounded(self):
+        """Test the phone is locked after too many attempts, even for a new otp."""
+        self.store.issue(PHONE, '1234')
+        for _ in range(OTP_MAX_ATTEMPTS):
+            self.store.consume(PHONE, '0000')
+        self.store.issue(PHONE, '5678')
+
+        self.assertEqual(self.store.consume(PHONE, '5678'), OTPCheckResult.LOCKED)
+
+
+class DatabaseOTPStoreTests(OTPStoreTestsMixin, TestCase):
+    store_class = DatabaseOTPStore
+
+
+class CacheOTPStoreTests(OTPStoreTestsMixin, TestCase):
+    store_class = CacheOTPStore
+
+
+@override_settings(OTP_BYPASS_CODE='0000')
+class OTPBypassTests(TestCase):
+    """Test cases for the development bypass code."""
+
+    def test_bypass_code_is_checked_after_the_lockout(self):
+        """Test the bypass code verifies any phone until the phone is locked."""
+        self.assertEqual(check_otp(PHONE, '0000'), OTPCheckResult.VERIFIED)
+
+        DatabaseOTPStore().issue(PHONE, '1234')
+        for _ in range(OTP_MAX_ATTEMPTS):
+            check_otp(PHONE, '4321')
+
+        self.assertEqual(check_otp(PHONE, '0000'), OTPCheckResult.LOCKED)
+
+
+@override_settings(OTP_BYPASS_CODE=None, SMS_PROVIDER='core.sms.FakeSMSProvider', SMS_DELIVERY_EAGER=True)
+class OTPLoginAPITests(TestCase):
+    """Test cases for logging in with a stored otp."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_login_with_issued_otp(self):
+        """Test the otp sent to a phone logs it in once."""
+        self.client.post(reverse('core:send-otp'), {'phone': PHONE})
+        otp = OTPToken.objects.get(phone=PHONE).otp
+
+        res = self.client.post(reverse('core:otp-login'), {'phone': '+91 88865 68119', 'otp': otp})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('access', res.data)
+
+        res = self.client.post(reverse('core:otp-login'), {'phone': PHONE, 'otp': otp})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,90 @@
+"""
+Test cases for the item popularity counters.
+"""
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.constants import AddressType, BookingType, OrderStatus
+from core.cron import flush_popularity_counters
+from core.models import (Item, WashCategory, Order, OrderDetails, PopularityDelta, Shop, Timeslot,
+                         BookTimeslot, Address)
+from core.razorpay_gateway import sign_payment
+from core.signals import payment_success_signal
+
+
+class PopularityCounterTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.shirt = Item.objects.create(name='Shirt', price=10)
+        self.pant = Item.objects.create(name='Pant', price=14)
+        self.wash = WashCategory.objects.create(name='Normal wash')
+
+    def create_order(self, quantities, order_status: OrderStatus = OrderStatus.PLACED) -> Order:
+        shop = Shop.objects.create(name='Shop', user=self.user, opening_time=time(10), closing_time=time(19))
+        address = Address.objects.create(user=self.user, address_line_1='1', city='Chennai', country='India',
+                                         type=AddressType.PICKUP_AND_DELIVERY.name)
+        bookings = [BookTimeslot.objects.create(
+            time_slot=Timeslot.objects.create(start_datetime=timezone.now(),
+                                              end_datetime=timezone.now() + timedelta(hours=3),
+                                              pickup_available_quota=1, delivery_available_quota=1, shop=shop),
+            user=self.user, address=address, booking_type=booking_type.name
+        ) for booking_type in BookingType]
+        order = Order.objects.create(user=self.user, pickup_booking=bookings[0], delivery_booking=bookings[1],
+                                     total_price=20, order_status=order_status.name)
+        for item, quantity in quantities:
+            OrderDetails.objects.create(order=order, product=item, wash_category=self.wash, product_price=0,
+                                        wash_category_price=0, quantity=quantity, subtotal_price=0)
+        return order
+
+    def test_placed_order_is_counted_once(self):
+        """Test order quantities reach the counters only through the flush, exactly once."""
+        payment_success_signal.send(sender=self.__class__, order=self.create_order([(self.shirt, 2), (self.pant, 3)]))
+        self.shirt.refresh_from_db()
+        self.assertEqual(self.shirt.count, 0)
+
+        self.assertEqual(flush_popularity_counters(), 2)
+        self.assertEqual(flush_popularity_counters(), 0)
+
+        self.shirt.refresh_from_db()
+        self.pant.refresh_from_db()
+        self.wash.refresh_from_db()
+        self.assertEqual((self.shirt.count, self.pant.count, self.wash.count), (2, 3, 5))
+        self.assertFalse(PopularityDelta.objects.exists())
+
+    def test_popular_ordering(self):
+        """Test ?ordering=popular lists the most ordered items first."""
+        PopularityDelta.objects.create(item=self.pant, wash_category=self.wash, quantity=4)
+        flush_popularity_counters()
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(reverse('core:item-list'), {'ordering': 'popular'})
+
+        self.assertEqual([item['name'] for item in res.json()], ['Pant', 'Shirt'])
+
+    @override_settings(RAZORPAY_CLIENT='core.razorpay_gateway.FakeRazorpayClient')
+    def test_repeated_payment_status_is_counted_once(self):
+        """Test a retried payment status post places the order and counts its items only once."""
+        order = self.create_order([(self.shirt, 2)], order_status=OrderStatus.INITIATED)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payment = client.get(reverse('core:payment-list-create'), {'order_id': order.id}).data
+        razorpay_order_id = payment['razorpay']['id']
+
+        for _ in range(2):
+            res = client.post(reverse('core:payment-retrieve-update-destroy'), {
+                'payment_id': payment['payment']['id'], 'razorpay_order_id': razorpay_order_id,
+                'razorpay_payment_id': 'pay_1', 'razorpay_signature': sign_payment(razorpay_order_id, 'pay_1')})
+            self.assertEqual(res.data['order_status'], OrderStatus.PLACED.name)
+        flush_popularity_counters()
+
+        self.shirt.refresh_from_db()
+        self.assertEqual(self.shirt.count, 2)
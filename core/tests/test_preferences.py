@@ -0,0 +1,64 @@
+"""
+Test cases for the user preferences.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.constants import DEFAULT_PREFERENCES
+
+PREFERENCES_URL = reverse('core:user-preferences')
+
+
+class PreferencesTests(TestCase):
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_new_users_get_default_preferences(self):
+        """Test a new user is saved with the default preferences."""
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.preferences, DEFAULT_PREFERENCES)
+
+    def test_partial_update(self):
+        """Test a patch only changes the given keys and rejects unknown values."""
+        res = self.client.patch(PREFERENCES_URL, {'dark_mode': 'Yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.preferences, {**DEFAULT_PREFERENCES, 'dark_mode': 'Yes'})
+
+        res = self.client.patch(PREFERENCES_URL, {'notifications': 'Maybe'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backfill_and_notification_recipients(self):
+        """Test the backfill converts other_details and the converted users are found by notifications."""
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            preferences=None, other_details=str({**DEFAULT_PREFERENCES, 'notifications': 'Off'}))
+        other = get_user_model().objects.create_user(phone='+918886568120')
+        get_user_model().objects.filter(pk=other.pk).update(preferences=None, other_details='not a dict')
+
+        call_command('backfill_preferences', batch_size=1, stdout=StringIO())
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.preferences['notifications'], 'Off')
+        self.assertEqual(list(get_user_model().objects.with_notifications()), [other])
+
+    def test_deprecated_other_details(self):
+        """Test user_details still renders other_details from the preferences and a patch of it replaces them."""
+        res = self.client.get(reverse('core:user-details'))
+        self.assertEqual(res.json()['other_details'], str(DEFAULT_PREFERENCES))
+
+        res = self.client.patch(reverse('core:user-details'), {'other_details': str({'dark_mode': 'Yes'})})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.preferences, {**DEFAULT_PREFERENCES, 'dark_mode': 'Yes'})
+        self.assertEqual(res.data['other_details'], str(self.user.preferences))
@@ -0,0 +1,440 @@
+"""
+Query budgets of every API route.
+
+Each route is called once with 1x and once with 50x of the rows it reads, in a
+rolled back savepoint per run. It must stay within its declared budget and run
+the same number of queries at both sizes, so a new N+1 fails here.
+"""
+from datetime import time as day_time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import otp_store, urls
+from core.aio_http import AsyncRazorpayClient
+from core.api.views.payment_views import RazorpayPaymentInfoView
+from core.constants import BookingType, OrderStatus
+from core.cron import update_timeslots
+from core.models import (Item, WashCategory, Address, Cart, Shop, Timeslot, BookTimeslot, Order, OrderDetails,
+                         Review)
+from core.razorpay_gateway import sign_payment
+
+SCALES = (1, 50)
+
+# (url name, method): most queries the route may run, at any data size
+BUDGETS = {
+    ('api-root', 'GET'): 0,
+    ('item-list', 'GET'): 1,
+    ('item-list', 'POST'): 2,
+    ('item-detail', 'DELETE'): 5,
+    ('item-detail', 'PATCH'): 2,
+    ('washcategory-list', 'GET'): 1,
+    ('washcategory-list', 'POST'): 2,
+    ('washcategory-detail', 'DELETE'): 5,
+    ('address-list', 'GET'): 1,
+    ('address-list', 'POST'): 3,
+    ('address-detail', 'PATCH'): 4,
+    ('address-sync', 'PUT'): 9,
+    ('shop-list', 'GET'): 1,
+    ('shop-list', 'POST'): 4,
+    ('shop-detail', 'PATCH'): 3,
+    ('shop-nearest', 'GET'): 1,
+    ('shop-timeslot-load', 'GET'): 2,
+    ('review-list', 'GET'): 2,
+    ('review-list', 'POST'): 9,
+    ('review-detail', 'PATCH'): 5,
+    ('token_refresh', 'POST'): 0,
+    ('send-otp', 'POST'): 6,
+    ('send-otp-status', 'GET'): 0,
+    ('send-otp-async', 'POST'): 6,
+    ('otp-login', 'POST'): 4,
+    ('verify-otp', 'POST'): 3,
+    ('user-details', 'GET'): 2,
+    ('user-details', 'PATCH'): 2,
+    ('user-preferences', 'GET'): 1,
+    ('user-preferences', 'PATCH'): 4,
+    ('user-item', 'GET'): 1,
+    ('user-item', 'POST'): 9,
+    ('user-item-detail', 'PATCH'): 6,
+    ('update-timeslots', 'PUT'): 2,
+    ('pickup-timeslot-list', 'GET'): 2,
+    ('delivery-timeslot-list', 'GET'): 4,
+    ('book-timeslot', 'POST'): 5,
+    ('list-bookings', 'GET'): 1,
+    ('payment-list-create', 'GET'): 10,
+    ('payment-info-async', 'GET'): 11,
+    ('payment-retrieve-update-destroy', 'POST'): 9,
+    ('order_obj-list-create', 'GET'): 2,
+    ('order_obj-list-create', 'POST'): 10,
+    ('order_obj-retrieve-update-destroy', 'GET'): 2,
+    ('order_obj-retrieve-update-destroy', 'PATCH'): 7,
+    ('cart_to_order', 'POST'): 11,
+    ('metrics', 'GET'): 0,
+}
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+@override_settings(SMS_PROVIDER='core.sms.FakeSMSProvider', SMS_DELIVERY_EAGER=True,
+                   RAZORPAY_CLIENT='core.razorpay_gateway.FakeRazorpayClient',
+                   THROTTLE_STORE='core.throttling.UnlimitedStore', METRICS_TOKEN='secret')
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(phone='+918886568119')
+        cls.items = [Item.objects.create(name=f'Item {index}', price=10) for index in range(3)]
+        cls.category = WashCategory.objects.create(name='Normal wash', extra_per_item=2)
+        cls.shop = Shop.objects.create(name='My Shop', user=cls.user, opening_time=day_time(10),
+                                       closing_time=day_time(19), latitude=13.08, longitude=80.27)
+        update_timeslots(cls.shop.id)
+        cls.timeslots = list(Timeslot.objects.filter(shop=cls.shop).order_by('start_datetime'))
+        cls.address = Address.objects.create(user=cls.user, address_line_1='1 Main Road', city='Chennai',
+                                             country='India', type='PICKUP_AND_DELIVERY')
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        # loaded back so the decimal fields are what a request would see
+        self.client.force_authenticate(get_user_model().objects.get(pk=self.user.pk))
+
+    def book(self, timeslot, booking_type=BookingType.PICKUP):
+        return BookTimeslot.objects.create(time_slot=timeslot, user=self.user, address=self.address,
+                                           booking_type=booking_type.name)
+
+    def make_order(self, details: int = 1, order_status=OrderStatus.INITIATED) -> Order:
+        order = Order.objects.create(user=self.user, pickup_booking=self.book(self.timeslots[0]),
+                                     delivery_booking=self.book(self.timeslots[-1], BookingType.DELIVERY),
+                                     total_price=12 * details, order_status=order_status.name)
+        OrderDetails.objects.bulk_create([OrderDetails(
+            order=order, product=self.items[index % 3], wash_category=self.category, product_price=10,
+            wash_category_price=2, quantity=1, subtotal_price=12) for index in range(details)])
+        return order
+
+    def fill_cart(self, count: int):
+        items = Item.objects.bulk_create([Item(name=f'Cart item {index}', price=10) for index in range(count)])
+        return Cart.objects.bulk_create([Cart(user=self.user, item=item, wash_category=self.category, price=12)
+                                         for item in items])
+
+    def add_addresses(self, count: int):
+        return Address.objects.bulk_create([Address(
+            user=self.user, address_line_1=f'{index} Side Road', city='Chennai', country='India', type='PICKUP')
+            for index in range(count)])
+
+    def add_shops(self, count: int):
+        return Shop.objects.bulk_create([Shop(
+            name=f'Shop {index}', user=self.user, opening_time=day_time(10), closing_time=day_time(19),
+            latitude=13.08, longitude=80.27, geohash=self.shop.geohash) for index in range(count)])
+
+    def add_reviews(self, count: int):
+        users = get_user_model().objects.bulk_create([get_user_model()(phone=f'+9188865{index:05d}')
+                                                      for index in range(count)])
+        return Review.objects.bulk_create([Review(shop=self.shop, user=user, rating=4, comment='Good')
+                                           for user in users])
+
+    def async_request(self, method: str, *args, **kwargs):
+        async def request():
+            return await getattr(self.async_client, method)(*args, **kwargs)
+        return async_to_sync(request)()
+
+    # route_<url name>_<method> fills `scale` rows the route reads, returns the request and its expected status
+
+    def route_api_root_get(self, scale):
+        self.add_shops(scale)
+        return lambda: self.client.get(reverse('core:api-root')), status.HTTP_200_OK
+
+    def route_item_list_get(self, scale):
+        Item.objects.bulk_create([Item(name=f'Extra item {index}', price=10) for index in range(scale)])
+        return lambda: self.client.get(reverse('core:item-list')), status.HTTP_200_OK
+
+    def route_item_list_post(self, scale):
+        self.fill_cart(scale)
+        return lambda: self.client.post(reverse('core:item-list'), {'name': 'Pant', 'price': 12}), \
+            status.HTTP_201_CREATED
+
+    def route_item_detail_delete(self, scale):
+        item = Item.objects.create(name='Pant', price=12)
+        categories = WashCategory.objects.bulk_create([WashCategory(name=f'Wash {index}') for index in range(scale)])
+        Cart.objects.bulk_create([Cart(user=self.user, item=item, wash_category=category, price=12)
+                                  for category in categories])
+        return lambda: self.client.delete(reverse('core:item-detail', args=[item.id])), \
+            status.HTTP_204_NO_CONTENT
+
+    def route_item_detail_patch(self, scale):
+        self.fill_cart(scale)
+        return lambda: self.client.patch(reverse('core:item-detail', args=[self.items[0].id]), {'price': 11}), \
+            status.HTTP_200_OK
+
+    def route_washcategory_list_get(self, scale):
+        WashCategory.objects.bulk_create([WashCategory(name=f'Wash {index}') for index in range(scale)])
+        return lambda: self.client.get(reverse('core:washcategory-list')), status.HTTP_200_OK
+
+    def route_washcategory_list_post(self, scale):
+        WashCategory.objects.bulk_create([WashCategory(name=f'Wash {index}') for index in range(scale)])
+        return lambda: self.client.post(reverse('core:washcategory-list'), {'name': 'Dry wash'}), \
+            status.HTTP_201_CREATED
+
+    def route_washcategory_detail_delete(self, scale):
+        category = WashCategory.objects.create(name='Dry wash')
+        items = Item.objects.bulk_create([Item(name=f'Cart item {index}', price=10) for index in range(scale)])
+        Cart.objects.bulk_create([Cart(user=self.user, item=item, wash_category=category, price=12)
+                                  for item in items])
+        return lambda: self.client.delete(reverse('core:washcategory-detail', args=[category.id])), \
+            status.HTTP_204_NO_CONTENT
+
+    def route_address_list_get(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.get(reverse('core:address-list')), status.HTTP_200_OK
+
+    def route_address_list_post(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.post(reverse('core:address-list'), {
+            'address_line_1': '2 Main Road', 'city': 'Chennai', 'country': 'India', 'type': 'DELIVERY',
+            'is_primary': True}), status.HTTP_201_CREATED
+
+    def route_address_detail_patch(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.patch(reverse('core:address-detail', args=[self.address.id]),
+                                         {'city': 'Madurai'}), status.HTTP_200_OK
+
+    def route_address_sync_put(self, scale):
+        addresses = self.add_addresses(scale)
+        data = [{'id': str(address.id), 'address_line_1': address.address_line_1, 'city': 'Madurai',
+                 'country': 'India', 'type': 'PICKUP'} for address in addresses]
+        return lambda: self.client.put(reverse('core:address-sync'), data, format='json'), status.HTTP_200_OK
+
+    def route_shop_list_get(self, scale):
+        self.add_shops(scale)
+        return lambda: self.client.get(reverse('core:shop-list')), status.HTTP_200_OK
+
+    def route_shop_list_post(self, scale):
+        self.add_shops(scale)
+        return lambda: self.client.post(reverse('core:shop-list'), {
+            'name': 'New Shop', 'opening_time': '10:00', 'closing_time': '19:00'}), status.HTTP_201_CREATED
+
+    def route_shop_detail_patch(self, scale):
+        self.add_reviews(scale)
+        return lambda: self.client.patch(reverse('core:shop-detail', args=[self.shop.id]), {'name': 'Our Shop'}), \
+            status.HTTP_200_OK
+
+    def route_shop_nearest_get(self, scale):
+        self.add_shops(scale)
+        return lambda: self.client.get(reverse('core:shop-nearest'), {'latitude': 13.08, 'longitude': 80.27}), \
+            status.HTTP_200_OK
+
+    def route_shop_timeslot_load_get(self, scale):
+        for index in range(scale):
+            self.book(self.timeslots[index % len(self.timeslots)])
+        return lambda: self.client.get(reverse('core:shop-timeslot-load', args=[self.shop.id])), \
+            status.HTTP_200_OK
+
+    def route_review_list_get(self, scale):
+        self.add_reviews(scale)
+        return lambda: self.client.get(reverse('core:review-list'), {'shop': self.shop.id}), \
+            status.HTTP_200_OK
+
+    def route_review_list_post(self, scale):
+        self.add_reviews(scale)
+        return lambda: self.client.post(reverse('core:review-list'), {
+            'shop': self.shop.id, 'rating': 5, 'comment': 'Great'}), status.HTTP_201_CREATED
+
+    def route_review_detail_patch(self, scale):
+        self.add_reviews(scale)
+        review = Review.objects.create(shop=self.shop, user=self.user, rating=3, comment='Fine')
+        return lambda: self.client.patch(reverse('core:review-detail', args=[review.id]),
+                                         {'comment': 'Fine enough'}), status.HTTP_200_OK
+
+    def route_token_refresh_post(self, scale):
+        self.add_addresses(scale)
+        refresh = str(RefreshToken.for_user(self.user))
+        return lambda: self.client.post(reverse('core:token_refresh'), {'refresh': refresh}), status.HTTP_200_OK
+
+    def route_send_otp_post(self, scale):
+        self.add_reviews(scale)
+        return lambda: self.client.post(reverse('core:send-otp'), {'phone': '+918886568120'}), \
+            status.HTTP_202_ACCEPTED
+
+    def route_send_otp_status_get(self, scale):
+        delivery_id = self.client.post(reverse('core:send-otp'), {'phone': '+918886568120'}).data['delivery_id']
+        return lambda: self.client.get(reverse('core:send-otp-status', args=[delivery_id])), status.HTTP_200_OK
+
+    def route_send_otp_async_post(self, scale):
+        self.add_reviews(scale)
+        return lambda: self.async_request('post', reverse('core:send-otp-async'), {'phone': '+918886568120'}), \
+            status.HTTP_200_OK
+
+    def route_otp_login_post(self, scale):
+        self.add_reviews(scale)
+        otp_store.issue_otp(self.user.phone, '1234')
+        return lambda: self.client.post(reverse('core:otp-login'), {'phone': self.user.phone, 'otp': '1234'}), \
+            status.HTTP_200_OK
+
+    def route_verify_otp_post(self, scale):
+        self.add_addresses(scale)
+        otp_store.issue_otp(self.user.phone, '1234')
+        return lambda: self.client.post(reverse('core:verify-otp'), {'otp': '1234'}), status.HTTP_200_OK
+
+    def route_user_details_get(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.get(reverse('core:user-details')), status.HTTP_200_OK
+
+    def route_user_details_patch(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.patch(reverse('core:user-details'), {'first_name': 'Ravi'}), status.HTTP_200_OK
+
+    def route_user_preferences_get(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.get(reverse('core:user-preferences')), status.HTTP_200_OK
+
+    def route_user_preferences_patch(self, scale):
+        self.add_addresses(scale)
+        return lambda: self.client.patch(reverse('core:user-preferences'), {'notifications': 'Off'}), \
+            status.HTTP_200_OK
+
+    def route_user_item_get(self, scale):
+        self.fill_cart(scale)
+        return lambda: self.client.get(reverse('core:user-item')), status.HTTP_200_OK
+
+    def route_user_item_post(self, scale):
+        self.fill_cart(scale)
+        return lambda: self.client.post(reverse('core:user-item'), {
+            'item': self.items[0].id, 'wash_category': self.category.id, 'quantity': 2}), status.HTTP_201_CREATED
+
+    def route_user_item_detail_patch(self, scale):
+        cart = self.fill_cart(scale)
+        return lambda: self.client.patch(reverse('core:user-item-detail', args=[cart[0].id]), {'quantity': 3}), \
+            status.HTTP_200_OK
+
+    def route_update_timeslots_put(self, scale):
+        # the bookings grow, the shops do not: the timeslot insert is split in batches by the backend
+        for index in range(scale):
+            self.book(self.timeslots[index % len(self.timeslots)])
+        return lambda: self.client.put(reverse('core:update-timeslots')), status.HTTP_200_OK
+
+    def route_pickup_timeslot_list_get(self, scale):
+        for index in range(scale):
+            self.book(self.timeslots[index % len(self.timeslots)])
+        return lambda: self.client.get(reverse('core:pickup-timeslot-list'), {
+            'shop_id': self.shop.id, 'is_available': 'true'}), status.HTTP_200_OK
+
+    def route_delivery_timeslot_list_get(self, scale):
+        for index in range(scale):
+            self.book(self.timeslots[index % len(self.timeslots)], BookingType.DELIVERY)
+        pickup = self.book(self.timeslots[0])
+        return lambda: self.client.get(reverse('core:delivery-timeslot-list'), {
+            'pickup_booking_id': pickup.id, 'is_available': 'true'}), status.HTTP_200_OK
+
+    def route_book_timeslot_post(self, scale):
+        for index in range(scale):
+            self.book(self.timeslots[1 + index % (len(self.timeslots) - 1)])
+        return lambda: self.client.post(reverse('core:book-timeslot'), {
+            'time_slot': self.timeslots[0].id, 'address': self.address.id, 'booking_type': 'PICKUP'}), \
+            status.HTTP_201_CREATED
+
+    def route_list_bookings_get(self, scale):
+        for index in range(scale):
+            self.book(self.timeslots[index % len(self.timeslots)])
+        return lambda: self.client.get(reverse('core:list-bookings')), status.HTTP_200_OK
+
+    def route_payment_list_create_get(self, scale):
+        order = self.make_order(details=scale)
+        return lambda: self.client.get(reverse('core:payment-list-create'), {'order_id': order.id}), \
+            status.HTTP_200_OK
+
+    def route_payment_info_async_get(self, scale):
+        order = self.make_order(details=scale)
+
+        async def create_order(client, data):
+            return RazorpayPaymentInfoView.get_client().order.create(data)
+
+        def request():
+            with mock.patch.object(AsyncRazorpayClient, 'create_order', create_order):
+                return self.async_request(
+                    'get', reverse('core:payment-info-async'), {'order_id': order.id},
+                    headers={'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'})
+        return request, status.HTTP_200_OK
+
+    def route_payment_retrieve_update_destroy_post(self, scale):
+        order = self.make_order(details=scale)
+        payment = self.client.get(reverse('core:payment-list-create'), {'order_id': order.id}).data
+        razorpay_order_id = payment['razorpay']['id']
+        return lambda: self.client.post(reverse('core:payment-retrieve-update-destroy'), {
+            'payment_id': payment['payment']['id'], 'razorpay_order_id': razorpay_order_id,
+            'razorpay_payment_id': 'pay_1', 'razorpay_signature': sign_payment(razorpay_order_id, 'pay_1')}), \
+            status.HTTP_200_OK
+
+    def route_order_obj_list_create_get(self, scale):
+        for _ in range(scale):
+            self.make_order(details=2)
+        return lambda: self.client.get(reverse('core:order_obj-list-create')), status.HTTP_200_OK
+
+    def route_order_obj_list_create_post(self, scale):
+        for _ in range(scale):
+            self.make_order(details=2)
+        pickup, delivery = self.book(self.timeslots[1]), self.book(self.timeslots[2], BookingType.DELIVERY)
+        return lambda: self.client.post(reverse('core:order_obj-list-create'), {
+            'pickup_booking': pickup.id, 'delivery_booking': delivery.id,
+            'order_details': [{'product': self.items[0].id, 'wash_category': self.category.id, 'quantity': 2}]},
+            format='json'), status.HTTP_201_CREATED
+
+    def route_order_obj_retrieve_update_destroy_get(self, scale):
+        order = self.make_order(details=scale)
+        return lambda: self.client.get(reverse('core:order_obj-retrieve-update-destroy', args=[order.id])), \
+            status.HTTP_200_OK
+
+    def route_order_obj_retrieve_update_destroy_patch(self, scale):
+        order = self.make_order(details=scale)
+        pickup = self.book(self.timeslots[1])
+        return lambda: self.client.patch(reverse('core:order_obj-retrieve-update-destroy', args=[order.id]),
+                                         {'pickup_booking': pickup.id}, format='json'), status.HTTP_200_OK
+
+    def route_cart_to_order_post(self, scale):
+        self.fill_cart(scale)
+        pickup, delivery = self.book(self.timeslots[1]), self.book(self.timeslots[2], BookingType.DELIVERY)
+        return lambda: self.client.post(reverse('core:cart_to_order'), {
+            'pickup_booking': pickup.id, 'delivery_booking': delivery.id}), status.HTTP_201_CREATED
+
+    def route_metrics_get(self, scale):
+        self.add_shops(scale)
+        return lambda: self.client.get(reverse('core:metrics'), HTTP_AUTHORIZATION='Bearer secret'), \
+            status.HTTP_200_OK
+
+    def count_queries(self, route, method, scale) -> int:
+        name = f'route_{route}_{method}'.replace('-', '_').lower()
+        with transaction.atomic():
+            cache.clear()
+            request, expected_status = getattr(self, name)(scale)
+            with CaptureQueriesContext(connection) as queries:
+                res = request()
+            self.assertEqual(res.status_code, expected_status, res.content[:500])
+            transaction.set_rollback(True)
+        return len(queries)
+
+    def test_every_route_has_a_budget(self):
+        """Test no route of core/urls.py is left without a declared query budget."""
+        budgeted = {route for route, _ in BUDGETS}
+
+        self.assertEqual(set(route_names(urls.urlpatterns)) - budgeted, set())
+
+    def test_queries_stay_within_budget_and_flat(self):
+        """Test every route keeps to its budget and runs as many queries at 50x data as at 1x."""
+        for (route, method), budget in BUDGETS.items():
+            with self.subTest(route=route, method=method):
+                counts = [self.count_queries(route, method, scale) for scale in SCALES]
+
+                self.assertLessEqual(counts[0], budget)
+                self.assertEqual(counts[0], counts[-1], f'queries grow with the data: {counts}')
@@ -0,0 +1,45 @@
+"""
+Test cases for the otp delivery.
+"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.sms import FakeSMSProvider
+
+SEND_OTP_URL = reverse('core:send-otp')
+
+
+@override_settings(SMS_PROVIDER='core.sms.FakeSMSProvider', SMS_DELIVERY_EAGER=True,
+                   FAKE_SMS_FAILING_NUMBERS=['+918886568110'])
+class SendOTPAPITests(TestCase):
+    """Test cases for queued otp delivery."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        cache.clear()
+        FakeSMSProvider.outbox.clear()
+
+    def test_send_otp_is_accepted_and_delivered(self):
+        """Test the otp is queued with 202 and the status reports it as sent."""
+        res = self.client.post(SEND_OTP_URL, {'phone': '+918886568119'})
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(FakeSMSProvider.outbox), 1)
+
+        res = self.client.get(reverse('core:send-otp-status', args=[res.data['delivery_id']]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], 'sent')
+
+    def test_failed_delivery_is_reported_by_status(self):
+        """Test a gateway rejection is visible through the status lookup."""
+        res = self.client.post(SEND_OTP_URL, {'phone': '+918886568110'})
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        res = self.client.get(reverse('core:send-otp-status', args=[res.data['delivery_id']]))
+
+        self.assertEqual(res.data['status'], 'failed')
+        self.assertEqual(res.data['message'], 'Invalid phone number')
@@ -0,0 +1,73 @@
+"""
+Test cases for the shop reviews and rating aggregates.
+"""
+from datetime import time
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.api.serializers.shop_serializers import ShopReviewSerializer
+from core.api.views.shop_views import ShopReviewView
+from core.models import Review, Shop
+
+REVIEW_URL = reverse('core:review-list')
+
+
+class ShopReviewAPITests(TestCase):
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.shop = Shop.objects.create(name='My Shop', user=self.user, opening_time=time(10), closing_time=time(19))
+
+    def get_rating(self):
+        return self.client.get(reverse('core:shop-list')).data[0]['rating']
+
+    def test_reviews_update_rating_aggregates(self):
+        """Test create, update and delete keep count, average and histogram in step."""
+        self.assertIsNone(self.get_rating())
+        self.client.post(REVIEW_URL, {'shop': self.shop.id, 'rating': 5, 'comment': 'Great'})
+        res = self.client.post(REVIEW_URL, {'shop': self.shop.id, 'rating': 2, 'comment': 'Late'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        rating = self.get_rating()
+        self.assertEqual((rating['count'], rating['average']), (2, 3.5))
+
+        self.client.patch(reverse('core:review-detail', args=[res.data['id']]), {'rating': 4})
+        rating = self.get_rating()
+        self.assertEqual(rating['histogram'], {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        self.client.delete(reverse('core:review-detail', args=[res.data['id']]))
+        rating = self.get_rating()
+        self.assertEqual((rating['count'], rating['average']), (1, 5.0))
+
+    def test_stale_review_writes_apply_their_delta_once(self):
+        """Test writes holding an outdated review take the rating from the row, a second delete changes nothing."""
+        res = self.client.post(REVIEW_URL, {'shop': self.shop.id, 'rating': 2, 'comment': 'Late'})
+        stale = Review.objects.get(pk=res.data['id'])
+        self.client.patch(reverse('core:review-detail', args=[stale.pk]), {'rating': 4})
+
+        serializer = ShopReviewSerializer(stale, data={'rating': 3}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        ShopReviewView().perform_update(serializer)
+        self.assertEqual(self.get_rating()['histogram'], {1: 0, 2: 0, 3: 1, 4: 0, 5: 0})
+
+        self.client.delete(reverse('core:review-detail', args=[stale.pk]))
+        with self.assertRaises(Http404):
+            ShopReviewView().perform_destroy(stale)
+        rating = self.get_rating()
+        self.assertEqual((rating['count'], rating['histogram'][3]), (0, 0))
+
+    def test_shop_list_has_no_aggregate_query(self):
+        """Test listing shops with ratings is a single query."""
+        self.client.post(REVIEW_URL, {'shop': self.shop.id, 'rating': 5, 'comment': 'Great'})
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('core:shop-list'))
+
+        self.assertEqual(res.data[0]['rating']['count'], 1)
@@ -0,0 +1,16 @@
+"""
+Test cases for the worker cold start budget.
+"""
+from django.test import SimpleTestCase
+
+from core.startup import run_startup_benchmark
+
+
+class StartupBudgetTests(SimpleTestCase):
+
+    def test_worker_starts_without_lazy_sdks(self):
+        """Test a production worker loads every url without importing the gateway sdks."""
+        # the time and memory budgets are checked by the startup_benchmark command, not here
+        report = run_startup_benchmark(runs=1)
+
+        self.assertEqual(report['lazy_modules_loaded'], [])
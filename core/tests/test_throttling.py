@@ -0,0 +1,52 @@
+"""
+Test cases for the gcra throttles.
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.constants import THROTTLE_PRUNE_HITS
+from core.throttling import LocalGCRAStore
+
+
+class LocalGCRAStoreTests(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.store = LocalGCRAStore()
+
+    @mock.patch('core.throttling.time.monotonic', return_value=100.0)
+    def test_burst_up_to_rate_is_allowed(self, monotonic):
+        """Test 10/second allows a burst of 10 and asks the 11th to wait one interval."""
+        for _ in range(10):
+            self.assertEqual(self.store.hit('key', 0.1, 1), 0)
+
+        self.assertAlmostEqual(self.store.hit('key', 0.1, 1), 0.1)
+
+    @mock.patch('core.throttling.time.monotonic')
+    def test_capacity_recovers_over_time(self, monotonic):
+        """Test a denied key is allowed again after waiting."""
+        monotonic.return_value = 100.0
+        for _ in range(10):
+            self.store.hit('key', 0.1, 1)
+        wait = self.store.hit('key', 0.1, 1)
+
+        monotonic.return_value = 100.0 + wait
+
+        self.assertEqual(self.store.hit('key', 0.1, 1), 0)
+        self.assertEqual(self.store.hit('other', 0.1, 1), 0)
+
+    @mock.patch('core.throttling.time.monotonic')
+    def test_expired_keys_are_pruned(self, monotonic):
+        """Test keys whose arrival time has passed are dropped and the others keep their arrival time."""
+        monotonic.return_value = 100.0
+        for _ in range(10):
+            self.store.hit('busy', 0.1, 1)
+        for index in range(THROTTLE_PRUNE_HITS - 20):
+            self.store.hit(f'client-{index}', 0.1, 1)
+
+        monotonic.return_value = 100.5
+        for _ in range(10):
+            self.store.hit('late', 0.1, 1)
+
+        self.assertEqual(set(self.store.arrival_times), {'busy', 'late'})
+        self.assertAlmostEqual(self.store.arrival_times['busy'], 101.0)
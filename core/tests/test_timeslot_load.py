@@ -0,0 +1,82 @@
+"""
+Test cases for the timeslot load analytics.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.constants import BookingType
+from core.models import Shop, Timeslot, BookTimeslot, Address
+from core.timeslot_load import get_timeslot_load
+
+DAY = date(2023, 6, 1)
+
+
+class TimeslotLoadTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.shop = Shop.objects.create(name='My Shop', user=self.user, opening_time=time(10), closing_time=time(16),
+                                        max_user_limit_per_time_slot=4)
+        self.address = Address.objects.create(user=self.user, address_line_1='1 Main Road', city='Chennai',
+                                              country='India', type='HOME')
+        # 10:00 and 13:00 in the shop's +5:30
+        start = datetime(2023, 6, 1, 4, 30, tzinfo=timezone.utc)
+        self.timeslots = [Timeslot.objects.create(
+            start_datetime=start + timedelta(hours=3 * index), end_datetime=start + timedelta(hours=3 * (index + 1)),
+            pickup_available_quota=4, delivery_available_quota=4, shop=self.shop) for index in range(2)]
+
+    def book(self, timeslot, booking_type, count=1):
+        for _ in range(count):
+            BookTimeslot.objects.create(time_slot=timeslot, user=self.user, address=self.address,
+                                        booking_type=booking_type.name)
+
+    def test_utilisation_per_slot_and_day(self):
+        """Test bookings are counted per slot and rolled up per local day against the limit."""
+        self.book(self.timeslots[0], BookingType.PICKUP, 3)
+        self.book(self.timeslots[1], BookingType.DELIVERY)
+
+        res = self.client.get(reverse('core:shop-timeslot-load', args=[self.shop.id]),
+                              {'start_date': DAY, 'end_date': DAY + timedelta(days=1)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        day, next_day = res.data
+        self.assertEqual((day['capacity'], day['pickup_booked'], day['delivery_booked']), (8, 3, 1))
+        self.assertEqual(day['pickup_utilisation'], 0.375)
+        self.assertEqual([slot['pickup_utilisation'] for slot in day['timeslots']], [0.75, 0])
+        self.assertEqual((next_day['capacity'], next_day['timeslots']), (0, []))
+
+    def test_closed_days_are_cached(self):
+        """Test a closed day is served from the cache and an open day is queried again."""
+        now = datetime(2023, 6, 1, 12, tzinfo=timezone.utc)
+        with self.assertNumQueries(1):
+            get_timeslot_load(self.shop, DAY, DAY, now=now + timedelta(days=1))
+        self.book(self.timeslots[0], BookingType.PICKUP)
+
+        with self.assertNumQueries(0):
+            day, = get_timeslot_load(self.shop, DAY, DAY, now=now + timedelta(days=1))
+        self.assertEqual(day['pickup_booked'], 0)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            day, = get_timeslot_load(self.shop, DAY, DAY, now=now)
+        with self.assertNumQueries(1):
+            get_timeslot_load(self.shop, DAY, DAY, now=now)
+        self.assertEqual(day['pickup_booked'], 1)
+
+    def test_only_owner_sees_load(self):
+        """Test other users get a 404 for the shop."""
+        other = get_user_model().objects.create_user(phone='+918886568120')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(reverse('core:shop-timeslot-load', args=[self.shop.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -6,6 +6,9 @@ from unittest import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase as DjangoTestCase
 from django.urls import reverse
 
 
@@ -25,3 +28,33 @@ class PublicUserAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
 
+
+class CachedProfileAPITests(DjangoTestCase):
+    """Test cases for the cached user details read."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(phone='+918886568119')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeat_reads_are_cached(self):
+        """Test a repeat read does no query and a matching ETag gets a 304."""
+        res = self.client.get(reverse(USER_URL))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse(USER_URL), HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_address_write_invalidates_profile(self):
+        """Test a new address is part of the next read."""
+        etag = self.client.get(reverse(USER_URL))['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('core:address-list'), {
+                'address_line_1': '1 Main Road', 'city': 'Chennai', 'country': 'India', 'type': 'PICKUP'})
+
+        res = self.client.get(reverse(USER_URL), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['address']), 1)
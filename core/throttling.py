@@ -0,0 +1,127 @@
+"""
+Throttles backed by a GCRA (generic cell rate algorithm) counter.
+
+DRF's SimpleRateThrottle keeps the full list of request timestamps per key and
+rewrites it on every request. GCRA only keeps the theoretical arrival time of
+the next request, so every hit is a single atomic operation on the store.
+"""
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+from core.constants import THROTTLE_PRUNE_HITS
+
+
+class LocalGCRAStore:
+    """
+    Per process store, the stand-in for tests and single worker runs. Keys whose
+    arrival time has passed are swept every THROTTLE_PRUNE_HITS hits, they
+    count the same as missing ones, so the store only holds the active keys.
+    """
+
+    def __init__(self):
+        self.arrival_times = {}
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def prune(self, now: float) -> None:
+        self.arrival_times = {key: arrival_time for key, arrival_time in self.arrival_times.items()
+                              if arrival_time > now}
+
+    def hit(self, key: str, interval: float, period: float) -> float:
+        """Count a request and return 0 if it is allowed, else the seconds to wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.hits += 1
+            if self.hits % THROTTLE_PRUNE_HITS == 0:
+                self.prune(now)
+            arrival_time = max(self.arrival_times.get(key, now), now) + interval
+            wait = arrival_time - now - period
+            if wait > 0:
+                return wait
+            self.arrival_times[key] = arrival_time
+            return 0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.arrival_times.clear()
+
+
+class UnlimitedStore:
+    """Allows every request, for load tests that measure the views rather than the limits."""
+
+    def hit(self, key: str, interval: float, period: float) -> float:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+
+class RedisGCRAStore:
+    """Store shared by every worker, each hit is one EVALSHA using the redis clock."""
+    script = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) * 1000000 + tonumber(now[2])
+    local interval = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    local arrival_time = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now) + interval
+    local wait = arrival_time - now - period
+    if wait > 0 then
+        return wait
+    end
+    redis.call('SET', KEYS[1], arrival_time, 'PX', math.ceil((arrival_time - now) / 1000))
+    return 0
+    """
+
+    def __init__(self):
+        self.client = redis.Redis.from_url(settings.THROTTLE_REDIS_URL)
+        self.gcra = self.client.register_script(self.script)
+
+    def hit(self, key: str, interval: float, period: float) -> float:
+        # the script works in integer microseconds
+        wait = self.gcra(keys=[key], args=[int(interval * 1000000), int(period * 1000000)])
+        return int(wait) / 1000000
+
+    def clear(self) -> None:
+        pass
+
+
+_stores = {}
+
+
+def get_store():
+    """Return the configured throttle store, one instance per process."""
+    path = settings.THROTTLE_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+class GCRAThrottleMixin:
+    """Replaces the timestamp history of SimpleRateThrottle with a GCRA counter."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.wait_seconds = get_store().hit(self.key, self.duration / self.num_requests, self.duration)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserRateThrottle(GCRAThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class AnonRateThrottle(GCRAThrottleMixin, throttling.AnonRateThrottle):
+    pass
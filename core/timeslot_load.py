@@ -0,0 +1,90 @@
+"""
+Pickup and delivery utilisation of a shop's timeslots.
+
+Bookings of the whole range are counted in one query grouped by timeslot over
+the (shop, start_datetime) index. Days are in the shop's local time, and a day
+whose last slot has ended can no longer change, so closed days are cached.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from core.constants import BookingType, TIMESLOT_LOAD_CACHE_TIMEOUT
+from core.metrics import record_cache_lookup
+from core.models import Shop, Timeslot
+
+
+def day_cache_key(shop: Shop, day: date) -> str:
+    # the limit is part of the key, changing it regenerates the shop's timeslots
+    return f'timeslot_load:{shop.id}:{shop.max_user_limit_per_time_slot}:{day.isoformat()}'
+
+
+def local_day_start(shop: Shop, day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc) - timedelta(minutes=shop.time_zone_offset)
+
+
+def utilisation(booked: int, capacity: int) -> float:
+    return round(booked / capacity, 4) if capacity else 0.0
+
+
+def summarize_day(day: date, timeslots: List[Dict], limit: int) -> Dict:
+    pickup_booked = sum(timeslot['pickup_booked'] for timeslot in timeslots)
+    delivery_booked = sum(timeslot['delivery_booked'] for timeslot in timeslots)
+    capacity = limit * len(timeslots)
+    return {
+        'date': day,
+        'capacity': capacity,
+        'pickup_booked': pickup_booked,
+        'delivery_booked': delivery_booked,
+        'pickup_utilisation': utilisation(pickup_booked, capacity),
+        'delivery_utilisation': utilisation(delivery_booked, capacity),
+        'timeslots': timeslots,
+    }
+
+
+def query_days(shop: Shop, start_date: date, end_date: date) -> Dict[date, List[Dict]]:
+    limit = shop.max_user_limit_per_time_slot
+    timeslots = Timeslot.objects.filter(
+        shop_id=shop.id,
+        start_datetime__gte=local_day_start(shop, start_date),
+        start_datetime__lt=local_day_start(shop, end_date + timedelta(days=1)),
+    ).annotate(
+        pickup_booked=Count('booktimeslot', filter=Q(booktimeslot__booking_type=BookingType.PICKUP.name)),
+        delivery_booked=Count('booktimeslot', filter=Q(booktimeslot__booking_type=BookingType.DELIVERY.name)),
+    ).order_by('start_datetime').values('id', 'start_datetime', 'end_datetime', 'pickup_booked', 'delivery_booked')
+
+    days = {}
+    for timeslot in timeslots:
+        timeslot['capacity'] = limit
+        timeslot['pickup_utilisation'] = utilisation(timeslot['pickup_booked'], limit)
+        timeslot['delivery_utilisation'] = utilisation(timeslot['delivery_booked'], limit)
+        day = (timeslot['start_datetime'] + timedelta(minutes=shop.time_zone_offset)).date()
+        days.setdefault(day, []).append(timeslot)
+    return days
+
+
+def get_timeslot_load(shop: Shop, start_date: date, end_date: date, now: datetime = None) -> List[Dict]:
+    now = now or datetime.now(timezone.utc)
+    limit = shop.max_user_limit_per_time_slot
+    dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    closed_dates = [day for day in dates if local_day_start(shop, day + timedelta(days=1)) <= now]
+
+    keys = {day: day_cache_key(shop, day) for day in closed_dates}
+    cached = cache.get_many(keys.values())
+    summaries = {day: cached[key] for day, key in keys.items() if key in cached}
+    record_cache_lookup('timeslot_load', True, len(summaries))
+    record_cache_lookup('timeslot_load', False, len(keys) - len(summaries))
+
+    missing = [day for day in dates if day not in summaries]
+    if missing:
+        days = query_days(shop, missing[0], missing[-1])
+        closed_summaries = {}
+        for day in missing:
+            summaries[day] = summarize_day(day, days.get(day, []), limit)
+            if day in keys:
+                closed_summaries[keys[day]] = summaries[day]
+        cache.set_many(closed_summaries, timeout=TIMESLOT_LOAD_CACHE_TIMEOUT)
+
+    return [summaries[day] for day in dates]
@@ -0,0 +1,56 @@
+"""
+Gunicorn settings of the production server started by start.sh.
+
+The app is imported once in the master (preload_app) so the forked workers
+share its memory copy-on-write, and every worker is replaced after
+max_requests (plus jitter) to cap slow leaks. Migrations and seeding are not
+run here, see release.sh. More than one worker needs a shared cache, the
+master refuses to start them on a per process one.
+"""
+import math
+import os
+
+
+def available_cores() -> int:
+    """Cores this process may use, honouring the cpu affinity and a cgroup v2 cpu quota."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != 'max':
+            cores = min(cores, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cores, 1)
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+# gthread serves the wsgi app, uvicorn.workers.UvicornWorker the asgi app with the async views
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+wsgi_app = ('WashForMe_Backend.asgi:application' if 'uvicorn' in worker_class
+            else 'WashForMe_Backend.wsgi:application')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * available_cores() + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
+
+
+def when_ready(server):
+    # import every url module, view and serializer in the master so workers fork with them loaded
+    from django.db import connections
+    from django.urls import get_resolver
+
+    from core.checks import has_shared_cache
+
+    if server.num_workers > 1 and not has_shared_cache():
+        raise RuntimeError(f'{server.num_workers} workers can not share a per process cache, set CACHE_URL '
+                           f'to a shared cache or WEB_CONCURRENCY=1')
+
+    get_resolver().url_patterns
+    # no connection may be shared with the workers
+    connections.close_all()
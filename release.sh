@@ -0,0 +1,12 @@
+#!/bin/bash
+set -e
+
+# One-shot release step, run once per deploy before the web servers start
+
+# Refuse to deploy a setup that fails the production checks, e.g. a per process cache
+python manage.py check --deploy
+
+# Apply database migrations
+python manage.py makemigrations core
+python manage.py migrate
+python manage.py populate_default
@@ -1,9 +1,4 @@
 #!/bin/bash
 
-# Apply database migrations
-python manage.py makemigrations core
-python manage.py migrate
-python manage.py populate_default
-
-# Start the Django development server
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Serve with gunicorn (see gunicorn.conf.py), migrations and seeding are done by release.sh
+exec gunicorn -c gunicorn.conf.py